@@ -0,0 +1,65 @@
+"""
+Benchmark the vectorized Hampel filter against the original per-sample loop.
+
+Usage:
+    python benchmarks/bench_hampel.py [--fs 125] [--hours 1 24] [--reference-seconds 600]
+
+The per-sample loop is timed on a shorter slice and extrapolated linearly,
+since running it on a 24 h record takes far too long.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from synthetic import synthetic_ppg_abp
+from ppg_cleaner.artifact_removal import hampel_filter
+
+
+def hampel_filter_loop(signal, window_size, threshold=3):
+    signal_filtered = signal.copy()
+    for i in range(window_size, len(signal) - window_size):
+        window = signal[i - window_size:i + window_size + 1]
+        median = np.median(window)
+        mad = np.median(np.abs(window - median))
+        if mad == 0:
+            continue
+        if abs(signal[i] - median) / mad > threshold:
+            signal_filtered[i] = median
+    return signal_filtered
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fs", type=float, default=125)
+    parser.add_argument("--hours", type=float, nargs="+", default=[1, 24])
+    parser.add_argument("--window-size", type=int, default=10)
+    parser.add_argument("--reference-seconds", type=float, default=600,
+                        help="Length of the slice used to time the per-sample loop.")
+    args = parser.parse_args()
+
+    reference, _ = synthetic_ppg_abp(args.fs, args.reference_seconds, artifact_rate=0)
+    start = time.perf_counter()
+    expected = hampel_filter_loop(reference, args.window_size)
+    loop_rate = len(reference) / (time.perf_counter() - start)
+    assert np.array_equal(hampel_filter(reference, args.window_size), expected)
+
+    print(f"{'duration':>10} {'samples':>12} {'loop (s)':>12} {'vectorized (s)':>15} {'speedup':>9}")
+    for hours in args.hours:
+        signal, _ = synthetic_ppg_abp(args.fs, hours * 3600, artifact_rate=0)
+        start = time.perf_counter()
+        hampel_filter(signal, args.window_size)
+        elapsed = time.perf_counter() - start
+        loop_estimate = len(signal) / loop_rate
+        print(f"{hours:>9g}h {len(signal):>12d} {loop_estimate:>11.1f}* "
+              f"{elapsed:>15.2f} {loop_estimate / elapsed:>8.0f}x")
+    print("* extrapolated from the per-sample loop on a "
+          f"{args.reference_seconds:g} s slice")
+
+
+if __name__ == "__main__":
+    main()
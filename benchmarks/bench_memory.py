@@ -0,0 +1,83 @@
+"""
+Measure peak memory of the preprocessing functions with and without out= buffers.
+
+Usage:
+    python benchmarks/bench_memory.py [--samples 10800000]
+
+Peaks are reported by tracemalloc, which also sees NumPy's array allocations,
+and exclude the input signal itself.
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from ppg_cleaner.preprocessing import (
+    zscore_normalization,
+    min_max_normalization,
+    rescale_signal,
+    clip_signal,
+)
+
+
+def legacy_zscore_normalization(signal):
+    return (signal - np.mean(signal)) / np.std(signal)
+
+
+def legacy_min_max_normalization(signal, min_val, max_val):
+    signal_min = np.min(signal)
+    signal_max = np.max(signal)
+    return ((signal - signal_min) / (signal_max - signal_min)) * (max_val - min_val) + min_val
+
+
+def legacy_rescale_signal(signal):
+    return signal / np.max(np.abs(signal))
+
+
+def legacy_clip_signal(signal, lower_bound, upper_bound):
+    return np.clip(np.array(signal), lower_bound, upper_bound)
+
+
+CASES = [
+    ("zscore_normalization", legacy_zscore_normalization, zscore_normalization, ()),
+    ("min_max_normalization", legacy_min_max_normalization, min_max_normalization, (0, 1)),
+    ("rescale_signal", legacy_rescale_signal, rescale_signal, ()),
+    ("clip_signal", legacy_clip_signal, clip_signal, (-1, 1)),
+]
+
+
+def peak_bytes(func, *args, **kwargs):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    result = func(*args, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--samples", type=int, default=24 * 3600 * 125,
+                        help="Signal length (default: 24 h at 125 Hz).")
+    args = parser.parse_args()
+
+    signal = np.random.default_rng(0).standard_normal(args.samples)
+    signal_mb = signal.nbytes / 2 ** 20
+    print(f"signal: {args.samples} samples, {signal_mb:.1f} MiB")
+    print(f"{'function':<24} {'before (MiB)':>13} {'default (MiB)':>14} {'in place (MiB)':>15}")
+
+    for name, legacy, func, extra in CASES:
+        before = peak_bytes(legacy, signal, *extra)
+        default = peak_bytes(func, signal, *extra)
+        buffer = signal.copy()
+        in_place = peak_bytes(func, buffer, *extra, out=buffer)
+        print(f"{name:<24} {before / 2 ** 20:>13.1f} {default / 2 ** 20:>14.1f} {in_place / 2 ** 20:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
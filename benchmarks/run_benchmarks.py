@@ -0,0 +1,194 @@
+"""
+Time every public function of ppg_cleaner and the combined pipeline on synthetic data.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--fs 125] [--durations 600 3600]
+                                        [--artifact-rate 1] [--repeat 3]
+                                        [--only hampel] [--output results.json]
+                                        [--compare previous.json]
+
+Everything runs offline on signals from synthetic.py. For each function and duration the
+best wall time over --repeat runs is reported together with the throughput in samples/sec
+and the tracemalloc peak of a separate run. --output saves the results as JSON, and
+--compare prints the time ratio against a previously saved file.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from datetime import datetime, timezone
+
+import numpy as np
+import scipy
+from scipy.signal import find_peaks
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from synthetic import synthetic_ppg_abp
+from ppg_cleaner import preprocessing, filtering, artifact_removal, alignment, peak_detection, quality
+from ppg_cleaner.combined_pipeline import combined_pipeline, combined_pipeline_windows
+from ppg_cleaner.out_of_core import combined_pipeline_out_of_core
+
+
+def _clean(ppg, abp):
+    """
+    Finite, in-range copies of the signals for stages that expect clean input.
+    """
+    ppg, abp = preprocessing.remove_invalid_values(ppg, abp)
+    return preprocessing.remove_out_of_range_bp(ppg, abp)
+
+
+def _out_of_core(ppg, abp, fs):
+    with tempfile.TemporaryDirectory() as directory:
+        cleaned = combined_pipeline_out_of_core(ppg, abp, fs, os.path.join(directory, "cleaned.npy"))
+        del cleaned
+
+
+# name -> function(ppg, abp, clean_ppg, clean_abp, fs) running one benchmark case
+CASES = {
+    "preprocessing.zscore_normalization": lambda p, a, cp, ca, fs: preprocessing.zscore_normalization(cp),
+    "preprocessing.min_max_normalization": lambda p, a, cp, ca, fs: preprocessing.min_max_normalization(cp, 0, 1),
+    "preprocessing.rescale_signal": lambda p, a, cp, ca, fs: preprocessing.rescale_signal(cp),
+    "preprocessing.clip_signal": lambda p, a, cp, ca, fs: preprocessing.clip_signal(a, 40, 200),
+    "preprocessing.remove_invalid_values": lambda p, a, cp, ca, fs: preprocessing.remove_invalid_values(p, a),
+    "preprocessing.remove_out_of_range_bp": lambda p, a, cp, ca, fs: preprocessing.remove_out_of_range_bp(p, a),
+    "preprocessing.find_invalid_intervals": lambda p, a, cp, ca, fs: preprocessing.find_invalid_intervals(p, a, 40, 200),
+    "preprocessing.interpolate_invalid_values": lambda p, a, cp, ca, fs: preprocessing.interpolate_invalid_values(p, a, fs, 1.0, 40, 200),
+    "preprocessing.baseline_wander_removal": lambda p, a, cp, ca, fs: preprocessing.baseline_wander_removal(cp, fs),
+    "preprocessing.baseline_wander_removal[piecewise]": lambda p, a, cp, ca, fs: preprocessing.baseline_wander_removal(
+        cp, fs, "piecewise"),
+    "preprocessing.baseline_wander_removal[median]": lambda p, a, cp, ca, fs: preprocessing.baseline_wander_removal(
+        cp, fs, "median"),
+    "preprocessing.baseline_wander_removal[morphological]": lambda p, a, cp, ca, fs: preprocessing.baseline_wander_removal(
+        cp, fs, "morphological"),
+    "preprocessing.baseline_wander_removal[spline]": lambda p, a, cp, ca, fs: preprocessing.baseline_wander_removal(
+        cp, fs, "spline"),
+    "preprocessing.downsample_signal[fft]": lambda p, a, cp, ca, fs: preprocessing.downsample_signal(cp, fs, fs * 0.8),
+    "preprocessing.downsample_signal[poly]": lambda p, a, cp, ca, fs: preprocessing.downsample_signal(cp, fs, fs * 0.8, method="poly"),
+    "preprocessing.resample_signal": lambda p, a, cp, ca, fs: preprocessing.resample_signal(cp, fs, fs * 2),
+    "filtering.bandpass_filter": lambda p, a, cp, ca, fs: filtering.bandpass_filter(cp, fs),
+    "filtering.notch_filter": lambda p, a, cp, ca, fs: filtering.notch_filter(cp, fs, min(50, fs / 2 - 1)),
+    "filtering.lowpass_filter": lambda p, a, cp, ca, fs: filtering.lowpass_filter(cp, fs, 8.0),
+    "filtering.highpass_filter": lambda p, a, cp, ca, fs: filtering.highpass_filter(cp, fs, 0.5),
+    "artifact_removal.hampel_filter": lambda p, a, cp, ca, fs: artifact_removal.hampel_filter(cp, 10, 3),
+    "artifact_removal.artifact_detection": lambda p, a, cp, ca, fs: artifact_removal.artifact_detection(cp, fs),
+    "artifact_removal.artifact_detection[intervals]": lambda p, a, cp, ca, fs: artifact_removal.artifact_detection(
+        cp, fs, return_intervals=True, merge_gap=0.5),
+    "artifact_removal.motion_artifact_removal": lambda p, a, cp, ca, fs: artifact_removal.motion_artifact_removal(
+        np.column_stack([cp, ca]), fs),
+    "peak_detection.detect_peaks": lambda p, a, cp, ca, fs: peak_detection.detect_peaks(cp, fs),
+    "peak_detection.detect_peaks[distance=50]": lambda p, a, cp, ca, fs: peak_detection.detect_peaks(cp, distance=50),
+    "scipy.signal.find_peaks[distance=50]": lambda p, a, cp, ca, fs: find_peaks(cp, distance=50),
+    "peak_detection.detect_feet": lambda p, a, cp, ca, fs: peak_detection.detect_feet(cp, peak_detection.detect_peaks(cp, fs)),
+    "alignment.find_peaks_and_max_correlation": lambda p, a, cp, ca, fs: alignment.find_peaks_and_max_correlation(cp, ca, fs),
+    "alignment.find_peaks_and_max_correlation[single_pass]": lambda p, a, cp, ca, fs: alignment.find_peaks_and_max_correlation(
+        cp, ca, fs, single_pass=True),
+    "alignment.estimate_alignment_lags": lambda p, a, cp, ca, fs: alignment.estimate_alignment_lags(cp, ca, fs),
+    "alignment.rank_peak_correlation_windows": lambda p, a, cp, ca, fs: alignment.rank_peak_correlation_windows(cp, ca, fs),
+    "alignment.extract_correlated_windows": lambda p, a, cp, ca, fs: alignment.extract_correlated_windows(cp, ca, fs, top_k=10),
+    "combined_pipeline": lambda p, a, cp, ca, fs: combined_pipeline(p, a, fs),
+    "combined_pipeline[float32]": lambda p, a, cp, ca, fs: combined_pipeline(p, a, fs, dtype=np.float32),
+    "combined_pipeline[interpolate]": lambda p, a, cp, ca, fs: combined_pipeline(p, a, fs, invalid_handling="interpolate"),
+    "combined_pipeline_windows": lambda p, a, cp, ca, fs: combined_pipeline_windows(p, a, fs, min_correlation=0.0),
+    "combined_pipeline[prescreen]": lambda p, a, cp, ca, fs: combined_pipeline(p, a, fs, prescreen=True),
+    "quality.window_quality": lambda p, a, cp, ca, fs: quality.window_quality(np.vstack([cp, ca]), fs),
+    "combined_pipeline_out_of_core": lambda p, a, cp, ca, fs: _out_of_core(p, a, fs),
+}
+
+
+def run_case(case, signals, fs, repeat):
+    ppg, abp = signals
+    clean_ppg, clean_abp = _clean(ppg, abp)
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        case(ppg, abp, clean_ppg, clean_abp, fs)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    case(ppg, abp, clean_ppg, clean_abp, fs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(times)
+    return {
+        "seconds": best,
+        "samples_per_second": len(ppg) / best if best > 0 else float("inf"),
+        "peak_memory_bytes": peak,
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fs", type=float, default=125)
+    parser.add_argument("--durations", type=float, nargs="+", default=[600, 3600],
+                        help="Signal durations in seconds.")
+    parser.add_argument("--artifact-rate", type=float, default=1.0, help="Artifacts per minute.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="*", default=None, help="Run only cases containing these substrings.")
+    parser.add_argument("--output", help="Write results to this JSON file.")
+    parser.add_argument("--compare", help="JSON file from a previous run to compare against.")
+    args = parser.parse_args()
+
+    # FastICA convergence warnings on synthetic data are not relevant to timing
+    warnings.simplefilter("ignore")
+
+    cases = {name: case for name, case in CASES.items()
+             if not args.only or any(pattern in name for pattern in args.only)}
+    previous = {}
+    if args.compare:
+        with open(args.compare) as f:
+            previous = {(r["name"], r["samples"]): r for r in json.load(f)["results"]}
+
+    results = []
+    header = f"{'case':<55} {'samples':>10} {'time (s)':>10} {'Msamples/s':>11} {'peak MiB':>9}"
+    print(header + (f" {'vs prev':>8}" if previous else ""))
+    for duration in args.durations:
+        signals = synthetic_ppg_abp(args.fs, duration, args.artifact_rate, seed=args.seed)
+        for name, case in cases.items():
+            result = {"name": name, "fs": args.fs, "duration": duration, "samples": len(signals[0]),
+                      "artifact_rate": args.artifact_rate}
+            result.update(run_case(case, signals, args.fs, args.repeat))
+            results.append(result)
+
+            line = (f"{name:<55} {result['samples']:>10d} {result['seconds']:>10.4f} "
+                    f"{result['samples_per_second'] / 1e6:>11.2f} {result['peak_memory_bytes'] / 2 ** 20:>9.1f}")
+            reference = previous.get((name, result["samples"]))
+            if reference:
+                line += f" {result['seconds'] / reference['seconds']:>7.2f}x"
+            print(line)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
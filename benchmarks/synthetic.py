@@ -0,0 +1,59 @@
+"""
+Synthetic PPG/ABP generators for offline benchmarks.
+
+The signals are built beat by beat from Gaussian pulse shapes (a systolic wave and a
+dicrotic wave), with heart-rate variability, respiratory baseline wander, sensor noise
+and injected artifacts, so every stage of the pipeline has realistic work to do.
+"""
+import numpy as np
+
+
+def synthetic_ppg_abp(fs=125, duration=600, artifact_rate=1.0, heart_rate=72, seed=0):
+    """
+    Generate a pair of aligned synthetic PPG and ABP signals.
+
+    Parameters:
+    - fs: Sampling frequency (Hz).
+    - duration: Length of the signals (in seconds).
+    - artifact_rate: Average number of artifacts per minute (spikes, flatlines,
+                     NaN dropouts and out-of-range ABP runs, in equal shares).
+    - heart_rate: Mean heart rate (beats per minute).
+    - seed: Seed of the random generator.
+
+    Returns:
+    - ppg_signal: Synthetic PPG signal (arbitrary units).
+    - abp_signal: Synthetic ABP signal (mmHg).
+    """
+    rng = np.random.default_rng(seed)
+    n = int(duration * fs)
+    t = np.arange(n) / fs
+
+    # Beat phase with slow heart-rate variability
+    rate = heart_rate / 60 * (1 + 0.05 * np.sin(2 * np.pi * 0.1 * t) + 0.02 * rng.standard_normal(n).cumsum() / np.sqrt(n))
+    phase = np.cumsum(rate) / fs
+    beat_phase = phase % 1.0
+
+    pulse = np.exp(-((beat_phase - 0.2) / 0.07) ** 2) + 0.4 * np.exp(-((beat_phase - 0.5) / 0.1) ** 2)
+    respiration = np.sin(2 * np.pi * 0.25 * t + rng.uniform(0, 2 * np.pi))
+
+    ppg_signal = pulse + 0.1 * respiration + 0.02 * rng.standard_normal(n)
+    # ABP leads the PPG by 0.15 s, since the pressure wave takes a pulse transit time to reach the finger
+    abp_pulse = np.interp(t + 0.15, t, pulse)
+    abp_signal = 80 + 40 * abp_pulse + 3 * respiration + 0.5 * rng.standard_normal(n)
+
+    n_artifacts = rng.poisson(artifact_rate * duration / 60)
+    starts = rng.integers(0, max(n - 1, 1), n_artifacts)
+    kinds = rng.integers(0, 4, n_artifacts)
+    lengths = rng.integers(int(0.2 * fs), int(3 * fs) + 1, n_artifacts)
+    for start, kind, length in zip(starts, kinds, lengths):
+        stop = min(start + length, n)
+        if kind == 0:
+            ppg_signal[start] += rng.choice([-1, 1]) * rng.uniform(2, 5)
+        elif kind == 1:
+            ppg_signal[start:stop] = ppg_signal[start]
+        elif kind == 2:
+            ppg_signal[start:stop] = np.nan
+        else:
+            abp_signal[start:stop] = rng.choice([0.0, 250.0])
+
+    return ppg_signal, abp_signal
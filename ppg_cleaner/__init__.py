@@ -6,7 +6,10 @@ from .preprocessing import (
     remove_invalid_values,
     baseline_wander_removal,
     downsample_signal,
-    remove_out_of_range_bp
+    remove_out_of_range_bp,
+    find_invalid_intervals,
+    interpolate_invalid_values,
+    resample_signal
 )
 
 # List all public objects in the package
@@ -18,15 +21,28 @@ __all__ = [
     "remove_invalid_values",
     "baseline_wander_removal",
     "downsample_signal",
-    "remove_out_of_range_bp"
+    "remove_out_of_range_bp",
+    "find_invalid_intervals",
+    "interpolate_invalid_values",
+    "resample_signal"
 ]
 
 from .alignment import(
-    find_peaks_and_max_correlation
+    find_peaks_and_max_correlation,
+    rank_peak_correlation_windows,
+    estimate_alignment_lags,
+    apply_alignment_lag,
+    select_ranked_windows,
+    extract_correlated_windows
 )
 
 __all__ = [
-    "find_peaks_and_max_correlation"
+    "find_peaks_and_max_correlation",
+    "rank_peak_correlation_windows",
+    "estimate_alignment_lags",
+    "apply_alignment_lag",
+    "select_ranked_windows",
+    "extract_correlated_windows"
 ]
 
 from .filtering import(
@@ -34,7 +50,10 @@ from .filtering import(
     notch_filter,
     lowpass_filter,
     highpass_filter,
-
+    design_filter,
+    filter_design_cache_info,
+    clear_filter_design_cache,
+    apply_sos_filter,
 )
 
 __all__ = [
@@ -42,16 +61,141 @@ __all__ = [
     "notch_filter",
     "lowpass_filter",
     "highpass_filter",
+    "design_filter",
+    "filter_design_cache_info",
+    "clear_filter_design_cache",
+    "apply_sos_filter",
 ]
 
 from .artifact_removal import(
     hampel_filter,
     artifact_detection,
-    motion_artifact_removal
+    motion_artifact_removal,
+    mask_artifact_intervals,
+    artifact_free_segments
 )
 
 __all__ = [
     "hampel_filter",
     "artifact_detection",
-    "motion_artifact_removal"
-]
\ No newline at end of file
+    "motion_artifact_removal",
+    "mask_artifact_intervals",
+    "artifact_free_segments"
+]
+
+from .streaming import(
+    StreamingCleaner,
+    StreamingResampler,
+    push_many
+)
+
+__all__ = [
+    "StreamingCleaner",
+    "StreamingResampler",
+    "push_many"
+]
+
+from .batch import(
+    batch_pipeline,
+    BatchResult
+)
+
+__all__ = [
+    "batch_pipeline",
+    "BatchResult"
+]
+
+from .out_of_core import(
+    combined_pipeline_out_of_core
+)
+
+__all__ = [
+    "combined_pipeline_out_of_core"
+]
+
+from .profiling import(
+    PipelineProfiler,
+    StageRecord,
+    summarize_stage_records
+)
+
+__all__ = [
+    "PipelineProfiler",
+    "StageRecord",
+    "summarize_stage_records"
+]
+
+from .pipeline import(
+    Pipeline,
+    Stage
+)
+
+__all__ = [
+    "Pipeline",
+    "Stage"
+]
+
+from .cache import(
+    ResultCache
+)
+
+__all__ = [
+    "ResultCache"
+]
+
+from .beats import(
+    segment_beats,
+    beat_quality
+)
+
+__all__ = [
+    "segment_beats",
+    "beat_quality"
+]
+
+from .peak_detection import(
+    estimate_heart_rate,
+    adaptive_peak_distance,
+    detect_peaks,
+    detect_feet,
+    StreamingPeakDetector
+)
+
+__all__ = [
+    "estimate_heart_rate",
+    "adaptive_peak_distance",
+    "detect_peaks",
+    "detect_feet",
+    "StreamingPeakDetector"
+]
+
+from .loader import(
+    read_header,
+    load_record,
+    load_ppg_abp
+)
+
+__all__ = [
+    "read_header",
+    "load_record",
+    "load_ppg_abp"
+]
+
+from .service import(
+    MonitoringService
+)
+
+__all__ = [
+    "MonitoringService"
+]
+from .quality import(
+    window_quality,
+    quality_mask,
+    prescreen_intervals
+)
+
+__all__ = [
+    "window_quality",
+    "quality_mask",
+    "prescreen_intervals"
+]
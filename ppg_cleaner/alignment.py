@@ -1,7 +1,11 @@
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.fft import rfft, irfft, next_fast_len
 from scipy.signal import find_peaks, correlate
+from ppg_cleaner.peak_detection import detect_peaks
 
-def find_peaks_and_max_correlation(ppg_signal, abp_signal, fs, segment_duration=2, overlap=1, peak_distance=50):
+def find_peaks_and_max_correlation(ppg_signal, abp_signal, fs, segment_duration=2, overlap=1, peak_distance=50,
+                                   single_pass=False):
     """
     Find the window with the highest correlation between PPG and ABP peaks.
 
@@ -11,7 +15,12 @@ def find_peaks_and_max_correlation(ppg_signal, abp_signal, fs, segment_duration=
     - fs: Sampling frequency (Hz).
     - segment_duration: Duration of each segment (in minutes).
     - overlap: Overlap between consecutive segments (in minutes).
-    - peak_distance: Minimum distance between consecutive peaks (in samples).
+    - peak_distance: Minimum distance between consecutive peaks (in samples) for
+                     scipy.signal.find_peaks. If None, peaks are found with detect_peaks and a
+                     distance adapted to the heart rate estimated from the signal.
+    - single_pass: If True, detect peaks once over the whole signals and score all
+                   windows in a batch (see rank_peak_correlation_windows). Peaks right
+                   at window edges may differ slightly from per-window detection.
 
     Returns:
     - best_ppg_segment: PPG signal segment with the highest correlation.
@@ -22,6 +31,16 @@ def find_peaks_and_max_correlation(ppg_signal, abp_signal, fs, segment_duration=
     overlap_samples = int(overlap * 60 * fs)
     step_size = segment_samples - overlap_samples
 
+    if single_pass:
+        window_starts, correlations = rank_peak_correlation_windows(
+            ppg_signal, abp_signal, fs, segment_duration, overlap, peak_distance
+        )
+        if len(window_starts) == 0:
+            return None, None, -np.inf
+        start_idx = window_starts[0]
+        end_idx = start_idx + segment_samples
+        return ppg_signal[start_idx:end_idx], abp_signal[start_idx:end_idx], correlations[0]
+
     max_corr = -np.inf
     best_ppg_segment = None
     best_abp_segment = None
@@ -35,8 +54,8 @@ def find_peaks_and_max_correlation(ppg_signal, abp_signal, fs, segment_duration=
         abp_segment = abp_signal[start_idx:end_idx]
 
         # Detect peaks in the PPG and ABP signals
-        ppg_peaks, _ = find_peaks(ppg_segment, distance=peak_distance)
-        abp_peaks, _ = find_peaks(abp_segment, distance=peak_distance)
+        ppg_peaks = _find_signal_peaks(ppg_segment, fs, peak_distance)
+        abp_peaks = _find_signal_peaks(abp_segment, fs, peak_distance)
 
         # Extract peak values for cross-correlation
         ppg_peak_values = ppg_segment[ppg_peaks]
@@ -53,4 +72,274 @@ def find_peaks_and_max_correlation(ppg_signal, abp_signal, fs, segment_duration=
                 best_ppg_segment = ppg_segment
                 best_abp_segment = abp_segment
 
-    return best_ppg_segment, best_abp_segment, max_corr
\ No newline at end of file
+    return best_ppg_segment, best_abp_segment, max_corr
+
+
+def rank_peak_correlation_windows(ppg_signal, abp_signal, fs, segment_duration=2, overlap=1, peak_distance=50):
+    """
+    Score every sliding window by the correlation of its PPG and ABP peaks, using a single
+    peak detection pass over each signal.
+
+    Peaks are assigned to windows with searchsorted, and the "valid" cross-correlation of
+    all windows is evaluated at once on zero-padded peak-value matrices, so the cost grows
+    linearly with the record length.
+
+    Parameters:
+    - ppg_signal: PPG signal (NumPy array).
+    - abp_signal: ABP signal (NumPy array).
+    - fs: Sampling frequency (Hz).
+    - segment_duration: Duration of each segment (in minutes).
+    - overlap: Overlap between consecutive segments (in minutes).
+    - peak_distance: Minimum distance between consecutive peaks (in samples) for
+                     scipy.signal.find_peaks. If None, peaks are found with detect_peaks and a
+                     distance adapted to the heart rate estimated from the signal.
+
+    Returns:
+    - window_starts: Start index of each scored window, ordered from highest to lowest correlation.
+    - correlations: Maximum peak cross-correlation of each window, in the same order.
+    """
+    segment_samples = int(segment_duration * 60 * fs)
+    overlap_samples = int(overlap * 60 * fs)
+    step_size = segment_samples - overlap_samples
+
+    window_starts = np.arange(0, len(ppg_signal) - segment_samples + 1, step_size)
+    if len(window_starts) == 0:
+        return window_starts, np.empty(0)
+
+    # Detect peaks once over the whole signals
+    ppg_peaks = _find_signal_peaks(ppg_signal, fs, peak_distance)
+    abp_peaks = _find_signal_peaks(abp_signal, fs, peak_distance)
+
+    ppg_values, ppg_counts = _window_peak_values(ppg_signal, ppg_peaks, window_starts, segment_samples)
+    abp_values, abp_counts = _window_peak_values(abp_signal, abp_peaks, window_starts, segment_samples)
+
+    # Windows need more than one peak in each signal to be scored
+    scored = (ppg_counts > 1) & (abp_counts > 1)
+    window_starts = window_starts[scored]
+    ppg_values, ppg_counts = ppg_values[scored], ppg_counts[scored]
+    abp_values, abp_counts = abp_values[scored], abp_counts[scored]
+
+    correlations = _batch_valid_correlation_max(ppg_values, ppg_counts, abp_values, abp_counts)
+
+    # Stable sort keeps the earliest window first among equal scores
+    order = np.argsort(-correlations, kind="stable")
+    return window_starts[order], correlations[order]
+
+
+def select_ranked_windows(window_starts, correlations, min_correlation=None, top_k=None):
+    """
+    Keep the ranked windows that reach a correlation threshold and/or are among the top k.
+
+    Parameters:
+    - window_starts: Window start indices, ordered from highest to lowest correlation
+                     (as returned by rank_peak_correlation_windows).
+    - correlations: Correlation of each window, in the same order.
+    - min_correlation: Lowest correlation kept (default: None, no threshold).
+    - top_k: Maximum number of windows kept, the best first (default: None, no limit).
+
+    Returns:
+    - window_starts: Start indices of the kept windows, in increasing order.
+    - correlations: Correlation of each kept window, in the same order.
+    """
+    keep = np.ones(len(window_starts), dtype=bool)
+    if min_correlation is not None:
+        keep &= correlations >= min_correlation
+    window_starts, correlations = window_starts[keep], correlations[keep]
+    if top_k is not None:
+        if top_k < 0:
+            raise ValueError("'top_k' must be non-negative.")
+        window_starts, correlations = window_starts[:top_k], correlations[:top_k]
+
+    order = np.argsort(window_starts, kind="stable")
+    return window_starts[order], correlations[order]
+
+
+def extract_correlated_windows(ppg_signal, abp_signal, fs, segment_duration=2, overlap=1, peak_distance=50,
+                               min_correlation=None, top_k=None):
+    """
+    Extract every window whose PPG/ABP peak correlation reaches a threshold, or the k best
+    windows, instead of only the best one.
+
+    Windows are scored in a single pass (see rank_peak_correlation_windows) and returned as
+    views, so no samples are copied; consecutive windows may overlap.
+
+    Parameters:
+    - ppg_signal: PPG signal (NumPy array).
+    - abp_signal: ABP signal (NumPy array).
+    - fs: Sampling frequency (Hz).
+    - segment_duration: Duration of each segment (in minutes).
+    - overlap: Overlap between consecutive segments (in minutes).
+    - peak_distance: Minimum distance between consecutive peaks (in samples) for
+                     scipy.signal.find_peaks. If None, peaks are found with detect_peaks and a
+                     distance adapted to the heart rate estimated from the signal.
+    - min_correlation: Lowest correlation kept (default: None, no threshold).
+    - top_k: Maximum number of windows kept, the best first (default: None, no limit).
+
+    Returns:
+    - ppg_windows: List of PPG windows (views into ppg_signal), in time order.
+    - abp_windows: List of ABP windows (views into abp_signal), in the same order.
+    - window_starts: Start index of each window in the signals.
+    - correlations: Peak correlation of each window.
+    """
+    segment_samples = int(segment_duration * 60 * fs)
+    window_starts, correlations = select_ranked_windows(
+        *rank_peak_correlation_windows(ppg_signal, abp_signal, fs, segment_duration, overlap, peak_distance),
+        min_correlation, top_k
+    )
+    ppg_windows = [ppg_signal[start:start + segment_samples] for start in window_starts]
+    abp_windows = [abp_signal[start:start + segment_samples] for start in window_starts]
+    return ppg_windows, abp_windows, window_starts, correlations
+
+
+def estimate_alignment_lags(ppg_signal, abp_signal, fs, segment_duration=2, overlap=1, min_lag=0.0, max_lag=0.5,
+                            batch_size=256):
+    """
+    Estimate the PPG-to-ABP delay of every sliding window with normalized cross-correlation
+    of the continuous waveforms.
+
+    Each window is z-scored and the cross-correlation of all windows in a batch is computed
+    with one real FFT. The correlation at lag k is normalized by the n - |k| overlapping
+    samples, and only lags between min_lag and max_lag are searched. A positive lag means
+    the PPG pulse arrives after the ABP pulse, i.e. ppg[t + lag] lines up with abp[t].
+
+    Parameters:
+    - ppg_signal: PPG signal (NumPy array).
+    - abp_signal: ABP signal (NumPy array).
+    - fs: Sampling frequency (Hz).
+    - segment_duration: Duration of each segment (in minutes).
+    - overlap: Overlap between consecutive segments (in minutes).
+    - min_lag: Smallest delay searched (in seconds, default: 0.0).
+    - max_lag: Largest delay searched (in seconds, default: 0.5).
+    - batch_size: Number of windows transformed together, bounding memory (default: 256).
+
+    Returns:
+    - window_starts: Start index of each window.
+    - lags: Delay of the PPG relative to the ABP in each window (in samples).
+    - correlations: Normalized correlation at that delay (0 for constant windows).
+    """
+    ppg_signal = np.asarray(ppg_signal, dtype=float)
+    abp_signal = np.asarray(abp_signal, dtype=float)
+    segment_samples = int(segment_duration * 60 * fs)
+    overlap_samples = int(overlap * 60 * fs)
+    step_size = segment_samples - overlap_samples
+
+    lag_range = np.arange(int(np.ceil(min_lag * fs)), int(np.floor(max_lag * fs)) + 1)
+    if len(lag_range) == 0:
+        raise ValueError("min_lag must not be greater than max_lag.")
+    if np.max(np.abs(lag_range)) >= segment_samples:
+        raise ValueError("The lag range must be shorter than the segment duration.")
+
+    window_starts = np.arange(0, len(ppg_signal) - segment_samples + 1, step_size)
+    lags = np.zeros(len(window_starts), dtype=int)
+    correlations = np.zeros(len(window_starts))
+    if len(window_starts) == 0:
+        return window_starts, lags, correlations
+
+    # Zero padding past the largest lag keeps the circular correlation from wrapping around
+    n_fft = next_fast_len(segment_samples + int(np.max(np.abs(lag_range))))
+    overlap_counts = segment_samples - np.abs(lag_range)
+    ppg_windows = sliding_window_view(ppg_signal, segment_samples)
+    abp_windows = sliding_window_view(abp_signal, segment_samples)
+
+    for first in range(0, len(window_starts), batch_size):
+        batch = slice(first, first + batch_size)
+        ppg_batch = _zscore_rows(ppg_windows[window_starts[batch]])
+        abp_batch = _zscore_rows(abp_windows[window_starts[batch]])
+
+        # Entry k of the circular result is sum_t ppg[t + k] * abp[t]
+        spectrum = rfft(ppg_batch, n_fft, axis=1) * np.conj(rfft(abp_batch, n_fft, axis=1))
+        correlation = irfft(spectrum, n_fft, axis=1)[:, lag_range % n_fft] / overlap_counts
+
+        best = np.argmax(correlation, axis=1)
+        lags[batch] = lag_range[best]
+        correlations[batch] = correlation[np.arange(len(best)), best]
+
+    return window_starts, lags, correlations
+
+
+def apply_alignment_lag(ppg_segment, abp_segment, lag):
+    """
+    Shift a PPG/ABP pair by an estimated delay so that their pulses line up.
+
+    Parameters:
+    - ppg_segment: PPG signal segment (NumPy array).
+    - abp_segment: ABP signal segment of the same length (NumPy array).
+    - lag: Delay of the PPG relative to the ABP (in samples), as from estimate_alignment_lags.
+
+    Returns:
+    - aligned_ppg: View of the PPG segment starting lag samples later (when lag > 0).
+    - aligned_abp: View of the ABP segment of the same length.
+    """
+    lag = int(lag)
+    length = len(ppg_segment) - abs(lag)
+    if length <= 0:
+        raise ValueError("The lag must be shorter than the segments.")
+    if lag >= 0:
+        return ppg_segment[lag:lag + length], abp_segment[:length]
+    return ppg_segment[:length], abp_segment[-lag:-lag + length]
+
+
+def _find_signal_peaks(signal, fs, peak_distance):
+    """
+    Peaks found with scipy's find_peaks, or with detect_peaks and an adaptive distance when
+    peak_distance is None.
+    """
+    if peak_distance is None:
+        return detect_peaks(signal, fs)
+    peaks, _ = find_peaks(signal, distance=peak_distance)
+    return peaks
+
+
+def _zscore_rows(windows):
+    """
+    Z-score each row, leaving constant rows at zero.
+    """
+    centred = windows - windows.mean(axis=1, keepdims=True)
+    std = centred.std(axis=1, keepdims=True)
+    return np.divide(centred, std, out=np.zeros_like(centred), where=std > 0)
+
+
+def _window_peak_values(signal, peaks, window_starts, segment_samples):
+    """
+    Gather the peak values falling in each window into a zero-padded matrix.
+    """
+    first = np.searchsorted(peaks, window_starts, side="left")
+    last = np.searchsorted(peaks, window_starts + segment_samples, side="left")
+    counts = last - first
+
+    width = max(int(counts.max()), 1)
+    index = first[:, None] + np.arange(width)[None, :]
+    in_window = np.arange(width)[None, :] < counts[:, None]
+
+    peak_values = signal[peaks] if len(peaks) else np.zeros(1)
+    values = np.where(in_window, peak_values[np.minimum(index, len(peak_values) - 1)], 0.0)
+    return values, counts
+
+
+def _batch_valid_correlation_max(a_values, a_counts, b_values, b_counts):
+    """
+    Maximum of the "valid" cross-correlation for each row of two zero-padded matrices.
+    """
+    n_windows = len(a_counts)
+    if n_windows == 0:
+        return np.empty(0)
+
+    # In "valid" mode the shorter sequence slides across the longer one
+    a_is_short = a_counts <= b_counts
+    lag_counts = np.abs(a_counts - b_counts) + 1
+
+    width = max(a_values.shape[1], b_values.shape[1])
+    max_lags = int(lag_counts.max())
+    a_values = np.pad(a_values, ((0, 0), (0, width + max_lags - a_values.shape[1])))
+    b_values = np.pad(b_values, ((0, 0), (0, width + max_lags - b_values.shape[1])))
+
+    # Zero padding past each row's count keeps the shorter sequence from meeting padded samples
+    short = np.where(a_is_short[:, None], a_values, b_values)[:, :width]
+    long = np.where(a_is_short[:, None], b_values, a_values)
+
+    best = np.full(n_windows, -np.inf)
+    for lag in range(max_lags):
+        correlation = np.einsum("ij,ij->i", short, long[:, lag:lag + width])
+        valid = lag < lag_counts
+        best[valid] = np.maximum(best[valid], correlation[valid])
+    return best
@@ -1,38 +1,68 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from sklearn.decomposition import FastICA
 
+from ppg_cleaner.utils import mask_to_intervals, intervals_to_mask, complement_intervals
+
 
-def hampel_filter(signal, window_size, threshold=3):
+def hampel_filter(signal, window_size, threshold=3, chunk_size=65536, axis=-1):
     """
     Detect and remove outliers using the Hampel method.
     
+    The rolling median and median absolute deviation are computed on strided
+    window views, one chunk of samples at a time, so memory stays bounded at
+    roughly chunk_size * (2 * window_size + 1) values per channel regardless of
+    signal length.
+    
     Parameters:
-    - signal: Input signal (NumPy array).
+    - signal: Input signal (NumPy array), e.g. (n_samples,) or (n_channels, n_samples).
     - window_size: Half the window size for calculating the median.
     - threshold: Threshold for identifying outliers (default: 3).
+    - chunk_size: Number of samples processed per vectorized batch (default: 65536).
+    - axis: Time axis of the signal (default: -1).
     
     Returns:
     - Filtered signal (NumPy array).
     """
+    signal = np.asarray(signal)
     signal_filtered = signal.copy()
-    n = len(signal)
-    
-    for i in range(window_size, n - window_size):
-        window = signal[i - window_size:i + window_size + 1]
-        median = np.median(window)
-        mad = np.median(np.abs(window - median))  # Median absolute deviation
-        
-        if mad == 0:  # Avoid division by zero
-            continue
-        
-        # Check if the point is an outlier
-        if abs(signal[i] - median) / mad > threshold:
-            signal_filtered[i] = median
+    n = signal.shape[axis]
+    full_window = 2 * window_size + 1
+
+    if n < full_window:
+        return signal_filtered
+
+    # Work on a (channels, samples) view so every channel is handled in the same call
+    channels = np.moveaxis(signal, axis, -1).reshape(-1, n)
+    channels_filtered = np.moveaxis(signal_filtered, axis, -1)
+
+    # Every centre sample i in [window_size, n - window_size) owns one window
+    windows = sliding_window_view(channels, full_window, axis=-1)
+    n_windows = windows.shape[1]
+
+    for start in range(0, n_windows, chunk_size):
+        stop = min(start + chunk_size, n_windows)
+        window = windows[:, start:stop]
+        centre = channels[:, start + window_size:stop + window_size]
+
+        median = np.median(window, axis=-1)
+        mad = np.median(np.abs(window - median[..., None]), axis=-1)  # Median absolute deviation
+
+        # Check which points are outliers (windows with zero MAD are skipped)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            outliers = (mad != 0) & (np.abs(centre - median) / mad > threshold)
+        replaced = np.where(outliers, median, centre)
+        channels_filtered[..., start + window_size:stop + window_size] = replaced.reshape(
+            channels_filtered.shape[:-1] + (stop - start,)
+        )
     
     return signal_filtered
 
 
-def artifact_detection(signal, fs, threshold=0.1):
+def artifact_detection(signal, fs, threshold=0.1, axis=-1, return_intervals=False, merge_gap=0.0, min_duration=0.0):
     """
     Identify segments with sudden spikes or drops using thresholds or variance.
     
@@ -40,39 +70,221 @@ def artifact_detection(signal, fs, threshold=0.1):
     - signal: Input signal (NumPy array).
     - fs: Sampling frequency in Hz.
     - threshold: Threshold for detecting sudden changes (default: 0.1).
+    - axis: Time axis of the signal (default: -1).
+    - return_intervals: Return merged artifact intervals instead of sample indices (default: False).
+    - merge_gap: Intervals separated by at most this gap are merged (in seconds, default: 0.0).
+    - min_duration: Merged intervals shorter than this are dropped (in seconds, default: 0.0).
     
     Returns:
-    - artifact_indices: Indices of detected artifacts.
+    - artifact_indices: Indices of detected artifacts. For multi-channel input, a tuple of
+                        index arrays as returned by np.nonzero.
+    or, if return_intervals=True:
+    - intervals: Integer array of shape (n_intervals, 2) with the [start, stop) samples of each
+                 artifact, covering both samples of every flagged jump. For multi-channel input,
+                 a sample is flagged when any channel jumps.
+    - severity: Largest jump inside each interval, relative to the threshold.
     """
     # Calculate the first derivative to detect changes
-    diff_signal = np.diff(signal)
-    artifact_indices = np.where(np.abs(diff_signal) > threshold)[0]
+    diff_signal = np.diff(signal, axis=axis)
+    if return_intervals:
+        return _artifact_intervals(diff_signal, fs, threshold, axis, merge_gap, min_duration)
+
+    artifact_indices = np.nonzero(np.abs(diff_signal) > threshold)
+    if diff_signal.ndim == 1:
+        artifact_indices = artifact_indices[0]
     
     return artifact_indices
 
 
-def motion_artifact_removal(signal, fs, n_components=2):
+def mask_artifact_intervals(signal, intervals, fill_value=np.nan, axis=-1):
     """
-    Remove artifacts caused by motion using Independent Component Analysis (ICA).
-    
+    Copy of a signal with the artifact intervals replaced by a fill value.
+
     Parameters:
     - signal: Input signal (NumPy array).
+    - intervals: Integer array of shape (n_intervals, 2) of [start, stop) samples, as returned
+                 by artifact_detection with return_intervals=True.
+    - fill_value: Value written inside the intervals (default: NaN).
+    - axis: Time axis of the signal (default: -1).
+
+    Returns:
+    - Masked copy of the signal (floating point when filled with NaN).
+    """
+    signal = np.asarray(signal)
+    dtype = np.result_type(signal, np.float64) if np.isnan(fill_value) else signal.dtype
+    masked = np.array(signal, dtype=dtype)
+    mask = intervals_to_mask(intervals, signal.shape[axis])
+    np.moveaxis(masked, axis, -1)[..., mask] = fill_value
+    return masked
+
+
+def artifact_free_segments(signal, intervals, min_length=1, axis=-1):
+    """
+    Views of the spans between artifact intervals, so later stages can skip artifacts without copying.
+
+    Parameters:
+    - signal: Input signal (NumPy array).
+    - intervals: Sorted, non-overlapping integer array of shape (n_intervals, 2) of [start, stop)
+                 samples, as returned by artifact_detection with return_intervals=True.
+    - min_length: Clean spans shorter than this are skipped (in samples, default: 1).
+    - axis: Time axis of the signal (default: -1).
+
+    Returns:
+    - segments: List of views of the signal, one per clean span.
+    - clean_intervals: Integer array of shape (n_segments, 2) with the [start, stop) of each span.
+    """
+    signal = np.asarray(signal)
+    clean_intervals = complement_intervals(intervals, signal.shape[axis])
+    clean_intervals = clean_intervals[clean_intervals[:, 1] - clean_intervals[:, 0] >= min_length]
+    leading = (slice(None),) * (axis % signal.ndim)
+    segments = [signal[leading + (slice(start, stop),)] for start, stop in clean_intervals]
+    return segments, clean_intervals
+
+
+def _artifact_intervals(diff_signal, fs, threshold, axis, merge_gap, min_duration):
+    """
+    Merge runs of above-threshold jumps into [start, stop) sample intervals with their severity.
+    """
+    excess = np.abs(np.moveaxis(diff_signal, axis, -1)) / threshold
+    excess = excess.reshape(-1, excess.shape[-1]).max(axis=0)
+    # Jump i spans samples i and i + 1
+    runs = mask_to_intervals(excess > 1)
+    if len(runs) == 0:
+        return runs, np.empty(0)
+    severity = np.maximum.reduceat(excess, runs[:, 0])
+    runs[:, 1] += 1
+
+    # Start a new interval wherever the gap to the previous one exceeds merge_gap
+    gaps = runs[1:, 0] - runs[:-1, 1]
+    first = np.flatnonzero(np.concatenate([[True], gaps > int(merge_gap * fs)]))
+    last = np.concatenate([first[1:], [len(runs)]]) - 1
+    intervals = np.column_stack([runs[first, 0], runs[last, 1]])
+    severity = np.maximum.reduceat(severity, first)
+
+    keep = intervals[:, 1] - intervals[:, 0] >= int(min_duration * fs)
+    return intervals[keep], severity[keep]
+
+
+def motion_artifact_removal(signal, fs, n_components=2, window_duration=None, overlap=0.5, max_workers=1,
+                            cardiac_band=(0.5, 5.0), min_cardiac_ratio=0.5, channel=0, random_state=42, axis=0):
+    """
+    Remove artifacts caused by motion using Independent Component Analysis (ICA).
+
+    The channels (e.g. several pleth leads and accelerometer axes) are unmixed window by
+    window. In each window, components whose power lies mostly outside the cardiac band are
+    treated as motion and zeroed before mixing back, and the cleaned windows are blended
+    with Hann weights. With several worker processes, consecutive windows are split into one
+    contiguous group per worker; within a group each window's ICA is warm-started from the
+    unmixing matrix of the previous window.
+
+    Unlike the other stages, the time axis defaults to the first one, so (n_samples, n_channels)
+    arrays as accepted by scikit-learn keep working; pass axis=-1 for (n_channels, n_samples).
+
+    Parameters:
+    - signal: Input signal, (n_samples, n_channels) by default. A 1-D signal is one channel,
+              which ICA cannot separate, so it is returned essentially unchanged.
     - fs: Sampling frequency in Hz.
-    - n_components: Number of components for ICA (default: 2).
-    
+    - n_components: Number of components for ICA (default: 2, at most the number of channels).
+    - window_duration: Length of each ICA window (in seconds). If None, the whole signal is
+                       one window.
+    - overlap: Fraction of overlap between consecutive windows (default: 0.5).
+    - max_workers: Number of worker processes (default: 1, run in the calling process;
+                   None uses one per CPU).
+    - cardiac_band: Frequency range (in Hz) of the pulse (default: (0.5, 5.0)).
+    - min_cardiac_ratio: Minimum fraction of a component's power inside the cardiac band for
+                         it to be kept (default: 0.5). The most cardiac component is always kept.
+    - channel: Index of the channel returned (default: 0).
+    - random_state: Seed of the ICA initialization (default: 42).
+    - axis: Time axis of the signal (default: 0).
+
     Returns:
-    - Cleaned signal (NumPy array).
+    - Cleaned signal of the selected channel (NumPy array).
     """
-    # Ensure signal is 2D for ICA
+    signal = np.asarray(signal, dtype=float)
     if signal.ndim == 1:
         signal = signal.reshape(-1, 1)
-    
-    # Perform ICA
-    ica = FastICA(n_components=n_components, random_state=42)
-    decomposed_signals = ica.fit_transform(signal)
-    
-    # Reconstruct the cleaned signal (remove unwanted components)
-    reconstructed_signal = ica.inverse_transform(decomposed_signals)
-    
-    # Return the first component as the cleaned signal
-    return reconstructed_signal[:, 0]
\ No newline at end of file
+    elif signal.ndim == 2:
+        # scikit-learn expects (n_samples, n_channels)
+        signal = np.moveaxis(signal, axis, 0)
+    else:
+        raise ValueError("ICA needs a one- or two-dimensional signal.")
+    if not 0 <= overlap < 1:
+        raise ValueError("'overlap' must be in [0, 1).")
+
+    n_samples = len(signal)
+    window_samples = n_samples if window_duration is None else min(int(window_duration * fs), n_samples)
+    step = max(int(window_samples * (1 - overlap)), 1)
+    starts = np.arange(0, n_samples - window_samples + 1, step)
+    # Cover the end of the signal with a final window
+    if starts[-1] + window_samples < n_samples:
+        starts = np.append(starts, n_samples - window_samples)
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    groups = np.array_split(starts, min(max_workers, len(starts)))
+    params = (window_samples, fs, min(n_components, signal.shape[1]), cardiac_band, min_cardiac_ratio, channel,
+              random_state)
+
+    total = np.zeros(n_samples)
+    weight = np.zeros(n_samples)
+    if len(groups) == 1:
+        results = [_clean_window_group(signal, starts, *params)]
+    else:
+        with ProcessPoolExecutor(max_workers=len(groups)) as executor:
+            futures = [
+                executor.submit(_clean_window_group, signal[group[0]:group[-1] + window_samples], group - group[0],
+                                *params)
+                for group in groups
+            ]
+            results = [future.result() for future in futures]
+
+    for group, (group_total, group_weight) in zip(groups, results):
+        total[group[0]:group[0] + len(group_total)] += group_total
+        weight[group[0]:group[0] + len(group_weight)] += group_weight
+
+    return total / weight
+
+
+def _clean_window_group(segment, starts, window_samples, fs, n_components, cardiac_band, min_cardiac_ratio, channel,
+                        random_state):
+    """
+    Run ICA over consecutive windows of a segment, warm-starting each from the previous one.
+
+    Returns the Hann-weighted sum of the cleaned windows and the sum of the weights.
+    """
+    weights = np.hanning(window_samples + 2)[1:-1]
+    total = np.zeros(len(segment))
+    weight = np.zeros(len(segment))
+
+    w_init = None
+    for start in starts:
+        window = segment[start:start + window_samples]
+        ica = FastICA(n_components=n_components, w_init=w_init, random_state=random_state)
+        sources = ica.fit_transform(window)
+        # Unmixing matrix in the whitened space, the form FastICA accepts as w_init
+        w_init = ica.components_ @ np.linalg.pinv(ica.whitening_)
+
+        motion = ~_cardiac_components(sources, fs, cardiac_band, min_cardiac_ratio)
+        sources[:, motion] = 0
+        cleaned = ica.inverse_transform(sources)[:, channel]
+
+        total[start:start + window_samples] += weights * cleaned
+        weight[start:start + window_samples] += weights
+
+    return total, weight
+
+
+def _cardiac_components(sources, fs, cardiac_band, min_cardiac_ratio):
+    """
+    Mask of the components whose power lies mostly inside the cardiac band.
+    """
+    power = np.abs(np.fft.rfft(sources, axis=0)) ** 2
+    frequencies = np.fft.rfftfreq(len(sources), 1 / fs)
+    in_band = (frequencies >= cardiac_band[0]) & (frequencies <= cardiac_band[1])
+
+    total_power = power[1:].sum(axis=0)
+    ratio = np.divide(power[in_band].sum(axis=0), total_power, out=np.zeros(len(total_power)),
+                      where=total_power > 0)
+    keep = ratio >= min_cardiac_ratio
+    keep[np.argmax(ratio)] = True
+    return keep
@@ -0,0 +1,117 @@
+import itertools
+import os
+import traceback
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from ppg_cleaner.combined_pipeline import combined_pipeline, combined_pipeline_windows
+from ppg_cleaner.profiling import PipelineProfiler
+
+BatchResult = namedtuple("BatchResult", ["index", "cleaned_ppg", "cleaned_abp", "error", "profile",
+                                         "window_starts", "correlations"],
+                         defaults=[None, None, None])
+BatchResult.__doc__ = """
+Outcome of one record in a batch run.
+
+- index: Position of the record in the input iterable.
+- cleaned_ppg: Cleaned PPG signal, or list of PPG windows with windows=True (None if the record failed).
+- cleaned_abp: Cleaned ABP signal, or list of ABP windows with windows=True (None if the record failed).
+- error: Formatted traceback if the record failed, otherwise None.
+- profile: Stage records from PipelineProfiler.to_records if profiling was requested, otherwise None.
+- window_starts: Start index of each window with windows=True, otherwise None.
+- correlations: Peak correlation of each window with windows=True, otherwise None.
+"""
+
+
+def batch_pipeline(records, fs=None, loader=None, max_workers=None, chunk_size=1, max_pending=None,
+                   profile=False, windows=False, **pipeline_kwargs):
+    """
+    Run combined_pipeline over many records in parallel worker processes.
+
+    Results are yielded as soon as their worker finishes, so they are generally not in
+    input order; use BatchResult.index to match them up. A record that raises is reported
+    through BatchResult.error and does not stop the rest of the batch.
+
+    Parameters:
+    - records: Iterable of record sources. Without a loader, each source is a
+               (ppg_signal, abp_signal) or (ppg_signal, abp_signal, fs) tuple.
+    - fs: Sampling frequency (Hz) used for sources that do not provide their own.
+    - loader: Optional picklable function called in the worker with each source, returning
+              a tuple as described above (e.g. to read a record from disk by name).
+    - max_workers: Number of worker processes (default: number of CPUs).
+    - chunk_size: Number of records sent to a worker per task (default: 1).
+    - max_pending: Maximum number of tasks submitted but not yet finished
+                   (default: 2 * max_workers). Bounds memory for long iterables.
+    - profile: Collect per-stage measurements of each record in BatchResult.profile
+               (default: False). summarize_stage_records aggregates them across the batch.
+    - windows: If True, run combined_pipeline_windows instead of combined_pipeline, so each
+               record yields all its qualifying windows (default: False). Pass min_correlation
+               and/or top_k through pipeline_kwargs.
+    - **pipeline_kwargs: Keyword arguments forwarded to combined_pipeline (or
+                         combined_pipeline_windows).
+
+    Yields:
+    - BatchResult for each record.
+    """
+    if chunk_size < 1:
+        raise ValueError("'chunk_size' must be at least 1.")
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_pending is None:
+        max_pending = 2 * max_workers
+
+    chunks = _chunked(enumerate(records), chunk_size)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for chunk in itertools.islice(chunks, max_pending):
+            pending.add(executor.submit(_clean_chunk, chunk, fs, loader, profile, windows, pipeline_kwargs))
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+            # Refill the queue as tasks finish
+            for chunk in itertools.islice(chunks, len(done)):
+                pending.add(executor.submit(_clean_chunk, chunk, fs, loader, profile, windows, pipeline_kwargs))
+
+
+def _chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _clean_chunk(chunk, fs, loader, profile, windows, pipeline_kwargs):
+    results = []
+    for index, source in chunk:
+        profiler = PipelineProfiler(record=index) if profile else None
+        try:
+            record = loader(source) if loader is not None else source
+            if len(record) == 3:
+                ppg_signal, abp_signal, record_fs = record
+            else:
+                (ppg_signal, abp_signal), record_fs = record, fs
+            if record_fs is None:
+                raise ValueError("No sampling frequency given for the record or the batch.")
+
+            if windows:
+                ppg_windows, abp_windows, window_starts, correlations = combined_pipeline_windows(
+                    ppg_signal, abp_signal, record_fs, profiler=profiler, **pipeline_kwargs
+                )
+                results.append(BatchResult(index, ppg_windows, abp_windows, None, _export(profiler),
+                                           window_starts, correlations))
+            else:
+                cleaned_ppg, cleaned_abp = combined_pipeline(ppg_signal, abp_signal, record_fs,
+                                                             profiler=profiler, **pipeline_kwargs)
+                results.append(BatchResult(index, cleaned_ppg, cleaned_abp, None, _export(profiler)))
+        except Exception:
+            results.append(BatchResult(index, None, None, traceback.format_exc(), _export(profiler)))
+    return results
+
+
+def _export(profiler):
+    return profiler.to_records() if profiler is not None else None
@@ -0,0 +1,107 @@
+import numpy as np
+from ppg_cleaner.peak_detection import detect_peaks, detect_feet
+
+
+def segment_beats(signal, fs, peaks=None, peak_distance=None, max_beat_duration=2.0, ragged=False):
+    """
+    Cut a PPG or ABP signal into individual beats in one vectorized pass.
+
+    Beats run from one foot (the minimum between two systolic peaks) to the next. Peaks are
+    detected with detect_peaks unless given. Beats longer than
+    max_beat_duration are dropped, as they span gaps or artifacts.
+
+    Parameters:
+    - signal: Input signal (NumPy array).
+    - fs: Sampling frequency (Hz).
+    - peaks: Optional indices of systolic peaks; detected when None.
+    - peak_distance: Minimum distance between consecutive peaks (in samples) used for detection.
+                     If None, it is adapted to the estimated heart rate.
+    - max_beat_duration: Longest accepted beat (in seconds, default: 2.0).
+    - ragged: Return the beats as concatenated values with offsets instead of a padded array.
+
+    Returns:
+    - beats: Array of shape (n_beats, max_length) padded with NaN, or, if ragged=True, the
+             concatenated beat samples.
+    - lengths: Number of samples of each beat, or, if ragged=True, offsets of shape
+               (n_beats + 1,) so that beat i is values[offsets[i]:offsets[i + 1]].
+    - starts: Index of the first sample (the foot) of each beat in the signal.
+    """
+    signal = np.asarray(signal, dtype=float)
+    if peaks is None:
+        peaks = detect_peaks(signal, fs, peak_distance)
+    peaks = np.asarray(peaks)
+    max_length = int(max_beat_duration * fs)
+
+    feet = detect_feet(signal, peaks)
+    starts = feet[:-1]
+    lengths = np.diff(feet)
+    keep = lengths <= max_length
+    starts, lengths = starts[keep], lengths[keep]
+
+    width = int(lengths.max()) if len(lengths) else 0
+    columns = np.arange(width)
+    index = starts[:, None] + columns[None, :]
+    inside = columns[None, :] < lengths[:, None]
+    beats = np.where(inside, signal[np.minimum(index, len(signal) - 1)], np.nan)
+
+    if ragged:
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        return beats[inside], offsets, starts
+    return beats, lengths, starts
+
+
+def beat_quality(beats, lengths, n_points=64):
+    """
+    Signal-quality metrics for many beats at once.
+
+    Parameters:
+    - beats: Padded beat array of shape (n_beats, max_length) from segment_beats.
+    - lengths: Number of valid samples of each beat.
+    - n_points: Number of points each beat is resampled to for the template comparison.
+
+    Returns:
+    - Dict of arrays of shape (n_beats,):
+      - 'template_correlation': Pearson correlation of each beat with the median beat shape.
+      - 'skewness': Skewness of the beat samples.
+      - 'amplitude_ratio': Peak-to-peak amplitude relative to the median amplitude.
+    """
+    beats = np.asarray(beats, dtype=float)
+    lengths = np.asarray(lengths)
+    n_beats = len(lengths)
+    if n_beats == 0:
+        empty = np.empty(0)
+        return {"template_correlation": empty, "skewness": empty, "amplitude_ratio": empty}
+
+    inside = np.arange(beats.shape[1])[None, :] < lengths[:, None]
+    counts = np.maximum(lengths, 1)
+
+    # Moments over the valid samples of each beat
+    values = np.where(inside, beats, 0.0)
+    mean = values.sum(axis=1) / counts
+    centred = np.where(inside, beats - mean[:, None], 0.0)
+    variance = (centred ** 2).sum(axis=1) / counts
+    third = (centred ** 3).sum(axis=1) / counts
+    with np.errstate(divide='ignore', invalid='ignore'):
+        skewness = np.where(variance > 0, third / variance ** 1.5, 0.0)
+
+    amplitude = np.where(inside, beats, -np.inf).max(axis=1) - np.where(inside, beats, np.inf).min(axis=1)
+    median_amplitude = np.median(amplitude)
+    amplitude_ratio = amplitude / median_amplitude if median_amplitude > 0 else np.zeros(n_beats)
+
+    # Resample every beat to n_points by linear interpolation, then compare with the median shape
+    position = np.linspace(0, 1, n_points)[None, :] * (lengths[:, None] - 1)
+    left = np.floor(position).astype(int)
+    right = np.minimum(left + 1, np.maximum(lengths[:, None] - 1, 0))
+    fraction = position - left
+    rows = np.arange(n_beats)[:, None]
+    shapes = (1 - fraction) * beats[rows, left] + fraction * beats[rows, right]
+
+    template = np.median(shapes, axis=0)
+    shapes = shapes - shapes.mean(axis=1, keepdims=True)
+    template = template - template.mean()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        correlation = shapes @ template / (np.linalg.norm(shapes, axis=1) * np.linalg.norm(template))
+    correlation = np.nan_to_num(correlation)
+
+    return {"template_correlation": correlation, "skewness": skewness, "amplitude_ratio": amplitude_ratio}
+
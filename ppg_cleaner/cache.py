@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+# Bump when the stored layout or the meaning of cached results changes
+CACHE_FORMAT_VERSION = 1
+
+
+class ResultCache:
+    """
+    Size-bounded on-disk cache of cleaned segments.
+
+    Entries are keyed by a hash of the raw input arrays, the sampling frequency and the
+    complete set of pipeline parameters, so a cached result is only reused when the cleaning
+    would be identical. Each entry is one uncompressed .npz file; reading an entry marks it
+    as recently used, and the least recently used entries are deleted once the cache grows
+    beyond max_bytes.
+
+    Parameters:
+    - directory: Directory holding the cache files (created if missing).
+    - max_bytes: Maximum total size of the cache files (default: 1 GiB).
+    """
+
+    def __init__(self, directory, max_bytes=2 ** 30):
+        self.directory = os.fspath(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, ppg_signal, abp_signal, fs, params):
+        """
+        Content hash identifying a pipeline run.
+
+        Parameters:
+        - ppg_signal: Raw PPG signal (NumPy array).
+        - abp_signal: Raw ABP signal (NumPy array).
+        - fs: Sampling frequency (Hz).
+        - params: JSON-serializable dict of every parameter affecting the result.
+
+        Returns:
+        - Hexadecimal key string.
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(json.dumps({"version": CACHE_FORMAT_VERSION, "fs": fs, "params": params},
+                                 sort_keys=True, default=str).encode())
+        for signal in (ppg_signal, abp_signal):
+            _update_with_array(digest, np.asarray(signal))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """
+        Load a cached entry.
+
+        Returns:
+        - Dict of the stored arrays, or None if the key is not cached.
+        """
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                entry = {name: data[name] for name in data.files}
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        _touch(path)
+        self.hits += 1
+        return entry
+
+    def put(self, key, **arrays):
+        """
+        Store arrays under a key, then evict old entries if the cache is too large.
+        Arguments that are None are not stored.
+        """
+        arrays = {name: value for name, value in arrays.items() if value is not None}
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as f:
+                np.savez(f, **arrays)
+            # Atomic rename, so concurrent readers never see a partial file
+            os.replace(temporary, self._path(key))
+        except BaseException:
+            try:
+                os.unlink(temporary)
+            except OSError:
+                pass
+            raise
+        _touch(self._path(key))
+        self.evict()
+
+    def evict(self):
+        """
+        Delete least recently used entries until the cache fits in max_bytes.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".npz"):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except OSError:
+                # Removed by another process already, or not removable
+                pass
+            total -= size
+
+    def size_bytes(self):
+        """
+        Total size of the cache entries on disk.
+        """
+        total = 0
+        for name in os.listdir(self.directory):
+            if name.endswith(".npz"):
+                try:
+                    total += os.path.getsize(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+        return total
+
+    def clear(self):
+        """
+        Delete every cache entry.
+        """
+        for name in os.listdir(self.directory):
+            if name.endswith(".npz"):
+                try:
+                    os.unlink(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".npz")
+
+
+def _touch(path):
+    # The modification time records the last use; set it explicitly because file system
+    # timestamps of writes can be too coarse to order entries created in quick succession
+    now = time.time_ns()
+    try:
+        os.utime(path, ns=(now, now))
+    except OSError:
+        # The entry was evicted or cleared concurrently; its data is still valid for this use
+        pass
+
+
+def _update_with_array(digest, array, block_bytes=2 ** 24):
+    digest.update(f"{array.dtype.str}{array.shape}".encode())
+    # Hash in blocks so large (memory-mapped) arrays are never copied as a whole
+    flat = array.reshape(-1)
+    step = max(block_bytes // max(array.itemsize, 1), 1)
+    for start in range(0, flat.size, step):
+        digest.update(np.ascontiguousarray(flat[start:start + step]).data)
@@ -2,16 +2,22 @@ import numpy as np
 from ppg_cleaner.preprocessing import (
     remove_invalid_values,
     baseline_wander_removal,
-    remove_out_of_range_bp
+    remove_out_of_range_bp,
+    interpolate_invalid_values
 )
 from ppg_cleaner.filtering import bandpass_filter
 from ppg_cleaner.artifact_removal import hampel_filter
-from ppg_cleaner.alignment import find_peaks_and_max_correlation
+from ppg_cleaner.alignment import find_peaks_and_max_correlation, rank_peak_correlation_windows, select_ranked_windows
+from ppg_cleaner.profiling import run_stage
+from ppg_cleaner.quality import prescreen_intervals
+from ppg_cleaner.utils import intervals_to_mask, mask_to_intervals
 
 def combined_pipeline(ppg_signal, abp_signal, fs, 
                       lower_bound=40, upper_bound=200, 
                       bandpass_low=0.5, bandpass_high=8.0, 
-                      segment_duration= 2, overlap=1, peak_distance=50, hampel_window_size=10, hampel_threshold=3):
+                      segment_duration= 2, overlap=1, peak_distance=50, hampel_window_size=10, hampel_threshold=3,
+                      invalid_handling='remove', max_gap=1.0, profiler=None, cache=None, dtype=np.float64,
+                      prescreen=False, prescreen_window=10.0, prescreen_options=None):
     """
     A combined pipeline function to clean and preprocess PPG and ABP signals.
 
@@ -26,32 +32,272 @@ def combined_pipeline(ppg_signal, abp_signal, fs,
     - window_duration: Duration of the window (in minutes) for maximum correlation.
     - hampel_window_size: Window size for Hampel filtering.
     - hampel_threshold: Threshold for Hampel filtering.
+    - invalid_handling: 'remove' deletes invalid and out-of-range samples (default).
+                        'interpolate' keeps the original timestamps: gaps up to max_gap
+                        seconds are interpolated, longer gaps split the record into
+                        segments that are cleaned independently, and the selected window
+                        never spans a gap.
+    - max_gap: Longest gap (in seconds) interpolated when invalid_handling='interpolate'.
+    - profiler: Optional PipelineProfiler receiving wall time, CPU time, sample counts
+                and (optionally) allocations for every stage (default: None).
+    - cache: Optional ResultCache. Results are looked up by a hash of the input signals and
+             all parameters above, and stored after a miss (default: None).
+    - dtype: Floating-point precision of the processing, np.float64 (default) or np.float32.
+             With np.float32 the signals are converted once on entry and every stage keeps
+             them in single precision, halving the memory of the working arrays. Filters whose
+             poles are too close to the unit circle run in float64 internally (see
+             apply_sos_filter). Against float64, the cleaned signals then differ by less than
+             3e-4 times their standard deviation (the baseline is removed before filtering, so
+             the filter error stays small against the pulse), except that peaks or Hampel
+             decisions on near-ties may flip and, rarely, a different window may be selected.
+    - prescreen: If True, score the record in windows of prescreen_window seconds with
+                 window_quality (flatline, clipping, cardiac-band power and kurtosis) before
+                 the heavy stages, and clean and search only the runs of windows in which
+                 both signals pass quality_mask (default: False). The selected window then
+                 never spans a failing window.
+    - prescreen_window: Length of the quality windows (in seconds, default: 10.0).
+    - prescreen_options: Optional dict of keyword arguments forwarded to prescreen_intervals:
+                         the tolerances of window_quality and the thresholds of quality_mask
+                         (default: None, their defaults).
 
     Returns:
-    - cleaned_ppg: Cleaned PPG signal (NumPy array).
-    - cleaned_abp: Cleaned ABP signal (NumPy array).
+    - cleaned_ppg: Cleaned PPG signal (NumPy array), or None if no window fits in the valid
+                   (and, with prescreen, usable) parts of the record.
+    - cleaned_abp: Cleaned ABP signal (NumPy array), or None likewise.
     """
+    if cache is not None:
+        params = dict(lower_bound=lower_bound, upper_bound=upper_bound,
+                      bandpass_low=bandpass_low, bandpass_high=bandpass_high,
+                      segment_duration=segment_duration, overlap=overlap, peak_distance=peak_distance,
+                      hampel_window_size=hampel_window_size, hampel_threshold=hampel_threshold,
+                      invalid_handling=invalid_handling, max_gap=max_gap, dtype=np.dtype(dtype).name,
+                      prescreen=prescreen, prescreen_window=prescreen_window,
+                      prescreen_options=prescreen_options)
+        key = cache.key(ppg_signal, abp_signal, fs, dict(params, pipeline="combined_pipeline"))
+        entry = cache.get(key)
+        if entry is not None:
+            return entry.get("cleaned_ppg"), entry.get("cleaned_abp")
+
+        cleaned_ppg, cleaned_abp = combined_pipeline(ppg_signal, abp_signal, fs, profiler=profiler, **params)
+        cache.put(key, cleaned_ppg=cleaned_ppg, cleaned_abp=cleaned_abp)
+        return cleaned_ppg, cleaned_abp
+
+    return _run_pipeline(ppg_signal, abp_signal, fs, lower_bound, upper_bound, bandpass_low, bandpass_high,
+                         segment_duration, overlap, peak_distance, hampel_window_size, hampel_threshold,
+                         invalid_handling, max_gap, profiler, dtype, prescreen, prescreen_window,
+                         prescreen_options)
+
+
+def combined_pipeline_windows(ppg_signal, abp_signal, fs, min_correlation=None, top_k=None,
+                              lower_bound=40, upper_bound=200,
+                              bandpass_low=0.5, bandpass_high=8.0,
+                              segment_duration=2, overlap=1, peak_distance=50, hampel_window_size=10,
+                              hampel_threshold=3, invalid_handling='remove', max_gap=1.0, profiler=None,
+                              cache=None, dtype=np.float64, prescreen=False, prescreen_window=10.0,
+                              prescreen_options=None):
+    """
+    Variant of combined_pipeline that returns every window whose peak correlation reaches a
+    threshold, or the k best windows, instead of only the best one, so a single pass over a
+    record yields a whole set of aligned segments.
+
+    The record is cleaned exactly as in combined_pipeline. The windows of each cleaned segment
+    are then scored with one peak detection pass (see rank_peak_correlation_windows).
+
+    Parameters:
+    - ppg_signal: Raw PPG signal (NumPy array).
+    - abp_signal: Raw ABP signal (NumPy array).
+    - fs: Sampling frequency (Hz).
+    - min_correlation: Lowest peak correlation of a returned window (default: None, no threshold).
+    - top_k: Maximum number of windows returned, the best first (default: None, no limit).
+             Can be combined with min_correlation; with neither, all scored windows are returned.
+    - Other parameters: As in combined_pipeline.
+
+    Returns:
+    - ppg_windows: List of cleaned PPG windows in time order, all views into one cleaned array.
+    - abp_windows: List of cleaned ABP windows, views into one cleaned array.
+    - window_starts: Start index of each window in the cleaned arrays, which follow the
+                     input timeline with invalid and out-of-range samples removed
+                     (invalid_handling='remove') or kept (invalid_handling='interpolate').
+    - correlations: Peak correlation of each window.
+    """
+    if cache is not None:
+        params = dict(min_correlation=min_correlation, top_k=top_k,
+                      lower_bound=lower_bound, upper_bound=upper_bound,
+                      bandpass_low=bandpass_low, bandpass_high=bandpass_high,
+                      segment_duration=segment_duration, overlap=overlap, peak_distance=peak_distance,
+                      hampel_window_size=hampel_window_size, hampel_threshold=hampel_threshold,
+                      invalid_handling=invalid_handling, max_gap=max_gap, dtype=np.dtype(dtype).name,
+                      prescreen=prescreen, prescreen_window=prescreen_window,
+                      prescreen_options=prescreen_options)
+        key = cache.key(ppg_signal, abp_signal, fs, dict(params, pipeline="combined_pipeline_windows"))
+        entry = cache.get(key)
+        if entry is not None:
+            # Rows of the stored stacks are views, like the windows of an uncached run
+            return (list(entry["ppg_windows"]), list(entry["abp_windows"]),
+                    entry["window_starts"], entry["correlations"])
+
+        ppg_windows, abp_windows, window_starts, correlations = combined_pipeline_windows(
+            ppg_signal, abp_signal, fs, profiler=profiler, **params
+        )
+        segment_samples = int(segment_duration * 60 * fs)
+        cache.put(key, ppg_windows=np.stack(ppg_windows) if ppg_windows else np.empty((0, segment_samples)),
+                  abp_windows=np.stack(abp_windows) if abp_windows else np.empty((0, segment_samples)),
+                  window_starts=window_starts, correlations=correlations)
+        return ppg_windows, abp_windows, window_starts, correlations
+
+    return _run_pipeline(ppg_signal, abp_signal, fs, lower_bound, upper_bound, bandpass_low, bandpass_high,
+                         segment_duration, overlap, peak_distance, hampel_window_size, hampel_threshold,
+                         invalid_handling, max_gap, profiler, dtype, prescreen, prescreen_window,
+                         prescreen_options, extract=True, min_correlation=min_correlation, top_k=top_k)
+
+
+def _run_pipeline(ppg_signal, abp_signal, fs, lower_bound, upper_bound, bandpass_low, bandpass_high,
+                  segment_duration, overlap, peak_distance, hampel_window_size, hampel_threshold,
+                  invalid_handling, max_gap, profiler, dtype, prescreen, prescreen_window,
+                  prescreen_options=None, extract=False, min_correlation=None, top_k=None):
+    """
+    Steps 1-6 shared by combined_pipeline and, with extract=True, combined_pipeline_windows.
+    """
+    ppg_signal = np.asarray(ppg_signal, dtype=dtype)
+    abp_signal = np.asarray(abp_signal, dtype=dtype)
+
+    if invalid_handling == 'interpolate':
+        return _segmented_pipeline(ppg_signal, abp_signal, fs, lower_bound, upper_bound,
+                                   bandpass_low, bandpass_high, segment_duration, overlap, peak_distance,
+                                   hampel_window_size, hampel_threshold, max_gap, profiler,
+                                   prescreen, prescreen_window, prescreen_options, extract, min_correlation,
+                                   top_k)
+    if invalid_handling != 'remove':
+        raise ValueError("'invalid_handling' must be 'remove' or 'interpolate'.")
+
     # Step 1: Remove invalid values (NaN and Inf) from both signals
-    ppg_signal, abp_signal = remove_invalid_values(ppg_signal, abp_signal)
+    ppg_signal, abp_signal = run_stage(profiler, "remove_invalid_values",
+                                       remove_invalid_values, ppg_signal, abp_signal)
 
     # Step 2: Clip the signals to physiological bounds
-    ppg_signal, abp_signal = remove_out_of_range_bp(ppg_signal, abp_signal, lower_bound, upper_bound)
+    ppg_signal, abp_signal = run_stage(profiler, "remove_out_of_range_bp",
+                                       remove_out_of_range_bp, ppg_signal, abp_signal, lower_bound, upper_bound)
+
+    # Stack both signals so the remaining stages process them in one vectorized call
+    signals = np.vstack([ppg_signal, abp_signal])
+
+    if prescreen or extract:
+        segments = [(0, signals.shape[1])]
+        if prescreen:
+            # Only the runs of usable windows go through the heavy stages
+            segments = run_stage(profiler, "prescreen_intervals", prescreen_intervals,
+                                 signals[0], signals[1], fs, prescreen_window, **(prescreen_options or {}))
+        return _windows_in_segments(signals, segments, fs, bandpass_low, bandpass_high, segment_duration,
+                                    overlap, peak_distance, hampel_window_size, hampel_threshold, profiler,
+                                    extract, min_correlation, top_k)
+
+    # Steps 3-5: Baseline removal, bandpass filter and Hampel filter
+    signals = _clean_signals(signals, fs, bandpass_low, bandpass_high, hampel_window_size, hampel_threshold,
+                             profiler)
 
+    # Step 6: Extract the window with the maximum correlation between PPG and ABP
+    cleaned_ppg, cleaned_abp, _ = run_stage(profiler, "find_peaks_and_max_correlation",
+                        find_peaks_and_max_correlation,
+                        signals[0], signals[1], fs, segment_duration, overlap, peak_distance
+                    )
+
+    return cleaned_ppg, cleaned_abp
+
+
+def _clean_signals(signals, fs, bandpass_low, bandpass_high, hampel_window_size, hampel_threshold, profiler=None):
+    """
+    Steps 3-5 of the pipeline on stacked (2, n_samples) PPG/ABP signals.
+    """
     # Step 3: Remove baseline wander using detrending
-    ppg_signal = baseline_wander_removal(ppg_signal, fs)
-    abp_signal = baseline_wander_removal(abp_signal, fs)
+    signals = run_stage(profiler, "baseline_wander_removal", baseline_wander_removal, signals, fs, axis=-1)
 
     # Step 4: Apply bandpass filter to remove irrelevant frequencies
-    ppg_signal = bandpass_filter(ppg_signal, fs, bandpass_low, bandpass_high)
-    abp_signal = bandpass_filter(abp_signal, fs, bandpass_low, bandpass_high)
+    signals = run_stage(profiler, "bandpass_filter", bandpass_filter,
+                        signals, fs, bandpass_low, bandpass_high, axis=-1)
 
     # Step 5: Remove artifacts using Hampel filter
-    ppg_signal = hampel_filter(ppg_signal, hampel_window_size, hampel_threshold)
-    abp_signal = hampel_filter(abp_signal, hampel_window_size, hampel_threshold)
+    signals = run_stage(profiler, "hampel_filter", hampel_filter,
+                        signals, hampel_window_size, hampel_threshold, axis=-1)
 
-    # Step 6: Extract the window with the maximum correlation between PPG and ABP
-    cleaned_ppg, cleaned_abp, _ = find_peaks_and_max_correlation(
-                        ppg_signal, abp_signal, fs, segment_duration, overlap, peak_distance
-                    )
+    return signals
+
+
+def _segmented_pipeline(ppg_signal, abp_signal, fs, lower_bound, upper_bound,
+                        bandpass_low, bandpass_high, segment_duration, overlap, peak_distance,
+                        hampel_window_size, hampel_threshold, max_gap, profiler=None,
+                        prescreen=False, prescreen_window=10.0, prescreen_options=None,
+                        extract=False, min_correlation=None, top_k=None):
+    """
+    Pipeline variant that masks invalid samples instead of deleting them.
+    """
+    # Steps 1-2: Interpolate short gaps, split the record at long ones
+    ppg_signal, abp_signal, segments = run_stage(profiler, "interpolate_invalid_values",
+        interpolate_invalid_values, ppg_signal, abp_signal, fs, max_gap, lower_bound, upper_bound
+    )
+    signals = np.vstack([ppg_signal, abp_signal])
+
+    if prescreen:
+        # Windows overlapping the remaining long gaps contain NaN and fail the prescreen
+        usable = run_stage(profiler, "prescreen_intervals", prescreen_intervals,
+                           signals[0], signals[1], fs, prescreen_window, **(prescreen_options or {}))
+        n_samples = signals.shape[1]
+        segments = mask_to_intervals(intervals_to_mask(segments, n_samples) & intervals_to_mask(usable, n_samples))
+
+    return _windows_in_segments(signals, segments, fs, bandpass_low, bandpass_high, segment_duration,
+                                overlap, peak_distance, hampel_window_size, hampel_threshold, profiler,
+                                extract, min_correlation, top_k)
+
+
+def _windows_in_segments(signals, segments, fs, bandpass_low, bandpass_high, segment_duration, overlap,
+                         peak_distance, hampel_window_size, hampel_threshold, profiler=None,
+                         extract=False, min_correlation=None, top_k=None):
+    """
+    Steps 3-6 on each [start, stop) segment of stacked signals. Returns the best window overall,
+    or with extract=True the windows kept by select_ranked_windows.
+    """
+    ranked_starts = []
+    ranked_correlations = []
+    max_corr = -np.inf
+    cleaned_ppg = None
+    cleaned_abp = None
+    segment_samples = int(segment_duration * 60 * fs)
+
+    for start, stop in segments:
+        # Segments shorter than one alignment window can never be selected
+        if stop - start < segment_samples:
+            continue
+
+        # Steps 3-5 run on each contiguous segment independently
+        signals[:, start:stop] = _clean_signals(signals[:, start:stop], fs, bandpass_low, bandpass_high,
+                                                hampel_window_size, hampel_threshold, profiler)
+
+        if extract:
+            # Step 6: Score every window of this segment, with offsets into the whole record
+            window_starts, correlations = run_stage(profiler, "rank_peak_correlation_windows",
+                rank_peak_correlation_windows,
+                signals[0, start:stop], signals[1, start:stop], fs, segment_duration, overlap, peak_distance
+            )
+            ranked_starts.append(window_starts + start)
+            ranked_correlations.append(correlations)
+            continue
+
+        # Step 6: Best window within this segment
+        ppg_segment, abp_segment, corr = run_stage(profiler, "find_peaks_and_max_correlation",
+            find_peaks_and_max_correlation,
+            signals[0, start:stop], signals[1, start:stop], fs, segment_duration, overlap, peak_distance
+        )
+        if corr > max_corr:
+            max_corr = corr
+            cleaned_ppg, cleaned_abp = ppg_segment, abp_segment
+
+    if not extract:
+        return cleaned_ppg, cleaned_abp
 
-    return cleaned_ppg, cleaned_abp
\ No newline at end of file
+    window_starts = np.concatenate(ranked_starts + [np.empty(0, dtype=int)]).astype(int)
+    correlations = np.concatenate(ranked_correlations + [np.empty(0)])
+    order = np.argsort(-correlations, kind="stable")
+    window_starts, correlations = select_ranked_windows(window_starts[order], correlations[order],
+                                                        min_correlation, top_k)
+    ppg_windows = [signals[0, start:start + segment_samples] for start in window_starts]
+    abp_windows = [signals[1, start:start + segment_samples] for start in window_starts]
+    return ppg_windows, abp_windows, window_starts, correlations
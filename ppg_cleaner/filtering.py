@@ -1,7 +1,122 @@
-from scipy.signal import butter, filtfilt
-from scipy.signal import iirnotch
+from functools import lru_cache
 
-def bandpass_filter(signal, fs, low_cutoff=0.5, high_cutoff=8.0, order=4):
+import numpy as np
+from scipy.signal import butter, sosfiltfilt
+from scipy.signal import iirnotch, tf2sos
+
+# Maximum number of filter designs kept by the design cache
+FILTER_DESIGN_CACHE_SIZE = 128
+
+# Smallest distance between a pole and the unit circle for which float32 signals are filtered
+# in single precision. Above this margin the error against float64 filtering stays below about
+# 2e-4 times the largest absolute input value (a 0.5-8 Hz order-4 bandpass qualifies up to 217 Hz;
+# at 240-250 Hz its margin is about 4.4e-3 and the error grows past that bound).
+FLOAT32_MIN_POLE_MARGIN = 5e-3
+
+
+def design_filter(filter_type, fs, cutoff, order=4, quality_factor=30):
+    """
+    Design a filter as second-order sections, reusing cached designs.
+
+    Designs are memoized on (filter_type, fs, cutoff, order, quality_factor) with
+    least-recently-used eviction once FILTER_DESIGN_CACHE_SIZE designs are stored.
+
+    Parameters:
+    - filter_type: One of 'band', 'low', 'high' or 'notch'.
+    - fs: Sampling frequency in Hz.
+    - cutoff: Cutoff frequency in Hz, a (low, high) pair for 'band', or the notch frequency.
+    - order: Butterworth filter order (default: 4, ignored for 'notch').
+    - quality_factor: Quality factor of the notch filter (default: 30, only used for 'notch').
+
+    Returns:
+    - sos: Array of second-order sections, shape (n_sections, 6).
+    """
+    if filter_type == 'band':
+        cutoff = tuple(float(c) for c in cutoff)
+    else:
+        cutoff = float(cutoff)
+    if filter_type != 'notch':
+        quality_factor = None
+    else:
+        order = None
+    # The copy is a few dozen floats, and scipy's sosfilt needs a writable buffer
+    return _design_filter_cached(filter_type, float(fs), cutoff, order, quality_factor).copy()
+
+
+@lru_cache(maxsize=FILTER_DESIGN_CACHE_SIZE)
+def _design_filter_cached(filter_type, fs, cutoff, order, quality_factor):
+    nyquist = 0.5 * fs
+
+    if filter_type == 'band':
+        low, high = cutoff
+        sos = butter(order, [low / nyquist, high / nyquist], btype='band', output='sos')
+    elif filter_type in ('low', 'high'):
+        sos = butter(order, cutoff / nyquist, btype=filter_type, output='sos')
+    elif filter_type == 'notch':
+        b, a = iirnotch(cutoff / nyquist, quality_factor)
+        sos = tf2sos(b, a)
+    else:
+        raise ValueError(f"Unknown filter type '{filter_type}', expected 'band', 'low', 'high' or 'notch'.")
+
+    # Cached designs are shared between callers, so they must not be modified
+    sos.flags.writeable = False
+    return sos
+
+
+def filter_design_cache_info():
+    """
+    Report hit/miss statistics of the filter design cache.
+
+    Returns:
+    - CacheInfo named tuple with hits, misses, maxsize and currsize.
+    """
+    return _design_filter_cached.cache_info()
+
+
+def clear_filter_design_cache():
+    """
+    Empty the filter design cache and reset its statistics.
+    """
+    _design_filter_cached.cache_clear()
+
+
+def apply_sos_filter(sos, signal, axis=-1):
+    """
+    Zero-phase filtering with second-order sections that keeps float32 signals in float32.
+
+    float32 signals are filtered with float32 coefficients when every pole lies at least
+    FLOAT32_MIN_POLE_MARGIN inside the unit circle. Filters with poles closer to it (very low
+    cutoffs relative to fs) lose accuracy in single precision, so those run in float64 and
+    the result is cast back to float32. Other inputs are filtered in float64 as before.
+
+    Parameters:
+    - sos: Array of second-order sections, shape (n_sections, 6).
+    - signal: Input signal (NumPy array).
+    - axis: Time axis of the signal (default: -1).
+
+    Returns:
+    - Filtered signal (NumPy array), float32 for float32 input.
+    """
+    signal = np.asarray(signal)
+    if signal.dtype != np.float32:
+        return sosfiltfilt(sos, signal, axis=axis)
+    if _pole_margin(sos) >= FLOAT32_MIN_POLE_MARGIN:
+        return sosfiltfilt(sos.astype(np.float32), signal, axis=axis)
+    return sosfiltfilt(sos, signal, axis=axis).astype(np.float32)
+
+
+def _pole_margin(sos):
+    """
+    Distance between the unit circle and the pole of the SOS cascade closest to it.
+    """
+    # Each section's poles are the roots of z^2 + a1 z + a2
+    a1, a2 = sos[:, 4], sos[:, 5]
+    discriminant = (a1 ** 2 - 4 * a2).astype(complex)
+    roots = np.concatenate([(-a1 + np.sqrt(discriminant)) / 2, (-a1 - np.sqrt(discriminant)) / 2])
+    return 1 - np.max(np.abs(roots))
+
+
+def bandpass_filter(signal, fs, low_cutoff=0.5, high_cutoff=8.0, order=4, axis=-1):
     """
     Apply a Butterworth bandpass filter to retain PPG-relevant frequencies.
     
@@ -11,20 +126,17 @@ def bandpass_filter(signal, fs, low_cutoff=0.5, high_cutoff=8.0, order=4):
     - low_cutoff: Lower cutoff frequency in Hz.
     - high_cutoff: Upper cutoff frequency in Hz.
     - order: Filter order (default: 4).
+    - axis: Time axis of the signal, so (n_channels, n_samples) arrays are filtered in one call (default: -1).
     
     Returns:
     - Filtered signal (NumPy array).
     """
-    nyquist = 0.5 * fs
-    low = low_cutoff / nyquist
-    high = high_cutoff / nyquist
-
-    b, a = butter(order, [low, high], btype='band')
-    return filtfilt(b, a, signal)
+    sos = design_filter('band', fs, (low_cutoff, high_cutoff), order)
+    return apply_sos_filter(sos, signal, axis)
 
 
 
-def notch_filter(signal, fs, notch_freq, quality_factor=30):
+def notch_filter(signal, fs, notch_freq, quality_factor=30, axis=-1):
     """
     Remove powerline noise (e.g., 50/60 Hz) using a notch filter.
     
@@ -33,18 +145,16 @@ def notch_filter(signal, fs, notch_freq, quality_factor=30):
     - fs: Sampling frequency in Hz.
     - notch_freq: Frequency to notch out (e.g., 50 or 60 Hz).
     - quality_factor: Quality factor of the notch filter (default: 30).
+    - axis: Time axis of the signal, so (n_channels, n_samples) arrays are filtered in one call (default: -1).
     
     Returns:
     - Filtered signal (NumPy array).
     """
-    nyquist = 0.5 * fs
-    normalized_freq = notch_freq / nyquist
-
-    b, a = iirnotch(normalized_freq, quality_factor)
-    return filtfilt(b, a, signal)
+    sos = design_filter('notch', fs, notch_freq, quality_factor=quality_factor)
+    return apply_sos_filter(sos, signal, axis)
 
 
-def lowpass_filter(signal, fs, cutoff, order=4):
+def lowpass_filter(signal, fs, cutoff, order=4, axis=-1):
     """
     Apply a Butterworth lowpass filter to suppress high-frequency noise.
     
@@ -53,17 +163,15 @@ def lowpass_filter(signal, fs, cutoff, order=4):
     - fs: Sampling frequency in Hz.
     - cutoff: Cutoff frequency in Hz.
     - order: Filter order (default: 4).
+    - axis: Time axis of the signal, so (n_channels, n_samples) arrays are filtered in one call (default: -1).
     
     Returns:
     - Filtered signal (NumPy array).
     """
-    nyquist = 0.5 * fs
-    normalized_cutoff = cutoff / nyquist
+    sos = design_filter('low', fs, cutoff, order)
+    return apply_sos_filter(sos, signal, axis)
 
-    b, a = butter(order, normalized_cutoff, btype='low')
-    return filtfilt(b, a, signal)
-
-def highpass_filter(signal, fs, cutoff, order=4):
+def highpass_filter(signal, fs, cutoff, order=4, axis=-1):
     """
     Apply a Butterworth highpass filter to remove low-frequency components.
     
@@ -72,13 +180,11 @@ def highpass_filter(signal, fs, cutoff, order=4):
     - fs: Sampling frequency in Hz.
     - cutoff: Cutoff frequency in Hz.
     - order: Filter order (default: 4).
+    - axis: Time axis of the signal, so (n_channels, n_samples) arrays are filtered in one call (default: -1).
     
     Returns:
     - Filtered signal (NumPy array).
     """
-    nyquist = 0.5 * fs
-    normalized_cutoff = cutoff / nyquist
-
-    b, a = butter(order, normalized_cutoff, btype='high')
-    return filtfilt(b, a, signal)
+    sos = design_filter('high', fs, cutoff, order)
+    return apply_sos_filter(sos, signal, axis)
 
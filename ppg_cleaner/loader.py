@@ -0,0 +1,277 @@
+import os
+import re
+
+import numpy as np
+
+# Storage formats read directly: format -> (numpy dtype of a stored sample, invalid-sample value)
+_BYTE_FORMATS = {
+    "16": ("<i2", -32768),
+    "61": (">i2", -32768),
+    "80": ("u1", -128),
+    "160": ("<u2", -32768),
+    "32": ("<i4", -2 ** 31),
+}
+_PACKED_FORMATS = {"212": -2048}
+
+_FORMAT_PATTERN = re.compile(r"^(\d+)(?:x(\d+))?(?::(\d+))?(?:\+(\d+))?$")
+_GAIN_PATTERN = re.compile(r"^([-+\d.eE]+)(?:\((-?\d+)\))?(?:/(\S+))?$")
+
+
+def read_header(record_name, mirror_dir=None):
+    """
+    Parse a WFDB header (.hea) file.
+
+    Parameters:
+    - record_name: Record path without extension (e.g. 'mimic3wdb/30/3000063/3000063_0006').
+    - mirror_dir: Optional local directory the record path is resolved against.
+
+    Returns:
+    - header: Dict with 'record_name', 'directory', 'fs', 'n_samples' and either 'signals'
+              (list of per-signal dicts with 'file_name', 'fmt', 'gain', 'baseline', 'units',
+              'byte_offset' and 'sig_name') or, for multi-segment records, 'segments'
+              (list of (segment_name, n_samples) tuples).
+    """
+    path = _resolve(record_name, mirror_dir)
+    with open(path + ".hea") as handle:
+        lines = [line.strip() for line in handle if line.strip() and not line.lstrip().startswith("#")]
+    if not lines:
+        raise ValueError(f"Empty WFDB header: {path}.hea")
+
+    fields = lines[0].split()
+    name, _, n_segments = fields[0].partition("/")
+    n_signals = int(fields[1])
+    fs = float(fields[2].split("/")[0]) if len(fields) > 2 else 250.0
+    n_samples = int(fields[3]) if len(fields) > 3 else None
+
+    header = {"record_name": name, "directory": os.path.dirname(path), "fs": fs, "n_samples": n_samples}
+    if n_segments:
+        segments = [(line.split()[0], int(line.split()[1])) for line in lines[1:1 + int(n_segments)]]
+        header["segments"] = segments
+        if n_samples is None:
+            header["n_samples"] = sum(length for _, length in segments)
+        return header
+
+    header["signals"] = [_parse_signal_line(line, index) for index, line in enumerate(lines[1:1 + n_signals])]
+    return header
+
+
+def load_record(record_name, channels=None, sampfrom=0, sampto=None, mirror_dir=None, dtype=np.float64):
+    """
+    Load physical signals from a local WFDB record, decoding only the requested channels.
+
+    Byte-aligned formats (8-, 16- and 32-bit) are read through a memory map of the requested
+    sample range, and format 212 through a read of only the bytes covering that range.
+    Invalid samples are returned as NaN. Multi-segment records are stitched together, with
+    NaN in gaps and in segments that lack a requested channel.
+
+    Parameters:
+    - record_name: Record path without extension.
+    - channels: Channel names or indices to load (default: all channels).
+    - sampfrom: First sample to load (default: 0).
+    - sampto: Sample after the last one to load (default: end of the record).
+    - mirror_dir: Optional local directory the record path is resolved against.
+    - dtype: Floating-point dtype of the output (default: np.float64).
+
+    Returns:
+    - signals: Array of shape (n_samples, n_channels).
+    - fields: Dict with 'fs', 'sig_name', 'units' and 'n_samples' of the loaded channels.
+    """
+    header = read_header(record_name, mirror_dir)
+    sampto = header["n_samples"] if sampto is None else min(sampto, header["n_samples"])
+    if not 0 <= sampfrom <= sampto:
+        raise ValueError("Sample range must satisfy 0 <= sampfrom <= sampto.")
+
+    if "segments" in header:
+        return _load_multi_segment(header, channels, sampfrom, sampto, dtype)
+
+    signals = header["signals"]
+    indices = _channel_indices(signals, channels)
+    output = np.empty((sampto - sampfrom, len(indices)), dtype=dtype)
+    for column, index in enumerate(indices):
+        output[:, column] = _read_channel(header, index, sampfrom, sampto, dtype)
+
+    fields = {
+        "fs": header["fs"],
+        "sig_name": [signals[index]["sig_name"] for index in indices],
+        "units": [signals[index]["units"] for index in indices],
+        "n_samples": len(output),
+    }
+    return output, fields
+
+
+def load_ppg_abp(record_name, mirror_dir=None, sampfrom=0, sampto=None, dtype=np.float32, ppg_name="PLETH",
+                 abp_name="ABP"):
+    """
+    Load the PPG and ABP channels of a local WFDB record.
+
+    The returned tuple matches what batch_pipeline expects from a loader, so this function
+    (or a functools.partial of it) can be passed as loader=.
+
+    Parameters:
+    - record_name: Record path without extension.
+    - mirror_dir: Optional local directory the record path is resolved against.
+    - sampfrom: First sample to load (default: 0).
+    - sampto: Sample after the last one to load (default: end of the record).
+    - dtype: Floating-point dtype of the output (default: np.float32).
+    - ppg_name: Name of the PPG channel (default: 'PLETH').
+    - abp_name: Name of the ABP channel (default: 'ABP').
+
+    Returns:
+    - ppg_signal: PPG signal (NumPy array).
+    - abp_signal: ABP signal (NumPy array).
+    - fs: Sampling frequency (Hz).
+    """
+    signals, fields = load_record(record_name, [ppg_name, abp_name], sampfrom, sampto, mirror_dir, dtype)
+    return signals[:, 0], signals[:, 1], fields["fs"]
+
+
+def _resolve(record_name, mirror_dir):
+    return os.path.join(mirror_dir, record_name) if mirror_dir is not None else record_name
+
+
+def _parse_signal_line(line, index):
+    """
+    Parse one signal specification line of a header.
+    """
+    fields = line.split()
+    match = _FORMAT_PATTERN.match(fields[1])
+    if match is None:
+        raise ValueError(f"Invalid WFDB format field: {fields[1]}")
+    fmt, samples_per_frame, skew, byte_offset = match.groups()
+    if samples_per_frame not in (None, "1") or skew not in (None, "0"):
+        raise ValueError("Signals with several samples per frame or with skew are not supported.")
+
+    gain, baseline, units = 200.0, None, "mV"
+    if len(fields) > 2:
+        gain_match = _GAIN_PATTERN.match(fields[2])
+        if gain_match is None:
+            raise ValueError(f"Invalid WFDB gain field: {fields[2]}")
+        gain = float(gain_match.group(1)) or 200.0
+        baseline = gain_match.group(2)
+        units = gain_match.group(3) or units
+    adc_zero = int(fields[4]) if len(fields) > 4 else 0
+
+    return {
+        "file_name": fields[0],
+        "fmt": fmt,
+        "gain": gain,
+        "baseline": int(baseline) if baseline is not None else adc_zero,
+        "units": units,
+        "byte_offset": int(byte_offset or 0),
+        "sig_name": " ".join(fields[8:]) if len(fields) > 8 else f"sig{index}",
+    }
+
+
+def _channel_indices(signals, channels):
+    if channels is None:
+        return list(range(len(signals)))
+    names = [signal["sig_name"] for signal in signals]
+    indices = []
+    for channel in channels:
+        if isinstance(channel, str):
+            if channel not in names:
+                raise ValueError(f"Channel '{channel}' not found in record (available: {names}).")
+            indices.append(names.index(channel))
+        else:
+            indices.append(int(channel))
+    return indices
+
+
+def _read_channel(header, index, sampfrom, sampto, dtype):
+    """
+    Decode one channel of a single-segment record into physical units.
+    """
+    signal = header["signals"][index]
+    # Signals stored in the same file are interleaved frame by frame
+    group = [i for i, other in enumerate(header["signals"]) if other["file_name"] == signal["file_name"]]
+    n_interleaved = len(group)
+    column = group.index(index)
+    path = os.path.join(header["directory"], signal["file_name"])
+    fmt = signal["fmt"]
+
+    if sampto == sampfrom:
+        return np.empty(0, dtype=dtype)
+    if fmt in _BYTE_FORMATS:
+        storage, invalid = _BYTE_FORMATS[fmt]
+        itemsize = np.dtype(storage).itemsize
+        frames = np.memmap(path, dtype=storage, mode="r", shape=(sampto - sampfrom, n_interleaved),
+                           offset=signal["byte_offset"] + sampfrom * n_interleaved * itemsize)
+        digital = frames[:, column].astype(np.int64 if fmt == "32" else np.int32)
+        # Formats 80 and 160 are stored in offset binary
+        if fmt == "80":
+            digital -= 128
+        elif fmt == "160":
+            digital -= 32768
+    elif fmt in _PACKED_FORMATS:
+        invalid = _PACKED_FORMATS[fmt]
+        positions = np.arange(sampfrom, sampto) * n_interleaved + column
+        digital = _read_format_212(path, signal["byte_offset"], positions)
+    else:
+        raise ValueError(f"Unsupported WFDB storage format: {fmt}")
+
+    physical = digital.astype(dtype)
+    physical -= signal["baseline"]
+    physical /= signal["gain"]
+    physical[digital == invalid] = np.nan
+    return physical
+
+
+def _read_format_212(path, byte_offset, positions):
+    """
+    Decode the samples at the given increasing positions of a format 212 file, in which
+    every two 12-bit samples share three bytes.
+    """
+    # Read only the 3-byte groups spanning the requested samples
+    first_pair = positions[0] // 2
+    with open(path, "rb") as handle:
+        handle.seek(byte_offset + 3 * first_pair)
+        raw = np.frombuffer(handle.read(3 * (positions[-1] // 2 - first_pair + 1)), dtype=np.uint8)
+
+    pair_start = 3 * (positions // 2 - first_pair)
+    second = (positions % 2).astype(bool)
+    # The first sample of a pair is byte 0 plus the low nibble of byte 1, the second is
+    # byte 2 plus the high nibble of byte 1
+    low = raw[pair_start + 2 * second].astype(np.int32)
+    middle = raw[pair_start + 1].astype(np.int32)
+    samples = low | np.where(second, (middle & 0xF0) << 4, (middle & 0x0F) << 8)
+    # Sign-extend the 12-bit values
+    samples[samples >= 2048] -= 4096
+    return samples
+
+
+def _load_multi_segment(header, channels, sampfrom, sampto, dtype):
+    """
+    Stitch the requested range of a multi-segment record together from its segments.
+    """
+    segments = header["segments"]
+    layout = None
+    if segments and segments[0][1] == 0 and segments[0][0] != "~":
+        layout = read_header(os.path.join(header["directory"], segments[0][0]))
+    if channels is None:
+        if layout is None:
+            raise ValueError("Channels must be given for multi-segment records without a layout header.")
+        channels = [signal["sig_name"] for signal in layout["signals"]]
+    if layout is not None:
+        channels = [layout["signals"][c]["sig_name"] if not isinstance(c, str) else c for c in channels]
+    elif not all(isinstance(channel, str) for channel in channels):
+        raise ValueError("Channels of multi-segment records without a layout header must be given by name.")
+
+    output = np.full((sampto - sampfrom, len(channels)), np.nan, dtype=dtype)
+    units = [None] * len(channels)
+    position = 0
+    for name, length in segments:
+        start, stop = max(sampfrom, position), min(sampto, position + length)
+        if stop > start and name != "~":
+            segment = read_header(os.path.join(header["directory"], name))
+            available = [signal["sig_name"] for signal in segment["signals"]]
+            for column, channel in enumerate(channels):
+                if channel in available:
+                    index = available.index(channel)
+                    output[start - sampfrom:stop - sampfrom, column] = _read_channel(
+                        segment, index, start - position, stop - position, dtype
+                    )
+                    units[column] = segment["signals"][index]["units"]
+        position += length
+
+    fields = {"fs": header["fs"], "sig_name": list(channels), "units": units, "n_samples": len(output)}
+    return output, fields
@@ -0,0 +1,138 @@
+import os
+import tempfile
+
+import numpy as np
+from scipy.signal import sosfilt, sosfilt_zi
+
+from ppg_cleaner.filtering import design_filter
+from ppg_cleaner.artifact_removal import hampel_filter
+
+
+def combined_pipeline_out_of_core(ppg_signal, abp_signal, fs, output_path, block_size=1_000_000,
+                                  lower_bound=40, upper_bound=200,
+                                  bandpass_low=0.5, bandpass_high=8.0, order=4,
+                                  hampel_window_size=10, hampel_threshold=3, temp_dir=None):
+    """
+    Run the cleaning steps of combined_pipeline on records too long to hold in memory.
+
+    The inputs are read block by block (e.g. np.memmap or np.load(..., mmap_mode='r') arrays)
+    and the cleaned signals are written to a .npy file, so peak memory depends on block_size
+    and not on the record length. The result matches steps 1-5 of combined_pipeline:
+
+    - invalid and out-of-range samples are removed while streaming through the record,
+    - the linear detrend is fitted from running sums and subtracted on the fly,
+    - the zero-phase bandpass runs a forward and a backward sosfilt pass over the blocks,
+      carrying the filter state and using the same odd extension as sosfiltfilt,
+    - the Hampel filter reads hampel_window_size extra samples on each side of a block.
+
+    Step 6 (peak-correlation window selection) can be applied to the returned rows with
+    find_peaks_and_max_correlation, whose default per-window loop only reads one window at a time.
+
+    Parameters:
+    - ppg_signal: Raw PPG signal (NumPy array or memmap).
+    - abp_signal: Raw ABP signal (NumPy array or memmap).
+    - fs: Sampling frequency (Hz).
+    - output_path: Path of the .npy file receiving the cleaned signals.
+    - block_size: Number of samples per signal processed at once (default: 1,000,000).
+    - lower_bound: Lower bound for valid ABP values (default: 40).
+    - upper_bound: Upper bound for valid ABP values (default: 200).
+    - bandpass_low: Lower cutoff frequency for bandpass filter (Hz).
+    - bandpass_high: Upper cutoff frequency for bandpass filter (Hz).
+    - order: Bandpass filter order (default: 4).
+    - hampel_window_size: Window size for Hampel filtering.
+    - hampel_threshold: Threshold for Hampel filtering.
+    - temp_dir: Directory for intermediate files (default: the directory of output_path).
+
+    Returns:
+    - cleaned: Memory-mapped array of shape (2, n_valid) holding the cleaned PPG (row 0)
+               and ABP (row 1) signals.
+    """
+    if len(ppg_signal) != len(abp_signal):
+        raise ValueError("'ppg_signal' and 'abp_signal' must have the same length.")
+    if block_size <= hampel_window_size:
+        raise ValueError("'block_size' must be larger than 'hampel_window_size'.")
+
+    sos = design_filter('band', fs, (bandpass_low, bandpass_high), order)
+    padlen = 3 * (2 * len(sos) + 1 - min((sos[:, 2] == 0).sum(), (sos[:, 5] == 0).sum()))
+
+    if temp_dir is None:
+        temp_dir = os.path.dirname(os.path.abspath(output_path))
+
+    with tempfile.TemporaryDirectory(dir=temp_dir) as work_dir:
+        # Steps 1-2: drop invalid samples, accumulating the sums for the linear fit
+        compact = np.lib.format.open_memmap(
+            os.path.join(work_dir, "compact.npy"), mode="w+", dtype=np.float64, shape=(2, len(ppg_signal))
+        )
+        n_valid = 0
+        sum_x = np.zeros(2)
+        sum_tx = np.zeros(2)
+        for start in range(0, len(ppg_signal), block_size):
+            block = np.vstack([ppg_signal[start:start + block_size], abp_signal[start:start + block_size]])
+            block = block.astype(np.float64, copy=False)
+            valid = np.isfinite(block).all(axis=0) & (block[1] >= lower_bound) & (block[1] <= upper_bound)
+            block = block[:, valid]
+
+            count = block.shape[1]
+            compact[:, n_valid:n_valid + count] = block
+            sum_x += block.sum(axis=1)
+            sum_tx += block @ np.arange(count, dtype=np.float64) + n_valid * block.sum(axis=1)
+            n_valid += count
+
+        if n_valid <= padlen:
+            raise ValueError(f"The record has {n_valid} valid samples, the bandpass filter needs more than {padlen}.")
+
+        # Step 3: least-squares line through t = 0 .. n_valid - 1 (same fit as detrend)
+        sum_t = n_valid * (n_valid - 1) / 2
+        sum_tt = (n_valid - 1) * n_valid * (2 * n_valid - 1) / 6
+        slope = (n_valid * sum_tx - sum_t * sum_x) / (n_valid * sum_tt - sum_t ** 2)
+        intercept = (sum_x - slope * sum_t) / n_valid
+
+        # Step 4: forward pass over [odd extension, record, odd extension], then backward pass
+        head = _detrended(compact, slope, intercept, 0, padlen + 1)
+        tail = _detrended(compact, slope, intercept, n_valid - padlen - 1, n_valid)
+        left_ext = 2 * head[:, :1] - head[:, padlen:0:-1]
+        right_ext = 2 * tail[:, -1:] - tail[:, -2::-1]
+
+        filtered = np.lib.format.open_memmap(
+            os.path.join(work_dir, "filtered.npy"), mode="w+", dtype=np.float64, shape=(2, n_valid + 2 * padlen)
+        )
+        zi_step = sosfilt_zi(sos)[:, None, :]
+        zi = zi_step * left_ext[None, :, :1]
+
+        filtered[:, :padlen], zi = sosfilt(sos, left_ext, axis=-1, zi=zi)
+        for start in range(0, n_valid, block_size):
+            stop = min(start + block_size, n_valid)
+            block = _detrended(compact, slope, intercept, start, stop)
+            filtered[:, padlen + start:padlen + stop], zi = sosfilt(sos, block, axis=-1, zi=zi)
+        filtered[:, padlen + n_valid:], zi = sosfilt(sos, right_ext, axis=-1, zi=zi)
+
+        zi = zi_step * filtered[:, -1][None, :, None]
+        total = n_valid + 2 * padlen
+        for stop in range(total, 0, -block_size):
+            start = max(stop - block_size, 0)
+            backward, zi = sosfilt(sos, filtered[:, start:stop][:, ::-1], axis=-1, zi=zi)
+            filtered[:, start:stop] = backward[:, ::-1]
+
+        # Step 5: Hampel filter with window_size samples of context around each block
+        cleaned = np.lib.format.open_memmap(output_path, mode="w+", dtype=np.float64, shape=(2, n_valid))
+        w = hampel_window_size
+        for start in range(0, n_valid, block_size):
+            stop = min(start + block_size, n_valid)
+            context_start = max(start - w, 0)
+            context_stop = min(stop + w, n_valid)
+            block = hampel_filter(filtered[:, padlen + context_start:padlen + context_stop], w, hampel_threshold)
+            cleaned[:, start:stop] = block[:, start - context_start:stop - context_start]
+
+        cleaned.flush()
+        # Release the work-file maps before the directory is removed
+        del compact, filtered
+
+    return cleaned
+
+
+def _detrended(compact, slope, intercept, first, last):
+    """
+    Samples [first, last) of the compacted signals minus their fitted baseline.
+    """
+    t = np.arange(first, last, dtype=np.float64)
+    return compact[:, first:last] - (slope[:, None] * t + intercept[:, None])
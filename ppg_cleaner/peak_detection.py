@@ -0,0 +1,258 @@
+import numpy as np
+from scipy.ndimage import maximum_filter1d
+from scipy.signal import find_peaks
+
+from ppg_cleaner.utils import mask_to_intervals
+
+
+def estimate_heart_rate(signal, fs, min_bpm=30, max_bpm=220, window_duration=16, max_windows=64):
+    """
+    Estimate the dominant heart rate of a PPG or ABP signal from its power spectrum.
+
+    The spectrum is averaged over at most max_windows non-overlapping Hann windows spread
+    evenly across the record, so the cost does not grow with the record length.
+
+    Parameters:
+    - signal: Input signal (NumPy array).
+    - fs: Sampling frequency (Hz).
+    - min_bpm: Lowest heart rate considered (beats per minute, default: 30).
+    - max_bpm: Highest heart rate considered (beats per minute, default: 220).
+    - window_duration: Length of each spectral window (in seconds, default: 16).
+    - max_windows: Maximum number of windows averaged (default: 64).
+
+    Returns:
+    - heart_rate: Frequency of the strongest spectral peak in the cardiac band (beats per minute).
+    """
+    signal = np.asarray(signal, dtype=float)
+    window_samples = min(len(signal), int(window_duration * fs))
+    if window_samples < 2:
+        raise ValueError("Signal is too short to estimate the heart rate.")
+
+    n_windows = len(signal) // window_samples
+    chosen = np.unique(np.linspace(0, n_windows - 1, min(n_windows, max_windows)).astype(int))
+    windows = signal[:n_windows * window_samples].reshape(n_windows, window_samples)[chosen]
+    windows = (windows - windows.mean(axis=1, keepdims=True)) * np.hanning(window_samples)
+
+    power = np.mean(np.abs(np.fft.rfft(windows, axis=1)) ** 2, axis=0)
+    frequencies = np.fft.rfftfreq(window_samples, 1 / fs)
+    band = (frequencies >= min_bpm / 60) & (frequencies <= max_bpm / 60)
+    if not np.any(band):
+        raise ValueError("Signal is too short to resolve the cardiac frequency band.")
+
+    return frequencies[band][np.argmax(power[band])] * 60
+
+
+def adaptive_peak_distance(signal, fs, fraction=0.6, min_bpm=30, max_bpm=220):
+    """
+    Minimum peak distance derived from the estimated heart rate.
+
+    Parameters:
+    - signal: Input signal (NumPy array).
+    - fs: Sampling frequency (Hz).
+    - fraction: Fraction of the estimated beat period used as the distance (default: 0.6).
+    - min_bpm: Lowest heart rate considered (beats per minute, default: 30).
+    - max_bpm: Highest heart rate considered (beats per minute, default: 220).
+
+    Returns:
+    - distance: Minimum distance between consecutive peaks (in samples).
+    """
+    heart_rate = estimate_heart_rate(signal, fs, min_bpm, max_bpm)
+    return max(int(fraction * 60 * fs / heart_rate), 1)
+
+
+def detect_peaks(signal, fs=None, distance=None, fraction=0.6):
+    """
+    Detect systolic peaks in a PPG or ABP signal, with the peak distance adapted to the heart rate.
+
+    Peaks are selected by scipy.signal.find_peaks, so for a given distance the result and the
+    cost are those of find_peaks: local maxima (the middle sample of flat tops), of which the
+    highest are kept and smaller ones closer than distance to a kept peak are dropped. The
+    adaptive distance comes from a spectrum over a bounded number of windows, so on long
+    records it adds little to the cost of find_peaks.
+
+    Parameters:
+    - signal: Input signal (NumPy array).
+    - fs: Sampling frequency (Hz), required when distance is None.
+    - distance: Minimum distance between consecutive peaks (in samples). If None, it is
+                adapted to the estimated heart rate (see adaptive_peak_distance).
+    - fraction: Fraction of the beat period used for the adaptive distance (default: 0.6).
+
+    Returns:
+    - peaks: Indices of the detected peaks.
+    """
+    signal = np.asarray(signal)
+    # float32 records are searched in place rather than copied to float64
+    if signal.dtype != np.float32:
+        signal = signal.astype(float, copy=False)
+    if distance is None:
+        if fs is None:
+            raise ValueError("fs is required to adapt the peak distance to the heart rate.")
+        distance = adaptive_peak_distance(signal, fs, fraction)
+
+    peaks, _ = find_peaks(signal, distance=distance)
+    return peaks
+
+
+def detect_feet(signal, peaks):
+    """
+    Locate the foot (minimum) between each pair of consecutive peaks.
+
+    The minima of all inter-peak segments are found with a single reduceat over the signal,
+    so memory stays linear in the signal length even across long gaps between peaks.
+
+    Parameters:
+    - signal: Input signal (NumPy array), finite between the first and last peak.
+    - peaks: Increasing indices of the systolic peaks.
+
+    Returns:
+    - feet: Index of the first minimum between peaks[i] and peaks[i + 1], for each i.
+    """
+    signal = np.asarray(signal, dtype=float)
+    peaks = np.asarray(peaks, dtype=int)
+    if len(peaks) < 2:
+        return np.empty(0, dtype=int)
+
+    span = signal[peaks[0]:peaks[-1]]
+    lengths = np.diff(peaks)
+    minima = np.minimum.reduceat(span, peaks[:-1] - peaks[0])
+
+    # First position in each segment that reaches the segment minimum
+    segment = np.repeat(np.arange(len(lengths)), lengths)
+    positions = np.flatnonzero(span == minima[segment])
+    _, first = np.unique(segment[positions], return_index=True)
+    return peaks[0] + positions[first]
+
+
+class StreamingPeakDetector:
+    """
+    Incremental peak detector for signals arriving in chunks.
+
+    Peaks are confirmed up to the latest isolated maximum, a sample higher than every other
+    sample less than distance away. find_peaks always keeps such a peak, and the peaks on
+    either side of it do not affect each other, so pushing a signal in any chunking and then
+    calling flush returns the same peaks as detect_peaks on the whole signal with the same
+    distance. The exception are peaks of exactly equal height closer than distance (e.g. in
+    coarsely quantized ABP): find_peaks keeps one of them by an unstable sort over the whole
+    array, so the choice, and the peaks it suppresses in turn, may differ there. Peaks are
+    reported with a delay of about one beat; a flat run is buffered until it ends, since
+    find_peaks reports the middle of flat tops. When distance is None, the first warmup
+    seconds are buffered and used to estimate it.
+
+    Parameters:
+    - fs: Sampling frequency (Hz).
+    - distance: Minimum distance between consecutive peaks (in samples), or None to adapt it.
+    - fraction: Fraction of the beat period used for the adaptive distance (default: 0.6).
+    - warmup: Duration buffered before estimating the adaptive distance (in seconds, default: 10).
+    """
+
+    def __init__(self, fs, distance=None, fraction=0.6, warmup=10.0):
+        self.fs = fs
+        self.distance = distance
+        self.fraction = fraction
+        self.warmup = warmup
+        self._initial_distance = distance
+        self.reset()
+
+    def reset(self):
+        """
+        Forget all buffered samples and start a new record.
+        """
+        self.distance = self._initial_distance
+        self._buffer = np.empty(0)
+        self._start = 0
+        self._decided = 0
+        self._scanned = 0
+
+    def push(self, chunk):
+        """
+        Feed the next chunk of the signal.
+
+        Parameters:
+        - chunk: Next samples of the signal (1-D NumPy array).
+
+        Returns:
+        - peaks: Global indices of the peaks confirmed by this chunk.
+        """
+        self._buffer = np.concatenate([self._buffer, np.asarray(chunk, dtype=float)])
+        if self.distance is None:
+            if len(self._buffer) < self.warmup * self.fs:
+                return np.empty(0, dtype=int)
+            self.distance = adaptive_peak_distance(self._buffer, self.fs, self.fraction)
+        return self._decide(final=False)
+
+    def flush(self):
+        """
+        Decide the remaining samples at the end of the record.
+
+        Returns:
+        - peaks: Global indices of the remaining peaks.
+        """
+        if self.distance is None:
+            if len(self._buffer) < 2:
+                return np.empty(0, dtype=int)
+            self.distance = adaptive_peak_distance(self._buffer, self.fs, self.fraction)
+        peaks = self._decide(final=True)
+        self.reset()
+        return peaks
+
+    def _decide(self, final):
+        distance = int(self.distance)
+        if final:
+            stop = self._start + len(self._buffer)
+        else:
+            end = self._start + len(self._buffer)
+            cuts = _cut_points(self._buffer, distance, self._scanned - self._start) + self._start
+            cuts = cuts[cuts > self._decided]
+            self._scanned = end
+            if len(cuts) == 0:
+                return np.empty(0, dtype=int)
+            stop = cuts[-1]
+
+        peaks, _ = find_peaks(self._buffer, distance=distance)
+        peaks = peaks + self._start
+        peaks = peaks[(peaks >= self._decided) & (peaks < stop)]
+
+        # One sample of left context keeps an isolated maximum at stop off the buffer edge
+        self._decided = stop
+        keep_from = max(stop - 1, self._start)
+        self._buffer = self._buffer[keep_from - self._start:]
+        self._start = keep_from
+        return peaks
+
+
+def _cut_points(signal, distance, scanned=0):
+    """
+    Indices before which the peaks of find_peaks do not depend on the rest of the signal.
+
+    These are isolated maxima with distance samples of right context, which find_peaks keeps
+    and which suppress every other peak less than distance away, and the ends of NaN runs of
+    at least distance samples, which no peak can reach across. Only cut points that can have
+    appeared since the signal was scanned up to index scanned are searched for.
+    """
+    offset = max(scanned - 2 * distance, 0)
+    signal = signal[offset:]
+    if len(signal) < 3:
+        return np.empty(0, dtype=int)
+    nan = np.isnan(signal)
+    gaps = mask_to_intervals(nan)
+    gap_ends = gaps[gaps[:, 1] - gaps[:, 0] >= distance, 1]
+
+    values = np.where(nan, -np.inf, signal)
+    size = 2 * distance - 1
+    candidates = np.flatnonzero(values == maximum_filter1d(values, size, mode="nearest"))
+    # Candidates need their whole window, unless it is cut by the start of the record
+    first = 1 if offset == 0 else distance - 1
+    candidates = candidates[(candidates >= first) & (candidates + distance < len(signal))]
+    # Two candidates closer than distance lie in each other's window, so they are equal maxima
+    close = np.diff(candidates) < distance
+    tied = np.zeros(len(candidates), dtype=bool)
+    tied[1:] |= close
+    tied[:-1] |= close
+    candidates = candidates[~tied]
+    # Other samples equal to a candidate must not share its window either
+    others = values.copy()
+    others[candidates] = -np.inf
+    isolated = maximum_filter1d(others, size, mode="nearest")[candidates] < values[candidates]
+    # find_peaks needs finite neighbours below the peak
+    isolated &= (signal[candidates - 1] < signal[candidates]) & (signal[candidates + 1] < signal[candidates])
+    return np.union1d(candidates[isolated], gap_ends) + offset
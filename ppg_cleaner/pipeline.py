@@ -0,0 +1,265 @@
+import numpy as np
+
+from ppg_cleaner.preprocessing import (
+    remove_invalid_values,
+    remove_out_of_range_bp,
+    baseline_wander_removal,
+    downsample_signal,
+    resample_signal,
+    zscore_normalization
+)
+from ppg_cleaner.filtering import design_filter, apply_sos_filter
+from ppg_cleaner.artifact_removal import hampel_filter
+from ppg_cleaner.alignment import find_peaks_and_max_correlation
+from ppg_cleaner.profiling import run_stage
+
+
+class Stage:
+    """
+    One step of a Pipeline, wrapping a ppg_cleaner function and its keyword arguments.
+
+    The stage functions work on the stacked (2, n_samples) PPG/ABP array (row 0 PPG,
+    row 1 ABP). Available stages and their parameters:
+
+    - 'remove_invalid_values'
+    - 'remove_out_of_range_bp': min_bp, max_bp
+    - 'baseline_wander_removal': method, segment_duration, window_duration
+    - 'bandpass_filter': low_cutoff, high_cutoff, order
+    - 'lowpass_filter': cutoff, order
+    - 'highpass_filter': cutoff, order
+    - 'notch_filter': notch_freq, quality_factor
+    - 'hampel_filter': window_size, threshold
+    - 'zscore_normalization'
+    - 'downsample_signal': target_fs, method
+    - 'resample_signal': target_fs
+    - 'find_peaks_and_max_correlation': segment_duration, overlap, peak_distance, single_pass
+      (must be the last stage)
+
+    Parameters:
+    - name: Stage name from the list above.
+    - **params: Keyword arguments of the wrapped function.
+    """
+
+    def __init__(self, name, **params):
+        if name not in _STAGES and name not in _FILTER_DESIGNS:
+            available = ", ".join(list(_STAGES) + list(_FILTER_DESIGNS))
+            raise ValueError(f"Unknown stage '{name}'. Available stages: {available}.")
+        self.name = name
+        self.params = params
+
+    def __repr__(self):
+        params = ", ".join(f"{key}={value!r}" for key, value in self.params.items())
+        return f"Stage({self.name!r}{', ' if params else ''}{params})"
+
+    def __eq__(self, other):
+        return isinstance(other, Stage) and (self.name, self.params) == (other.name, other.params)
+
+    @property
+    def fusable(self):
+        """
+        Whether the stage is a linear filter that can be merged into an SOS cascade.
+        """
+        return self.name in _FILTER_DESIGNS
+
+    def filter_sos(self, fs):
+        """
+        Second-order sections of a filter stage at the given sampling frequency.
+        """
+        return _FILTER_DESIGNS[self.name](fs, **self.params)
+
+    def apply(self, signals, fs):
+        """
+        Run the stage on stacked signals.
+
+        Returns:
+        - signals: Processed signals.
+        - fs: Sampling frequency after the stage.
+        """
+        if self.fusable:
+            return apply_sos_filter(self.filter_sos(fs), signals, axis=-1), fs
+        return _STAGES[self.name](signals, fs, **self.params)
+
+    def to_config(self):
+        return {"stage": self.name, **self.params}
+
+    @classmethod
+    def from_config(cls, config):
+        config = dict(config)
+        return cls(config.pop("stage"), **config)
+
+
+class Pipeline:
+    """
+    Configurable cleaning pipeline built from Stage objects.
+
+    Consecutive bandpass/lowpass/highpass/notch stages are fused: their second-order
+    sections are stacked into one cascade and applied in a single zero-phase pass. Away
+    from the record edges this gives the same result as running the filters one after
+    another; within a few filter lengths of the edges the results differ slightly because
+    sosfiltfilt pads the signal once for the whole cascade.
+
+    Parameters:
+    - stages: Sequence of Stage objects.
+    - fuse: Merge consecutive filter stages into one SOS cascade (default: True).
+    """
+
+    def __init__(self, stages, fuse=True):
+        self.stages = list(stages)
+        self.fuse = fuse
+        for stage in self.stages[:-1]:
+            if stage.name == "find_peaks_and_max_correlation":
+                raise ValueError("'find_peaks_and_max_correlation' must be the last stage.")
+
+    def __repr__(self):
+        return f"Pipeline({self.stages!r}, fuse={self.fuse!r})"
+
+    @classmethod
+    def default(cls, lower_bound=40, upper_bound=200, bandpass_low=0.5, bandpass_high=8.0,
+                segment_duration=2, overlap=1, peak_distance=50, hampel_window_size=10, hampel_threshold=3):
+        """
+        The six stages of combined_pipeline, with the same parameters.
+        """
+        return cls([
+            Stage("remove_invalid_values"),
+            Stage("remove_out_of_range_bp", min_bp=lower_bound, max_bp=upper_bound),
+            Stage("baseline_wander_removal"),
+            Stage("bandpass_filter", low_cutoff=bandpass_low, high_cutoff=bandpass_high),
+            Stage("hampel_filter", window_size=hampel_window_size, threshold=hampel_threshold),
+            Stage("find_peaks_and_max_correlation", segment_duration=segment_duration,
+                  overlap=overlap, peak_distance=peak_distance),
+        ])
+
+    def to_config(self):
+        """
+        Serialize the pipeline to a JSON-compatible dict.
+        """
+        return {"stages": [stage.to_config() for stage in self.stages], "fuse": self.fuse}
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Build a pipeline from a dict produced by to_config.
+        """
+        return cls([Stage.from_config(stage) for stage in config["stages"]], fuse=config.get("fuse", True))
+
+    def plan(self):
+        """
+        Group the stages into execution steps, fusing consecutive filter stages.
+
+        Returns:
+        - List of lists of stages; each inner list runs as one step.
+        """
+        steps = []
+        for stage in self.stages:
+            if self.fuse and stage.fusable and steps and steps[-1][-1].fusable:
+                steps[-1].append(stage)
+            else:
+                steps.append([stage])
+        return steps
+
+    def run(self, ppg_signal, abp_signal, fs, profiler=None, cache=None, dtype=np.float64):
+        """
+        Run the pipeline on a PPG/ABP pair.
+
+        Parameters:
+        - ppg_signal: Raw PPG signal (NumPy array).
+        - abp_signal: Raw ABP signal (NumPy array).
+        - fs: Sampling frequency (Hz).
+        - profiler: Optional PipelineProfiler recording each step (default: None).
+        - cache: Optional ResultCache keyed on the inputs and this pipeline's config (default: None).
+        - dtype: Floating-point precision of the processing, np.float64 (default) or np.float32
+                 (see combined_pipeline for the accuracy of float32).
+
+        Returns:
+        - cleaned_ppg: Cleaned PPG signal (the selected window if the last stage is
+                       find_peaks_and_max_correlation).
+        - cleaned_abp: Cleaned ABP signal.
+        """
+        if cache is not None:
+            key = cache.key(ppg_signal, abp_signal, fs,
+                            dict(self.to_config(), pipeline="Pipeline", dtype=np.dtype(dtype).name))
+            entry = cache.get(key)
+            if entry is not None:
+                return entry.get("cleaned_ppg"), entry.get("cleaned_abp")
+            cleaned_ppg, cleaned_abp = self.run(ppg_signal, abp_signal, fs, profiler, dtype=dtype)
+            cache.put(key, cleaned_ppg=cleaned_ppg, cleaned_abp=cleaned_abp)
+            return cleaned_ppg, cleaned_abp
+
+        signals = np.vstack([ppg_signal, abp_signal]).astype(dtype, copy=False)
+
+        for step in self.plan():
+            if len(step) == 1:
+                stage = step[0]
+                signals, fs = run_stage(profiler, stage.name, stage.apply, signals, fs)
+            else:
+                # One zero-phase pass over the cascade of all fused filters
+                name = "+".join(stage.name for stage in step)
+                sos = np.vstack([stage.filter_sos(fs) for stage in step])
+                signals = run_stage(profiler, name, _apply_fused_filters, signals, sos)
+
+        if isinstance(signals, tuple):
+            # The window selection stage already split the signals
+            return signals
+        return signals[0], signals[1]
+
+
+def _apply_fused_filters(signals, sos):
+    # Signals come first so the profiler records their length as the stage input
+    return apply_sos_filter(sos, signals, axis=-1)
+
+
+def _remove_invalid_values(signals, fs):
+    return remove_invalid_values(signals)[0], fs
+
+
+def _remove_out_of_range_bp(signals, fs, min_bp=40, max_bp=200):
+    return remove_out_of_range_bp(signals, signals[1], min_bp, max_bp)[0], fs
+
+
+def _baseline_wander_removal(signals, fs, method='linear', segment_duration=10.0, window_duration=1.5):
+    return baseline_wander_removal(signals, fs, method, axis=-1, segment_duration=segment_duration,
+                                   window_duration=window_duration), fs
+
+
+def _hampel_filter(signals, fs, window_size=10, threshold=3):
+    return hampel_filter(signals, window_size, threshold, axis=-1), fs
+
+
+def _zscore_normalization(signals, fs):
+    return zscore_normalization(signals, axis=-1), fs
+
+
+def _downsample_signal(signals, fs, target_fs, method='fft'):
+    return downsample_signal(signals, fs, target_fs, axis=-1, method=method), target_fs
+
+
+def _resample_signal(signals, fs, target_fs):
+    return resample_signal(signals, fs, target_fs, axis=-1), target_fs
+
+
+def _find_peaks_and_max_correlation(signals, fs, segment_duration=2, overlap=1, peak_distance=50, single_pass=False):
+    best_ppg, best_abp, _ = find_peaks_and_max_correlation(
+        signals[0], signals[1], fs, segment_duration, overlap, peak_distance, single_pass
+    )
+    return (best_ppg, best_abp), fs
+
+
+_FILTER_DESIGNS = {
+    "bandpass_filter": lambda fs, low_cutoff=0.5, high_cutoff=8.0, order=4:
+        design_filter('band', fs, (low_cutoff, high_cutoff), order),
+    "lowpass_filter": lambda fs, cutoff, order=4: design_filter('low', fs, cutoff, order),
+    "highpass_filter": lambda fs, cutoff, order=4: design_filter('high', fs, cutoff, order),
+    "notch_filter": lambda fs, notch_freq, quality_factor=30:
+        design_filter('notch', fs, notch_freq, quality_factor=quality_factor),
+}
+
+_STAGES = {
+    "remove_invalid_values": _remove_invalid_values,
+    "remove_out_of_range_bp": _remove_out_of_range_bp,
+    "baseline_wander_removal": _baseline_wander_removal,
+    "hampel_filter": _hampel_filter,
+    "zscore_normalization": _zscore_normalization,
+    "downsample_signal": _downsample_signal,
+    "resample_signal": _resample_signal,
+    "find_peaks_and_max_correlation": _find_peaks_and_max_correlation,
+}
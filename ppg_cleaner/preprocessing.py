@@ -1,25 +1,55 @@
+from fractions import Fraction
+from functools import lru_cache
+
 import numpy as np
+from scipy.interpolate import CubicSpline
+from scipy.linalg import solveh_banded
+from scipy.ndimage import maximum_filter1d, minimum_filter1d
 from scipy.signal import detrend
 from scipy.signal import resample
+from scipy.signal import resample_poly, firwin
+
+from ppg_cleaner.utils import mask_to_intervals, intervals_to_mask, complement_intervals
+from ppg_cleaner.peak_detection import detect_peaks, detect_feet
 
-def zscore_normalization(signal):
+def zscore_normalization(signal, axis=None, out=None):
     """
     Normalize the signal to have zero mean and unit variance.
     
     Parameters:
     - signal: NumPy array representing the input signal.
+    - axis: Axis along which to normalize, e.g. -1 to normalize each channel of an
+            (n_channels, n_samples) array separately (default: None, the whole array).
+    - out: Optional float array receiving the result, e.g. the signal itself to
+           normalize in place without allocating a new array (default: None).
     
     Returns:
     - Normalized signal.
     """
-    mean = np.mean(signal)
-    std = np.std(signal)
-    if std == 0:
+    # A constant signal is the only way to get a zero standard deviation
+    if np.any(np.max(signal, axis=axis) == np.min(signal, axis=axis)):
         raise ValueError("Standard deviation is zero, cannot perform z-score normalization.")
-    return (signal - mean) / std
+    mean = np.mean(signal, axis=axis, keepdims=True)
+    out = np.subtract(signal, mean, out=out)
+    # The centred result doubles as the input of the standard deviation, so np.std's own temporary is not needed
+    std = _root_mean_square(out, axis)
+    return np.divide(out, std, out=out)
 
 
-def min_max_normalization(signal, min_val, max_val):
+def _root_mean_square(signal, axis):
+    """
+    Root mean square along an axis (keeping dimensions) without full-size temporaries.
+    """
+    if axis is None:
+        return np.sqrt(np.vdot(signal, signal) / signal.size)
+    if isinstance(axis, tuple):
+        return np.sqrt(np.mean(np.square(signal), axis=axis, keepdims=True))
+    moved = np.moveaxis(signal, axis, -1)
+    mean_square = np.einsum('...i,...i->...', moved, moved) / moved.shape[-1]
+    return np.expand_dims(np.sqrt(mean_square), axis)
+
+
+def min_max_normalization(signal, min_val, max_val, axis=None, out=None):
     """
     Normalize the signal to a specific range [min_val, max_val].
     
@@ -27,34 +57,50 @@ def min_max_normalization(signal, min_val, max_val):
     - signal: NumPy array representing the input signal.
     - min_val: Desired minimum value of the normalized signal.
     - max_val: Desired maximum value of the normalized signal.
+    - axis: Axis along which to normalize (default: None, the whole array).
+    - out: Optional float array receiving the result, e.g. the signal itself to
+           normalize in place without allocating a new array (default: None).
     
     Returns:
     - Normalized signal.
     """
-    signal_min = np.min(signal)
-    signal_max = np.max(signal)
-    if signal_max - signal_min == 0:
+    signal_min = np.min(signal, axis=axis, keepdims=True)
+    signal_max = np.max(signal, axis=axis, keepdims=True)
+    if np.any(signal_max - signal_min == 0):
         raise ValueError("Signal has zero range, cannot perform min-max normalization.")
-    return ((signal - signal_min) / (signal_max - signal_min)) * (max_val - min_val) + min_val
+    scale = (max_val - min_val) / (signal_max - signal_min)
+    if out is None:
+        # Integer input still needs a float result
+        out = np.empty(np.shape(signal), dtype=np.result_type(signal_min, scale))
+    out = np.subtract(signal, signal_min, out=out)
+    out = np.multiply(out, scale, out=out)
+    return np.add(out, min_val, out=out)
 
 
-def rescale_signal(signal):
+def rescale_signal(signal, axis=None, out=None):
     """
     Rescale the signal based on its maximum absolute value.
     Useful for normalizing signals with large variations.
     
     Parameters:
     - signal: NumPy array representing the input signal.
+    - axis: Axis along which to rescale (default: None, the whole array).
+    - out: Optional float array receiving the result, e.g. the signal itself to
+           rescale in place without allocating a new array (default: None).
     
     Returns:
     - Rescaled signal.
     """
-    max_abs_value = np.max(np.abs(signal))
-    if max_abs_value == 0:
+    # max(|x|) from the extremes avoids a full-size np.abs temporary
+    max_abs_value = np.maximum(
+        np.max(signal, axis=axis, keepdims=True),
+        -np.min(signal, axis=axis, keepdims=True)
+    )
+    if np.any(max_abs_value == 0):
         raise ValueError("Signal has zero maximum absolute value, cannot rescale.")
-    return signal / max_abs_value
+    return np.divide(signal, max_abs_value, out=out)
 
-def clip_signal(signal, lower_bound, upper_bound):
+def clip_signal(signal, lower_bound, upper_bound, out=None):
     """
     Clip the signal to a specified range.
     
@@ -62,26 +108,31 @@ def clip_signal(signal, lower_bound, upper_bound):
     - signal: Input signal (list or NumPy array).
     - lower_bound: Lower bound for the signal values.
     - upper_bound: Upper bound for the signal values.
+    - out: Optional array receiving the result, e.g. the signal itself to clip in place (default: None).
     
     Returns:
     - Clipped signal (NumPy array).
     """
 
-    # Convert to NumPy array if not already
-    signal = np.array(signal)
+    # Convert to NumPy array if not already (without copying arrays or memmaps)
+    signal = np.asarray(signal)
 
     # Clip the signal values
-    clipped_signal = np.clip(signal, lower_bound, upper_bound)
+    clipped_signal = np.clip(signal, lower_bound, upper_bound, out=out)
 
     return clipped_signal
 
-def remove_invalid_values(ppg_signal=None, abp_signal=None):
+def remove_invalid_values(ppg_signal=None, abp_signal=None, axis=-1):
     """
     Remove NaN and infinite values from PPG and/or ABP signals, ensuring alignment if both are provided.
 
+    Multi-channel arrays such as (n_channels, n_samples) are supported: a sample is removed
+    from every channel if any channel is invalid at that position.
+
     Parameters:
     - ppg_signal: The PPG signal array (NumPy array), optional.
     - abp_signal: The ABP signal array (NumPy array), optional.
+    - axis: Time axis of the signals (default: -1).
 
     Returns:
     - cleaned_ppg: Cleaned PPG signal with invalid values removed (or None if not provided).
@@ -91,51 +142,268 @@ def remove_invalid_values(ppg_signal=None, abp_signal=None):
         raise ValueError("At least one of 'ppg_signal' or 'abp_signal' must be provided.")
 
     if ppg_signal is not None:
-        ppg_signal = np.array(ppg_signal)  # Ensure it's a NumPy array
+        ppg_signal = np.asarray(ppg_signal)  # Ensure it's a NumPy array, without copying
     if abp_signal is not None:
-        abp_signal = np.array(abp_signal)  # Ensure it's a NumPy array
+        abp_signal = np.asarray(abp_signal)  # Ensure it's a NumPy array, without copying
 
     if ppg_signal is not None and abp_signal is not None:
         # Create a combined mask for valid values in both signals
         valid_mask = (
-            np.isfinite(ppg_signal) &  # PPG signal has no NaN or Inf
-            np.isfinite(abp_signal)    # ABP signal has no NaN or Inf
+            _all_finite(ppg_signal, axis) &  # PPG signal has no NaN or Inf
+            _all_finite(abp_signal, axis)    # ABP signal has no NaN or Inf
         )
         # Apply the mask to both signals
-        cleaned_ppg = ppg_signal[valid_mask]
-        cleaned_abp = abp_signal[valid_mask]
+        cleaned_ppg = np.compress(valid_mask, ppg_signal, axis=axis)
+        cleaned_abp = np.compress(valid_mask, abp_signal, axis=axis)
         return cleaned_ppg, cleaned_abp
 
     if ppg_signal is not None:
         # Clean only PPG signal
-        valid_mask = np.isfinite(ppg_signal)  # PPG signal has no NaN or Inf
-        cleaned_ppg = ppg_signal[valid_mask]
+        valid_mask = _all_finite(ppg_signal, axis)  # PPG signal has no NaN or Inf
+        cleaned_ppg = np.compress(valid_mask, ppg_signal, axis=axis)
         return cleaned_ppg, None
 
     if abp_signal is not None:
         # Clean only ABP signal
-        valid_mask = np.isfinite(abp_signal)  # ABP signal has no NaN or Inf
-        cleaned_abp = abp_signal[valid_mask]
+        valid_mask = _all_finite(abp_signal, axis)  # ABP signal has no NaN or Inf
+        cleaned_abp = np.compress(valid_mask, abp_signal, axis=axis)
         return None, cleaned_abp
 
-def baseline_wander_removal(signal, fs=None, method='linear'):
+def _all_finite(signal, axis):
+    """
+    Mask along the time axis that is True where every channel is finite.
+    """
+    return _all_channels(np.isfinite(signal), axis)
+
+def _all_channels(mask, axis):
+    """
+    Reduce an element-wise mask to a 1-D mask along the time axis, True where every channel is True.
+    """
+    if mask.ndim == 1:
+        return mask
+    return np.moveaxis(mask, axis, -1).reshape(-1, mask.shape[axis]).all(axis=0)
+
+def find_invalid_intervals(ppg_signal=None, abp_signal=None, min_bp=None, max_bp=None, axis=-1):
+    """
+    Locate runs of invalid samples without removing them, so time alignment is preserved.
+
+    A sample is invalid if any signal is NaN or infinite there, or if the ABP value lies
+    outside [min_bp, max_bp] when those bounds are given.
+
+    Parameters:
+    - ppg_signal: The PPG signal array (NumPy array), optional.
+    - abp_signal: The ABP signal array (NumPy array), optional.
+    - min_bp: Minimum allowable blood pressure value (default: None, not checked).
+    - max_bp: Maximum allowable blood pressure value (default: None, not checked).
+    - axis: Time axis of the signals (default: -1).
+
+    Returns:
+    - intervals: Integer array of shape (n_runs, 2) with the [start, stop) of each invalid run.
+    """
+    if ppg_signal is None and abp_signal is None:
+        raise ValueError("At least one of 'ppg_signal' or 'abp_signal' must be provided.")
+
+    valid_mask = None
+    for signal in (ppg_signal, abp_signal):
+        if signal is not None:
+            finite = _all_finite(np.asarray(signal), axis)
+            valid_mask = finite if valid_mask is None else valid_mask & finite
+
+    if abp_signal is not None:
+        abp_signal = np.asarray(abp_signal)
+        with np.errstate(invalid='ignore'):
+            if min_bp is not None:
+                valid_mask &= _all_channels(abp_signal >= min_bp, axis)
+            if max_bp is not None:
+                valid_mask &= _all_channels(abp_signal <= max_bp, axis)
+
+    return mask_to_intervals(~valid_mask)
+
+def interpolate_invalid_values(ppg_signal, abp_signal, fs, max_gap=1.0, min_bp=None, max_bp=None, axis=-1):
+    """
+    Fill short runs of invalid samples by linear interpolation and split the record at long runs.
+
+    Unlike remove_invalid_values, no samples are deleted: the returned signals keep the
+    original length and timestamps. Runs longer than max_gap seconds, and runs touching
+    either end of the record, are set to NaN and separate the usable segments. For
+    multi-channel arrays such as (n_channels, n_samples), a sample is invalid in every
+    channel if any channel is invalid at that position.
+
+    Parameters:
+    - ppg_signal: The PPG signal array (NumPy array).
+    - abp_signal: The ABP signal array (NumPy array).
+    - fs: Sampling frequency (Hz).
+    - max_gap: Longest invalid run (in seconds) that is interpolated (default: 1.0).
+    - min_bp: Minimum allowable blood pressure value (default: None, not checked).
+    - max_bp: Maximum allowable blood pressure value (default: None, not checked).
+    - axis: Time axis of the signals (default: -1).
+
+    Returns:
+    - filled_ppg: PPG signal with short gaps interpolated and long gaps set to NaN.
+    - filled_abp: ABP signal with short gaps interpolated and long gaps set to NaN.
+    - segments: Integer array of shape (n_segments, 2) with the [start, stop) of each usable segment.
+    """
+    filled_ppg = np.array(ppg_signal, dtype=_float_dtype(ppg_signal))
+    filled_abp = np.array(abp_signal, dtype=_float_dtype(abp_signal))
+    n = filled_ppg.shape[axis]
+
+    invalid = find_invalid_intervals(filled_ppg, filled_abp, min_bp, max_bp, axis=axis)
+    lengths = invalid[:, 1] - invalid[:, 0]
+    interior = (invalid[:, 0] > 0) & (invalid[:, 1] < n)
+    short = interior & (lengths <= max_gap * fs)
+
+    valid_idx = np.flatnonzero(~intervals_to_mask(invalid, n))
+    short_idx = np.flatnonzero(intervals_to_mask(invalid[short], n))
+    long_gaps = invalid[~short]
+    long_mask = intervals_to_mask(long_gaps, n)
+
+    # Short gaps are interior, so every filled sample has a valid neighbour on both sides
+    right = np.searchsorted(valid_idx, short_idx)
+    left_idx, right_idx = valid_idx[right - 1], valid_idx[right]
+    weight = (short_idx - left_idx) / (right_idx - left_idx)
+    for filled in (filled_ppg, filled_abp):
+        # Work on a view with time last, so every channel is filled in the same call
+        samples = np.moveaxis(filled, axis, -1)
+        left_values, right_values = samples[..., left_idx], samples[..., right_idx]
+        samples[..., short_idx] = left_values + (right_values - left_values) * weight
+        samples[..., long_mask] = np.nan
+
+    return filled_ppg, filled_abp, complement_intervals(long_gaps, n)
+
+def baseline_wander_removal(signal, fs=None, method='linear', axis=-1, segment_duration=10.0, window_duration=1.5):
     """
     Remove baseline wander from the signal using detrending.
 
+    Besides global detrending, the baseline can be estimated locally, which follows
+    respiration-driven wander in long records. All local estimators run in linear time and
+    memory in the record length.
+
     Parameters:
     - signal: Input signal (list or NumPy array).
-    - fs: Sampling frequency (optional, not used in detrending but for context).
-    - method: Method for detrending ('linear' or 'constant').
+    - fs: Sampling frequency (required by the local methods, not used by 'linear' and 'constant').
+    - method: Method for detrending:
               'linear' removes a linear trend, 'constant' removes the mean.
+              'piecewise' removes a continuous piecewise-linear least-squares fit with knots
+              every segment_duration seconds.
+              'median' removes the median of consecutive blocks of window_duration seconds,
+              interpolated linearly between block centres.
+              'morphological' removes the average of the opening-closing and closing-opening
+              of the signal with a flat structuring element of window_duration seconds.
+              'spline' removes a cubic spline through the beat feet (see detect_feet).
+    - axis: Time axis of the signal (default: -1).
+    - segment_duration: Knot spacing for 'piecewise' (in seconds, default: 10.0).
+    - window_duration: Block or structuring element length for 'median' and 'morphological'
+                       (in seconds, default: 1.5). It should exceed one beat.
 
     Returns:
     - Processed signal with baseline wander removed.
     """
-    # Detrend the signal to remove baseline wander
-    detrended_signal = detrend(signal, type=method)
-    return detrended_signal
+    if method in ('linear', 'constant'):
+        # Detrend the signal to remove baseline wander
+        detrended_signal = detrend(signal, axis=axis, type=method)
+        return detrended_signal
+    if method not in _BASELINE_ESTIMATORS:
+        raise ValueError("'method' must be 'linear', 'constant', 'piecewise', 'median', 'morphological' or 'spline'.")
+    if fs is None:
+        raise ValueError(f"fs is required for method '{method}'.")
+
+    signal = np.asarray(signal, dtype=_float_dtype(signal))
+    rows = np.moveaxis(signal, axis, -1)
+    flat = rows.reshape(-1, rows.shape[-1])
+    if method in ('median', 'morphological'):
+        baseline = _BASELINE_ESTIMATORS[method](flat, max(int(window_duration * fs), 1))
+    elif method == 'piecewise':
+        baseline = _piecewise_linear_baseline(flat, max(int(segment_duration * fs), 1))
+    else:
+        baseline = _spline_baseline(flat, fs)
+    return np.moveaxis((flat - baseline).reshape(rows.shape), -1, axis)
+
+
+def _piecewise_linear_baseline(rows, knot_spacing):
+    """
+    Least-squares continuous piecewise-linear fit of each row, with knots every knot_spacing samples.
+
+    Each sample is a mix of its two neighbouring knots, so the normal equations are tridiagonal
+    and are assembled with segment-wise sums and solved in linear time.
+    """
+    n = rows.shape[-1]
+    if n < 2:
+        return rows.mean(axis=-1, keepdims=True) * np.ones_like(rows)
+    n_segments = max(-(-(n - 1) // knot_spacing), 1)
+    index = np.arange(n)
+    segment = np.minimum(index // knot_spacing, n_segments - 1)
+    # Position within the segment, 0 at its left knot and 1 at its right knot
+    segment_lengths = np.minimum((np.arange(n_segments) + 1) * knot_spacing, n - 1) - np.arange(n_segments) * knot_spacing
+    weight = (index - segment * knot_spacing) / np.maximum(segment_lengths[segment], 1)
+    starts = np.arange(n_segments) * knot_spacing
 
-def downsample_signal(signal, original_fs, target_fs):
+    # Tridiagonal normal matrix, identical for all rows
+    diagonal = np.zeros(n_segments + 1)
+    diagonal[:-1] += np.add.reduceat((1 - weight) ** 2, starts)
+    diagonal[1:] += np.add.reduceat(weight ** 2, starts)
+    off_diagonal = np.add.reduceat((1 - weight) * weight, starts)
+
+    rhs = np.zeros((n_segments + 1, rows.shape[0]))
+    rhs[:-1] += np.add.reduceat(rows * (1 - weight), starts, axis=-1).T
+    rhs[1:] += np.add.reduceat(rows * weight, starts, axis=-1).T
+
+    banded = np.vstack([np.concatenate([[0], off_diagonal]), diagonal])
+    knots = solveh_banded(banded, rhs)
+    # Evaluate the fit by mixing the two knots of every sample
+    return (knots[segment].T * (1 - weight) + knots[segment + 1].T * weight).astype(rows.dtype, copy=False)
+
+
+def _block_median_baseline(rows, block):
+    """
+    Median of consecutive blocks, linearly interpolated between block centres.
+    """
+    n = rows.shape[-1]
+    n_blocks = n // block
+    if n_blocks < 2:
+        return np.median(rows, axis=-1, keepdims=True) * np.ones_like(rows)
+    medians = np.median(rows[:, :n_blocks * block].reshape(rows.shape[0], n_blocks, block), axis=-1)
+    centres = np.arange(n_blocks) * block + (block - 1) / 2
+    index = np.arange(n)
+    return np.stack([np.interp(index, centres, row) for row in medians]).astype(rows.dtype, copy=False)
+
+
+def _morphological_baseline(rows, size):
+    """
+    Average of the opening-closing and closing-opening with a flat element of size samples.
+    """
+    def opening(x):
+        return maximum_filter1d(minimum_filter1d(x, size, axis=-1), size, axis=-1)
+
+    def closing(x):
+        return minimum_filter1d(maximum_filter1d(x, size, axis=-1), size, axis=-1)
+
+    return (closing(opening(rows)) + opening(closing(rows))) / 2
+
+
+def _spline_baseline(rows, fs):
+    """
+    Cubic spline through the beat feet of each row, held constant beyond the first and last foot.
+    """
+    baseline = np.empty_like(rows)
+    index = np.arange(rows.shape[-1])
+    for row, out in zip(rows, baseline):
+        feet = detect_feet(row, detect_peaks(row, fs)) if len(row) > 2 else np.empty(0, dtype=int)
+        if len(feet) < 2:
+            out[:] = np.mean(row)
+            continue
+        spline = CubicSpline(feet, row[feet])
+        out[:] = spline(np.clip(index, feet[0], feet[-1]))
+    return baseline
+
+
+_BASELINE_ESTIMATORS = {
+    'piecewise': _piecewise_linear_baseline,
+    'median': _block_median_baseline,
+    'morphological': _morphological_baseline,
+    'spline': _spline_baseline,
+}
+
+def downsample_signal(signal, original_fs, target_fs, axis=-1, method='fft'):
     """
     Downsample the signal to a lower sampling rate.
 
@@ -143,6 +411,11 @@ def downsample_signal(signal, original_fs, target_fs):
     - signal: Input signal (list or NumPy array).
     - original_fs: Original sampling frequency (Hz).
     - target_fs: Target sampling frequency (Hz).
+    - axis: Time axis of the signal (default: -1).
+    - method: 'fft' resamples the whole signal in the frequency domain (default).
+              'poly' uses the polyphase engine of resample_signal, which is faster on long
+              records and does not ring at the edges; it returns ceil(n * target_fs / original_fs)
+              samples instead of int(n * target_fs / original_fs).
 
     Returns:
     - Downsampled signal (NumPy array).
@@ -150,15 +423,81 @@ def downsample_signal(signal, original_fs, target_fs):
     if target_fs >= original_fs:
         raise ValueError("Target sampling frequency must be less than the original frequency.")
 
+    if method == 'poly':
+        return resample_signal(signal, original_fs, target_fs, axis=axis)
+    if method != 'fft':
+        raise ValueError("'method' must be 'fft' or 'poly'.")
+
     # Calculate the number of samples in the downsampled signal
-    num_samples = int(len(signal) * target_fs / original_fs)
+    num_samples = int(np.shape(signal)[axis] * target_fs / original_fs)
 
     # Resample the signal
-    downsampled_signal = resample(signal, num_samples)
+    downsampled_signal = resample(signal, num_samples, axis=axis)
 
     return downsampled_signal
 
-def remove_out_of_range_bp(ppg_signal, abp_signal, min_bp=40, max_bp=200):
+def resample_signal(signal, original_fs, target_fs, axis=-1, max_denominator=1000):
+    """
+    Resample the signal to any sampling rate with a polyphase FIR filter.
+
+    The rate change is expressed as a rational factor up/down (e.g. 125 -> 100 Hz is 4/5,
+    500 -> 125 Hz is 1/4) and applied with resample_poly. The anti-aliasing filter for each
+    factor is designed once and cached.
+
+    Parameters:
+    - signal: Input signal (list or NumPy array).
+    - original_fs: Original sampling frequency (Hz).
+    - target_fs: Target sampling frequency (Hz), higher or lower than original_fs.
+    - axis: Time axis of the signal (default: -1).
+    - max_denominator: Largest allowed up/down factor when approximating the rate ratio (default: 1000).
+
+    Returns:
+    - Resampled signal (NumPy array) with ceil(n * up / down) samples.
+    """
+    up, down = resampling_factors(original_fs, target_fs, max_denominator)
+    if up == down:
+        return np.array(signal, dtype=_float_dtype(signal))
+    return resample_poly(signal, up, down, axis=axis, window=polyphase_filter(up, down))
+
+def resampling_factors(original_fs, target_fs, max_denominator=1000):
+    """
+    Rational up/down factors approximating target_fs / original_fs.
+
+    Parameters:
+    - original_fs: Original sampling frequency (Hz).
+    - target_fs: Target sampling frequency (Hz).
+    - max_denominator: Largest allowed factor (default: 1000).
+
+    Returns:
+    - up: Upsampling factor.
+    - down: Downsampling factor.
+    """
+    if original_fs <= 0 or target_fs <= 0:
+        raise ValueError("Sampling frequencies must be positive.")
+    ratio = Fraction(target_fs / original_fs).limit_denominator(max_denominator)
+    if ratio.numerator == 0:
+        raise ValueError("Target sampling frequency is too low for 'max_denominator'.")
+    return ratio.numerator, ratio.denominator
+
+@lru_cache(maxsize=32)
+def polyphase_filter(up, down):
+    """
+    Anti-aliasing FIR filter used by resample_signal, designed as resample_poly's default.
+
+    Parameters:
+    - up: Upsampling factor.
+    - down: Downsampling factor.
+
+    Returns:
+    - Read-only array of 20 * max(up, down) + 1 filter taps.
+    """
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    taps = firwin(2 * half_len + 1, 1.0 / max_rate, window=('kaiser', 5.0))
+    taps.flags.writeable = False
+    return taps
+
+def remove_out_of_range_bp(ppg_signal, abp_signal, min_bp=40, max_bp=200, axis=-1):
     """
     Remove ABP values outside the range [min_bp, max_bp], and remove the corresponding PPG signal values.
 
@@ -167,16 +506,25 @@ def remove_out_of_range_bp(ppg_signal, abp_signal, min_bp=40, max_bp=200):
     - abp_signal: The ABP signal array (NumPy array).
     - min_bp: Minimum allowable blood pressure value (default: 40 mmHg).
     - max_bp: Maximum allowable blood pressure value (default: 200 mmHg).
+    - axis: Time axis of the signals (default: -1). For multi-channel arrays a sample is
+            removed if any ABP channel is out of range.
 
     Returns:
     - cleaned_ppg: Cleaned PPG signal with out-of-range values removed.
     - cleaned_abp: Cleaned ABP signal with out-of-range values removed.
     """
     # Create a mask for ABP values within the valid range
-    valid_mask = (abp_signal >= min_bp) & (abp_signal <= max_bp)
+    valid_mask = _all_channels((abp_signal >= min_bp) & (abp_signal <= max_bp), axis)
 
     # Apply the mask to both signals
-    cleaned_ppg = ppg_signal[valid_mask]
-    cleaned_abp = abp_signal[valid_mask]
+    cleaned_ppg = np.compress(valid_mask, ppg_signal, axis=axis)
+    cleaned_abp = np.compress(valid_mask, abp_signal, axis=axis)
+
+    return cleaned_ppg, cleaned_abp
 
-    return cleaned_ppg, cleaned_abp
\ No newline at end of file
+
+def _float_dtype(signal):
+    """
+    float32 for float32 input, float64 for anything else.
+    """
+    return np.dtype(np.float32) if np.asarray(signal).dtype == np.float32 else np.dtype(np.float64)
@@ -0,0 +1,127 @@
+import numpy as np
+
+from ppg_cleaner.utils import mask_to_intervals
+
+
+def window_quality(signal, fs, window_duration=10.0, cardiac_band=(0.5, 5.0), flat_tolerance=0.0,
+                   clip_tolerance=0.0, axis=-1):
+    """
+    Signal-quality features of all consecutive windows of a signal, computed at once.
+
+    Parameters:
+    - signal: Input signal (NumPy array).
+    - fs: Sampling frequency (Hz).
+    - window_duration: Length of each window (in seconds, default: 10.0). A trailing partial
+                       window is not scored.
+    - cardiac_band: Frequency range (in Hz) of the pulse (default: (0.5, 5.0)).
+    - flat_tolerance: Largest change between consecutive samples counted as flat (default: 0.0).
+    - clip_tolerance: Distance from the window's minimum or maximum within which a sample
+                      counts as clipped (default: 0.0).
+    - axis: Time axis of the signal (default: -1).
+
+    Returns:
+    - window_starts: Start index of each window.
+    - features: Dict of arrays with one value per window (and channel, for multi-channel input):
+      - 'flatline_ratio': Fraction of consecutive samples that do not change.
+      - 'clipping_ratio': Fraction of samples at the window's minimum or maximum.
+      - 'cardiac_power_ratio': Fraction of the non-DC power inside the cardiac band.
+      - 'kurtosis': Excess kurtosis of the samples (0 for constant windows).
+    """
+    signal = np.moveaxis(np.asarray(signal), axis, -1)
+    window_samples = int(window_duration * fs)
+    if window_samples < 2:
+        raise ValueError("'window_duration' must span at least two samples.")
+    n_windows = signal.shape[-1] // window_samples
+    window_starts = np.arange(n_windows) * window_samples
+    windows = signal[..., :n_windows * window_samples].reshape(signal.shape[:-1] + (n_windows, window_samples))
+
+    flatline_ratio = np.mean(np.abs(np.diff(windows, axis=-1)) <= flat_tolerance, axis=-1)
+
+    # A saturated sensor keeps returning the extreme value of the window
+    low = windows.min(axis=-1, keepdims=True)
+    high = windows.max(axis=-1, keepdims=True)
+    clipping_ratio = np.mean((windows <= low + clip_tolerance) | (windows >= high - clip_tolerance), axis=-1)
+
+    centred = windows - windows.mean(axis=-1, keepdims=True)
+    second = np.mean(centred ** 2, axis=-1)
+    fourth = np.mean(centred ** 4, axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        kurtosis = np.where(second > 0, fourth / second ** 2 - 3, 0.0)
+
+    power = np.abs(np.fft.rfft(centred, axis=-1)) ** 2
+    frequencies = np.fft.rfftfreq(window_samples, 1 / fs)
+    in_band = (frequencies >= cardiac_band[0]) & (frequencies <= cardiac_band[1])
+    total_power = power[..., 1:].sum(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cardiac_power_ratio = np.where(total_power > 0, power[..., in_band].sum(axis=-1) / total_power, 0.0)
+
+    features = {
+        "flatline_ratio": flatline_ratio,
+        "clipping_ratio": clipping_ratio,
+        "cardiac_power_ratio": cardiac_power_ratio,
+        "kurtosis": kurtosis,
+    }
+    return window_starts, features
+
+
+def quality_mask(features, max_flatline_ratio=0.2, max_clipping_ratio=0.1, min_cardiac_power_ratio=0.3,
+                 max_kurtosis=10.0):
+    """
+    Decide which windows are usable from their quality features.
+
+    Windows with NaN features (e.g. containing missing samples) fail.
+
+    Parameters:
+    - features: Dict returned by window_quality.
+    - max_flatline_ratio: Largest accepted flatline ratio (default: 0.2).
+    - max_clipping_ratio: Largest accepted clipping ratio (default: 0.1).
+    - min_cardiac_power_ratio: Smallest accepted cardiac power ratio (default: 0.3).
+    - max_kurtosis: Largest accepted excess kurtosis (default: 10.0).
+
+    Returns:
+    - Boolean array, True for windows that pass every criterion.
+    """
+    with np.errstate(invalid='ignore'):
+        return (
+            (features["flatline_ratio"] <= max_flatline_ratio) &
+            (features["clipping_ratio"] <= max_clipping_ratio) &
+            (features["cardiac_power_ratio"] >= min_cardiac_power_ratio) &
+            (features["kurtosis"] <= max_kurtosis)
+        )
+
+
+def prescreen_intervals(ppg_signal, abp_signal, fs, window_duration=10.0, cardiac_band=(0.5, 5.0),
+                        flat_tolerance=0.0, clip_tolerance=0.0, **thresholds):
+    """
+    Sample intervals in which both the PPG and the ABP windows pass the quality criteria.
+
+    Samples after the last full window share the verdict of that window. If the signals are
+    shorter than one window, they are kept as a whole.
+
+    Parameters:
+    - ppg_signal: PPG signal (NumPy array).
+    - abp_signal: ABP signal (NumPy array).
+    - fs: Sampling frequency (Hz).
+    - window_duration: Length of each quality window (in seconds, default: 10.0).
+    - cardiac_band: Frequency range (in Hz) of the pulse (default: (0.5, 5.0)).
+    - flat_tolerance: Largest change between consecutive samples counted as flat (default: 0.0).
+    - clip_tolerance: Distance from the window's minimum or maximum within which a sample
+                      counts as clipped (default: 0.0).
+    - **thresholds: Keyword arguments forwarded to quality_mask. Coarsely quantized signals
+                    (e.g. ABP stored in steps of 1 mmHg) repeat values often, so they may
+                    need a higher max_flatline_ratio.
+
+    Returns:
+    - intervals: Integer array of shape (n_intervals, 2) with the [start, stop) of each usable run.
+    """
+    n = len(ppg_signal)
+    _, features = window_quality(np.vstack([ppg_signal, abp_signal]), fs, window_duration, cardiac_band,
+                                 flat_tolerance, clip_tolerance)
+    passed = quality_mask(features, **thresholds).all(axis=0)
+    if len(passed) == 0:
+        return np.array([[0, n]]) if n else np.empty((0, 2), dtype=int)
+
+    window_samples = int(window_duration * fs)
+    mask = np.repeat(passed, window_samples)
+    mask = np.concatenate([mask, np.full(n - len(mask), passed[-1])])
+    return mask_to_intervals(mask)
@@ -0,0 +1,187 @@
+import asyncio
+import time
+from collections import deque, namedtuple
+
+from ppg_cleaner.streaming import StreamingCleaner, push_many
+
+# Queue entry marking the end of a bed's stream
+_END = object()
+
+_Chunk = namedtuple("_Chunk", ["arrival", "ppg", "abp"])
+
+
+class MonitoringService:
+    """
+    asyncio front-end cleaning live PPG/ABP streams from many beds at once.
+
+    Each bed has a bounded input queue fed by put() (or ingest() from an async source) and a
+    bounded output queue of cleaned (ppg, abp) chunks. A single batching loop (run()) takes
+    the oldest chunk of every bed that has one and whose output queue has room, and advances
+    all of their StreamingCleaner instances with one push_many call in an executor, so the
+    filtering of all beds is vectorized and stays off the event loop.
+
+    A batch is started as soon as every active bed has a chunk waiting, or when the oldest
+    waiting chunk is max_batch_delay seconds old, which bounds the latency added by batching.
+    A bed whose consumer falls behind fills its output queue; its chunks are then left in its
+    input queue, and once that is full, put() for that bed waits. Other beds are unaffected.
+
+    Parameters:
+    - fs: Sampling frequency shared by all beds (Hz).
+    - max_batch_delay: Longest time a chunk waits for other beds before a batch starts
+                       (in seconds, default: 0.05).
+    - max_queue_chunks: Capacity of each input and output queue (in chunks, default: 8).
+    - executor: concurrent.futures executor for the cleaning work (default: the event loop's
+                default thread pool).
+    - **cleaner_kwargs: Keyword arguments forwarded to StreamingCleaner.
+    """
+
+    def __init__(self, fs, max_batch_delay=0.05, max_queue_chunks=8, executor=None, **cleaner_kwargs):
+        if max_queue_chunks < 2:
+            raise ValueError("'max_queue_chunks' must be at least 2.")
+        self.fs = fs
+        self.max_batch_delay = max_batch_delay
+        self.max_queue_chunks = max_queue_chunks
+        self.executor = executor
+        self.cleaner_kwargs = cleaner_kwargs
+
+        self._cleaners = {}
+        self._inputs = {}
+        self._input_slots = {}
+        self._outputs = {}
+        # Created inside the running loop (see _wakeup_event)
+        self._wakeup = None
+        self._stopping = False
+
+    def add_bed(self, bed_id):
+        """
+        Register a bed.
+
+        Parameters:
+        - bed_id: Hashable identifier of the bed.
+
+        Returns:
+        - Output queue of the bed. It receives (cleaned_ppg, cleaned_abp) tuples and, after
+          end() and the final flushed samples, None.
+        """
+        if bed_id in self._cleaners:
+            raise ValueError(f"Bed {bed_id!r} is already registered.")
+        self._cleaners[bed_id] = StreamingCleaner(self.fs, **self.cleaner_kwargs)
+        self._inputs[bed_id] = deque()
+        self._input_slots[bed_id] = asyncio.Semaphore(self.max_queue_chunks)
+        self._outputs[bed_id] = asyncio.Queue(self.max_queue_chunks)
+        return self._outputs[bed_id]
+
+    def output(self, bed_id):
+        """
+        Output queue of a registered bed (see add_bed).
+        """
+        return self._outputs[bed_id]
+
+    async def put(self, bed_id, ppg_chunk, abp_chunk):
+        """
+        Queue the next chunk of a bed, waiting while its input queue is full.
+
+        Parameters:
+        - bed_id: Identifier of a registered bed.
+        - ppg_chunk: Next PPG samples (NumPy array).
+        - abp_chunk: Next ABP samples, same length as ppg_chunk (NumPy array).
+        """
+        await self._enqueue(bed_id, _Chunk(time.monotonic(), ppg_chunk, abp_chunk))
+
+    async def end(self, bed_id):
+        """
+        Mark the end of a bed's stream. Its remaining samples are flushed and the bed is removed.
+        """
+        await self._enqueue(bed_id, _END)
+
+    async def ingest(self, bed_id, source):
+        """
+        Feed a bed from an async iterable of (ppg_chunk, abp_chunk) pairs, e.g. a socket reader,
+        and end the bed when the source is exhausted.
+
+        Parameters:
+        - bed_id: Identifier of the bed, registered here if needed.
+        - source: Async iterable of (ppg_chunk, abp_chunk) pairs.
+        """
+        if bed_id not in self._cleaners:
+            self.add_bed(bed_id)
+        async for ppg_chunk, abp_chunk in source:
+            await self.put(bed_id, ppg_chunk, abp_chunk)
+        await self.end(bed_id)
+
+    def stop(self):
+        """
+        Make run() return once the chunks already queued have been processed.
+        """
+        self._stopping = True
+        # Without an event, run() has not waited yet and sees the flag before it does
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def run(self):
+        """
+        Batching loop; run it as a task next to the producers and consumers.
+        """
+        loop = asyncio.get_running_loop()
+        wakeup = self._wakeup_event()
+        while True:
+            ready, waiting = self._ready_beds()
+            if self._stopping and not waiting:
+                return
+
+            oldest = min((self._inputs[bed][0].arrival for bed in ready if self._inputs[bed][0] is not _END),
+                         default=None)
+            delay = None if oldest is None else self.max_batch_delay - (time.monotonic() - oldest)
+            # Start a batch when every bed can take part, or the oldest chunk has waited long enough
+            if ready and (len(ready) == len(self._cleaners) or delay is None or delay <= 0 or self._stopping):
+                await self._process(loop, ready)
+                continue
+
+            wakeup.clear()
+            try:
+                # Also poll for consumers freeing room in their output queues
+                await asyncio.wait_for(wakeup.wait(), self.max_batch_delay if delay is None else delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _enqueue(self, bed_id, entry):
+        await self._input_slots[bed_id].acquire()
+        self._inputs[bed_id].append(entry)
+        self._wakeup_event().set()
+
+    def _wakeup_event(self):
+        # Before Python 3.10, asyncio.Event binds to the event loop current at creation, so it
+        # is created on first use from a coroutine rather than in __init__
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        return self._wakeup
+
+    def _ready_beds(self):
+        """
+        Beds with a queued chunk and room in their output queue, and all beds with a queued chunk.
+        """
+        waiting = [bed for bed, queue in self._inputs.items() if queue]
+        # Ending a bed emits the flushed samples and the end marker, so it needs two free slots
+        ready = [bed for bed in waiting
+                 if self._outputs[bed].maxsize - self._outputs[bed].qsize() >= 2]
+        return ready, waiting
+
+    async def _process(self, loop, beds):
+        entries = {bed: self._inputs[bed].popleft() for bed in beds}
+        for bed in beds:
+            self._input_slots[bed].release()
+        ending = [bed for bed, entry in entries.items() if entry is _END]
+        pushing = [bed for bed, entry in entries.items() if entry is not _END]
+
+        if pushing:
+            results = await loop.run_in_executor(
+                self.executor, push_many, [self._cleaners[bed] for bed in pushing],
+                [entries[bed].ppg for bed in pushing], [entries[bed].abp for bed in pushing]
+            )
+            for bed, result in zip(pushing, results):
+                self._outputs[bed].put_nowait(result)
+
+        for bed in ending:
+            self._outputs[bed].put_nowait(self._cleaners[bed].flush())
+            self._outputs[bed].put_nowait(None)
+            del self._cleaners[bed], self._inputs[bed], self._input_slots[bed]
@@ -0,0 +1,313 @@
+import numpy as np
+from scipy.signal import sosfilt, sosfilt_zi
+
+from ppg_cleaner.filtering import design_filter
+from ppg_cleaner.artifact_removal import hampel_filter
+from ppg_cleaner.preprocessing import resampling_factors, polyphase_filter
+
+
+class StreamingCleaner:
+    """
+    Clean PPG and ABP signals chunk by chunk, e.g. from a bedside monitor feed.
+
+    The stages follow combined_pipeline, adapted to causal processing:
+
+    1. Invalid values (NaN/Inf) and
+    2. ABP values outside [lower_bound, upper_bound] are replaced by the last valid
+       sample pair instead of being deleted, so the output stays aligned with the input.
+       Samples before the first valid pair of the stream are dropped.
+    3. Baseline wander is removed with a first-order highpass at baseline_cutoff.
+    4. The bandpass filter runs forward only (sosfilt), carrying its state between chunks.
+    5. The Hampel filter is centred, so each sample is emitted once hampel_window_size
+       later samples have arrived. This is the fixed latency of the cleaner.
+
+    The peak-correlation window selection of combined_pipeline needs the whole record
+    and has no streaming counterpart. Memory use is bounded by the chunk size plus
+    2 * hampel_window_size samples per signal.
+
+    Parameters:
+    - fs: Sampling frequency (Hz).
+    - lower_bound: Lower bound for valid ABP values (default: 40).
+    - upper_bound: Upper bound for valid ABP values (default: 200).
+    - baseline_cutoff: Cutoff frequency of the baseline removal highpass (Hz, default: 0.05).
+    - bandpass_low: Lower cutoff frequency for bandpass filter (Hz).
+    - bandpass_high: Upper cutoff frequency for bandpass filter (Hz).
+    - order: Bandpass filter order (default: 4).
+    - hampel_window_size: Window size for Hampel filtering.
+    - hampel_threshold: Threshold for Hampel filtering.
+    """
+
+    def __init__(self, fs, lower_bound=40, upper_bound=200, baseline_cutoff=0.05,
+                 bandpass_low=0.5, bandpass_high=8.0, order=4,
+                 hampel_window_size=10, hampel_threshold=3):
+        self.fs = fs
+        self.lower_bound = lower_bound
+        self.upper_bound = upper_bound
+        self.hampel_window_size = hampel_window_size
+        self.hampel_threshold = hampel_threshold
+        # Cleaners with equal settings can be advanced together by push_many
+        self._settings = (fs, baseline_cutoff, bandpass_low, bandpass_high, order, hampel_window_size, hampel_threshold)
+
+        self._baseline_sos = design_filter('high', fs, baseline_cutoff, order=1)
+        self._bandpass_sos = design_filter('band', fs, (bandpass_low, bandpass_high), order)
+        self.reset()
+
+    @property
+    def latency(self):
+        """
+        Number of samples between a sample entering push() and leaving it.
+        """
+        return self.hampel_window_size
+
+    def reset(self):
+        """
+        Forget all filter state, e.g. before starting a new record.
+        """
+        self._last_valid = None
+        self._baseline_zi = None
+        self._bandpass_zi = None
+        self._history = np.empty((2, 0))
+        self._pending = np.empty((2, 0))
+
+    def push(self, ppg_chunk, abp_chunk):
+        """
+        Clean the next chunk of samples.
+
+        Parameters:
+        - ppg_chunk: Next PPG samples (NumPy array).
+        - abp_chunk: Next ABP samples, same length as ppg_chunk (NumPy array).
+
+        Returns:
+        - cleaned_ppg: Cleaned PPG samples, delayed by `latency` samples.
+        - cleaned_abp: Cleaned ABP samples, delayed by `latency` samples.
+        """
+        chunk = self._hold_invalid_values(ppg_chunk, abp_chunk)
+        if chunk.shape[1] == 0:
+            return self._split(chunk)
+
+        self._initialize_filters(chunk)
+        chunk, self._baseline_zi = sosfilt(self._baseline_sos, chunk, axis=-1, zi=self._baseline_zi)
+        chunk, self._bandpass_zi = sosfilt(self._bandpass_sos, chunk, axis=-1, zi=self._bandpass_zi)
+
+        filtered, self._history, self._pending = _hampel_step(
+            self._history, self._pending, chunk, self.hampel_window_size, self.hampel_threshold
+        )
+        return self._split(filtered)
+
+    def flush(self):
+        """
+        Emit the samples still held back by the Hampel window at the end of a stream.
+
+        Like hampel_filter, the final hampel_window_size samples are left unfiltered.
+
+        Returns:
+        - cleaned_ppg: Remaining PPG samples.
+        - cleaned_abp: Remaining ABP samples.
+        """
+        remaining = self._pending
+        self._pending = np.empty((2, 0))
+        return self._split(remaining)
+
+    def _hold_invalid_values(self, ppg_chunk, abp_chunk):
+        chunk = np.vstack([np.asarray(ppg_chunk, dtype=float), np.asarray(abp_chunk, dtype=float)])
+        if chunk.ndim != 2 or chunk.shape[0] != 2:
+            raise ValueError("'ppg_chunk' and 'abp_chunk' must be 1-D arrays of the same length.")
+
+        valid = (
+            np.isfinite(chunk).all(axis=0) &
+            (chunk[1] >= self.lower_bound) &
+            (chunk[1] <= self.upper_bound)
+        )
+        if valid.all():
+            if chunk.shape[1]:
+                self._last_valid = chunk[:, -1].copy()
+            return chunk
+
+        # Index of the most recent valid sample at each position (-1 if none in this chunk)
+        source = np.maximum.accumulate(np.where(valid, np.arange(len(valid)), -1))
+        if self._last_valid is None:
+            # Nothing to hold yet at the start of the stream, drop those samples
+            filled = chunk[:, source[source >= 0]]
+        else:
+            filled = np.hstack([self._last_valid[:, None], chunk])[:, source + 1]
+
+        if filled.shape[1]:
+            self._last_valid = filled[:, -1].copy()
+        return filled
+
+    def _initialize_filters(self, chunk):
+        # Start the filters in steady state for the first sample to avoid a step transient
+        if self._baseline_zi is None:
+            self._baseline_zi = sosfilt_zi(self._baseline_sos)[:, None, :] * chunk[None, :, :1]
+        if self._bandpass_zi is None:
+            filtered, _ = sosfilt(self._baseline_sos, chunk[:, :1], axis=-1, zi=self._baseline_zi)
+            self._bandpass_zi = sosfilt_zi(self._bandpass_sos)[:, None, :] * filtered[None, :, :1]
+
+    @staticmethod
+    def _split(chunk):
+        return chunk[0], chunk[1]
+
+
+def push_many(cleaners, ppg_chunks, abp_chunks):
+    """
+    Advance many StreamingCleaner instances (e.g. one per bed) by one chunk each.
+
+    Cleaners with the same settings whose chunks and buffered samples have the same length
+    are stacked, so their baseline, bandpass and Hampel steps run as one multi-channel call
+    instead of one call per cleaner. The results are identical to calling push on each
+    cleaner in turn.
+
+    Parameters:
+    - cleaners: List of StreamingCleaner instances.
+    - ppg_chunks: Next PPG chunk of each cleaner (list of NumPy arrays).
+    - abp_chunks: Next ABP chunk of each cleaner (list of NumPy arrays).
+
+    Returns:
+    - List of (cleaned_ppg, cleaned_abp) tuples, one per cleaner, as returned by push.
+    """
+    if not len(cleaners) == len(ppg_chunks) == len(abp_chunks):
+        raise ValueError("One PPG and one ABP chunk is needed per cleaner.")
+
+    chunks = [cleaner._hold_invalid_values(ppg, abp) for cleaner, ppg, abp in zip(cleaners, ppg_chunks, abp_chunks)]
+    results = [None] * len(cleaners)
+    groups = {}
+    for index, (cleaner, chunk) in enumerate(zip(cleaners, chunks)):
+        if chunk.shape[1] == 0:
+            results[index] = cleaner._split(chunk)
+            continue
+        cleaner._initialize_filters(chunk)
+        key = (cleaner._settings, chunk.shape[1], cleaner._history.shape[1], cleaner._pending.shape[1])
+        groups.setdefault(key, []).append(index)
+
+    for members in groups.values():
+        group = [cleaners[index] for index in members]
+        first = group[0]
+        stacked = np.vstack([chunks[index] for index in members])
+
+        # The filter states stack along the channel axis just like the signals
+        stacked, baseline_zi = sosfilt(first._baseline_sos, stacked, axis=-1,
+                                       zi=np.concatenate([cleaner._baseline_zi for cleaner in group], axis=1))
+        stacked, bandpass_zi = sosfilt(first._bandpass_sos, stacked, axis=-1,
+                                       zi=np.concatenate([cleaner._bandpass_zi for cleaner in group], axis=1))
+        filtered, history, pending = _hampel_step(
+            np.vstack([cleaner._history for cleaner in group]),
+            np.vstack([cleaner._pending for cleaner in group]),
+            stacked, first.hampel_window_size, first.hampel_threshold
+        )
+
+        for position, (index, cleaner) in enumerate(zip(members, group)):
+            rows = slice(2 * position, 2 * position + 2)
+            cleaner._baseline_zi = baseline_zi[:, rows]
+            cleaner._bandpass_zi = bandpass_zi[:, rows]
+            cleaner._history = history[rows]
+            cleaner._pending = pending[rows]
+            results[index] = cleaner._split(filtered[rows])
+
+    return results
+
+
+def _hampel_step(history, pending, chunk, window_size, threshold):
+    """
+    Hampel-filter the samples that have window_size successors, for any number of rows.
+
+    Returns the filtered samples and the new history and pending buffers.
+    """
+    w = window_size
+    data = np.hstack([history, pending, chunk])
+    h = history.shape[1]
+    # Samples with w successors available can be emitted
+    emit_end = max(data.shape[1] - w, h)
+
+    filtered = hampel_filter(data, w, threshold, axis=-1)
+
+    # The Hampel windows use the unfiltered samples, so keep those as context
+    return filtered[:, h:emit_end], data[:, max(emit_end - w, 0):emit_end], data[:, emit_end:]
+
+
+class StreamingResampler:
+    """
+    Resample a signal chunk by chunk with the polyphase filter of resample_signal.
+
+    Each output sample is the dot product of the input samples under the filter with the
+    taps of its polyphase branch, so only the taps that meet real input samples are
+    evaluated. Concatenating the outputs of push() and flush() gives the same samples as
+    resample_signal on the whole record. An output sample is emitted once the input
+    covering its filter support has arrived, i.e. with a delay of about
+    10 * max(up, down) / up input samples.
+
+    Parameters:
+    - original_fs: Original sampling frequency (Hz).
+    - target_fs: Target sampling frequency (Hz).
+    - max_denominator: Largest allowed up/down factor when approximating the rate ratio (default: 1000).
+    """
+
+    def __init__(self, original_fs, target_fs, max_denominator=1000):
+        self.up, self.down = resampling_factors(original_fs, target_fs, max_denominator)
+        self._taps = polyphase_filter(self.up, self.down) * self.up
+        self._half_len = (len(self._taps) - 1) // 2
+        # Number of input samples under the filter for any output sample
+        self._n_taps = 2 * self._half_len // self.up + 1
+        self.reset()
+
+    def reset(self):
+        """
+        Forget all buffered samples, e.g. before starting a new record.
+        """
+        self._buffer = None
+        self._buffer_start = 0
+        self._n_in = 0
+        self._n_out = 0
+
+    def push(self, chunk):
+        """
+        Resample the next chunk of samples.
+
+        Parameters:
+        - chunk: Next input samples (NumPy array), time on the last axis.
+
+        Returns:
+        - Resampled samples that are complete so far (NumPy array).
+        """
+        chunk = np.asarray(chunk, dtype=float)
+        if self._buffer is None:
+            self._buffer = np.empty(chunk.shape[:-1] + (0,))
+        self._buffer = np.concatenate([self._buffer, chunk], axis=-1)
+        self._n_in += chunk.shape[-1]
+
+        # Output m is complete once input sample floor((m * down + half_len) / up) has arrived
+        n_ready = -(-(self._n_in * self.up - self._half_len) // self.down)
+        return self._emit(max(n_ready, self._n_out))
+
+    def flush(self):
+        """
+        Emit the remaining output samples, treating the signal as zero after its end
+        (as resample_poly does).
+
+        Returns:
+        - Remaining resampled samples (NumPy array).
+        """
+        if self._buffer is None:
+            return np.empty(0)
+        n_total = -(-self._n_in * self.up // self.down)
+        return self._emit(n_total)
+
+    def _emit(self, stop):
+        m = np.arange(self._n_out, stop)
+        # First input sample under the filter for each output, and the tap hitting each input
+        k = -(-(m * self.down - self._half_len) // self.up)
+        k = k[:, None] + np.arange(self._n_taps)[None, :]
+        tap = m[:, None] * self.down - k * self.up + self._half_len
+
+        in_range = (tap >= 0) & (tap < len(self._taps)) & (k >= 0) & (k < self._n_in)
+        weights = np.where(in_range, self._taps[np.clip(tap, 0, len(self._taps) - 1)], 0.0)
+        position = np.clip(k - self._buffer_start, 0, max(self._buffer.shape[-1] - 1, 0))
+        samples = self._buffer[..., position] if self._buffer.shape[-1] else np.zeros(
+            self._buffer.shape[:-1] + position.shape)
+        output = np.einsum('...mt,mt->...m', samples, weights)
+
+        self._n_out = stop
+        # Drop the input no longer under the filter of any future output
+        keep_from = max(-(-(stop * self.down - self._half_len) // self.up), self._buffer_start)
+        self._buffer = self._buffer[..., keep_from - self._buffer_start:]
+        self._buffer_start = keep_from
+        return output
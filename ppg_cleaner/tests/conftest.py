@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+
+def _synthetic_ppg_abp(seconds, fs=125, seed=0, ppg_noise=0.05, abp_noise=1.0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * fs)) / fs
+    ppg = np.sin(2 * np.pi * 1.2 * t) + ppg_noise * rng.standard_normal(len(t))
+    abp = 90 + 20 * np.sin(2 * np.pi * 1.2 * t - 0.4) + abp_noise * rng.standard_normal(len(t))
+    return ppg, abp
+
+
+@pytest.fixture
+def make_ppg_abp():
+    """
+    Factory of synthetic PPG and ABP records with a 72 bpm pulse, the ABP lagging the PPG.
+
+    Call it as make_ppg_abp(seconds, fs=125, seed=0, ppg_noise=0.05, abp_noise=1.0); it
+    returns the (ppg, abp) pair.
+    """
+    return _synthetic_ppg_abp
@@ -0,0 +1,136 @@
+import numpy as np
+from scipy.signal import correlate, find_peaks
+import pytest
+from ppg_cleaner import (find_peaks_and_max_correlation, rank_peak_correlation_windows, estimate_alignment_lags,
+                         apply_alignment_lag, extract_correlated_windows)
+from ppg_cleaner.alignment import _batch_valid_correlation_max
+
+
+def _pulse_signals(fs=125, minutes=10, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(minutes * 60 * fs)) / fs
+    heart_rate = 1.2 + 0.1 * np.sin(2 * np.pi * t / 90)
+    phase = 2 * np.pi * np.cumsum(heart_rate) / fs
+    amplitude = 1 + 0.3 * np.sin(2 * np.pi * t / 45)
+    ppg = amplitude * np.sin(phase) + 0.05 * rng.standard_normal(len(t))
+    abp = 90 + 20 * amplitude * np.sin(phase - 0.4) + rng.standard_normal(len(t))
+    return ppg, abp
+
+
+def test_batch_correlation_matches_scipy():
+    rng = np.random.default_rng(1)
+    counts_a = np.array([5, 8, 3, 6])
+    counts_b = np.array([7, 4, 3, 6])
+    a = np.zeros((4, 8))
+    b = np.zeros((4, 8))
+    expected = []
+    for i, (na, nb) in enumerate(zip(counts_a, counts_b)):
+        a[i, :na] = rng.standard_normal(na)
+        b[i, :nb] = rng.standard_normal(nb)
+        expected.append(np.max(correlate(a[i, :na], b[i, :nb], mode="valid")))
+
+    result = _batch_valid_correlation_max(a, counts_a, b, counts_b)
+    np.testing.assert_allclose(result, expected)
+
+
+def test_single_pass_matches_per_window():
+    ppg, abp = _pulse_signals()
+    fs = 125
+
+    best_ppg, best_abp, max_corr = find_peaks_and_max_correlation(ppg, abp, fs)
+    fast_ppg, fast_abp, fast_corr = find_peaks_and_max_correlation(ppg, abp, fs, single_pass=True)
+
+    np.testing.assert_array_equal(fast_ppg, best_ppg)
+    np.testing.assert_array_equal(fast_abp, best_abp)
+    # Peaks on window edges are only found by the whole-signal pass
+    np.testing.assert_allclose(fast_corr, max_corr, rtol=0.05)
+
+
+def test_fixed_distance_uses_find_peaks():
+    ppg, abp = _pulse_signals(minutes=2)
+    ppg_peaks, _ = find_peaks(ppg, distance=50)
+    abp_peaks, _ = find_peaks(abp, distance=50)
+    expected = np.max(correlate(ppg[ppg_peaks], abp[abp_peaks], mode="valid"))
+
+    _, _, max_corr = find_peaks_and_max_correlation(ppg, abp, 125)
+    assert max_corr == expected
+
+    # Without a distance the adaptive detector is used
+    _, _, adaptive_corr = find_peaks_and_max_correlation(ppg, abp, 125, peak_distance=None)
+    assert np.isfinite(adaptive_corr)
+
+
+def test_rank_windows_sorted():
+    ppg, abp = _pulse_signals()
+    window_starts, correlations = rank_peak_correlation_windows(ppg, abp, 125)
+
+    assert len(window_starts) == 9
+    assert np.all(np.diff(correlations) <= 0)
+    assert np.all(window_starts % (60 * 125) == 0)
+
+
+def test_rank_windows_short_signal():
+    window_starts, correlations = rank_peak_correlation_windows(np.zeros(100), np.zeros(100), 125)
+    assert len(window_starts) == 0 and len(correlations) == 0
+
+
+def test_estimate_alignment_lags_recovers_delay():
+    fs = 125
+    source, _ = _pulse_signals(fs=fs, minutes=10)
+    # Delay the PPG by 0.24 s relative to the ABP
+    delay = 30
+    abp = 90 + 20 * source
+    ppg = np.concatenate([np.zeros(delay), source[:-delay]])
+
+    starts, lags, correlations = estimate_alignment_lags(ppg, abp, fs, min_lag=0.0, max_lag=0.5)
+    assert len(starts) == 9
+    np.testing.assert_array_equal(lags, delay)
+    assert np.all(correlations > 0.9)
+
+    aligned_ppg, aligned_abp = apply_alignment_lag(ppg[starts[3]:starts[3] + 2 * 60 * fs],
+                                                   abp[starts[3]:starts[3] + 2 * 60 * fs], lags[3])
+    assert len(aligned_ppg) == len(aligned_abp) == 2 * 60 * fs - delay
+    assert np.corrcoef(aligned_ppg, aligned_abp)[0, 1] > 0.9
+
+
+def test_estimate_alignment_lags_batches_and_negative_range():
+    fs = 125
+    ppg, _ = _pulse_signals(fs=fs, minutes=10, seed=3)
+    abp = 90 + 20 * np.concatenate([np.zeros(12), ppg[:-12]])
+
+    starts, lags, correlations = estimate_alignment_lags(ppg, abp, fs, min_lag=-0.3, max_lag=0.3)
+    _, batched_lags, batched_correlations = estimate_alignment_lags(ppg, abp, fs, min_lag=-0.3, max_lag=0.3,
+                                                                    batch_size=2)
+    np.testing.assert_array_equal(lags, -12)
+    np.testing.assert_array_equal(batched_lags, lags)
+    np.testing.assert_allclose(batched_correlations, correlations)
+
+    # Matches a direct evaluation of the normalized correlation at the chosen lag
+    n = 2 * 60 * fs
+    p = ppg[starts[0]:starts[0] + n]
+    a = abp[starts[0]:starts[0] + n]
+    p = (p - p.mean()) / p.std()
+    a = (a - a.mean()) / a.std()
+    expected = np.dot(p[:n - 12], a[12:]) / (n - 12)
+    assert correlations[0] == pytest.approx(expected)
+
+
+def test_extract_correlated_windows_threshold_and_top_k():
+    ppg, abp = _pulse_signals()
+    ranked_starts, ranked_correlations = rank_peak_correlation_windows(ppg, abp, 125)
+    threshold = np.median(ranked_correlations)
+
+    ppg_windows, abp_windows, starts, correlations = extract_correlated_windows(
+        ppg, abp, 125, min_correlation=threshold
+    )
+    expected = ranked_correlations >= threshold
+    np.testing.assert_array_equal(starts, np.sort(ranked_starts[expected]))
+    assert np.all(correlations >= threshold) and np.all(np.diff(starts) > 0)
+    for ppg_window, abp_window, start in zip(ppg_windows, abp_windows, starts):
+        assert ppg_window.base is not None and np.shares_memory(ppg_window, ppg)
+        np.testing.assert_array_equal(ppg_window, ppg[start:start + 2 * 60 * 125])
+        np.testing.assert_array_equal(abp_window, abp[start:start + 2 * 60 * 125])
+
+    _, _, starts, correlations = extract_correlated_windows(ppg, abp, 125, top_k=3)
+    np.testing.assert_array_equal(starts, np.sort(ranked_starts[:3]))
+    assert set(correlations) == set(ranked_correlations[:3])
@@ -0,0 +1,138 @@
+import numpy as np
+import pytest
+from scipy.signal import butter, sosfiltfilt
+from ppg_cleaner import artifact_removal
+from ppg_cleaner import (hampel_filter, artifact_detection, motion_artifact_removal, mask_artifact_intervals,
+                         artifact_free_segments)
+
+
+def _hampel_filter_loop(signal, window_size, threshold=3):
+    # Reference per-sample implementation the vectorized filter must reproduce
+    signal_filtered = signal.copy()
+    for i in range(window_size, len(signal) - window_size):
+        window = signal[i - window_size:i + window_size + 1]
+        median = np.median(window)
+        mad = np.median(np.abs(window - median))
+        if mad == 0:
+            continue
+        if abs(signal[i] - median) / mad > threshold:
+            signal_filtered[i] = median
+    return signal_filtered
+
+
+def test_hampel_filter_matches_loop():
+    rng = np.random.default_rng(0)
+    signal = np.sin(np.linspace(0, 40 * np.pi, 5000)) + 0.05 * rng.standard_normal(5000)
+    signal[rng.integers(0, 5000, 50)] += 5
+    signal[1000:1030] = 0.0  # flat stretch gives zero MAD
+
+    expected = _hampel_filter_loop(signal, 10, 3)
+    # A small chunk size forces several chunk boundaries
+    filtered = hampel_filter(signal, 10, 3, chunk_size=777)
+    np.testing.assert_array_equal(filtered, expected)
+
+
+def test_hampel_filter_short_signal():
+    signal = np.array([1.0, 100.0, 1.0])
+    np.testing.assert_array_equal(hampel_filter(signal, 5), signal)
+
+
+def test_hampel_filter_multichannel():
+    rng = np.random.default_rng(2)
+    signals = rng.standard_normal((3, 2000))
+    signals[:, rng.integers(0, 2000, 30)] += 6
+
+    filtered = hampel_filter(signals, 8, 3, chunk_size=500)
+    for channel, expected in zip(filtered, signals):
+        np.testing.assert_array_equal(channel, hampel_filter(expected, 8, 3))
+    np.testing.assert_array_equal(hampel_filter(signals.T, 8, 3, axis=0), filtered.T)
+
+
+def _motion_recording(fs=125, minutes=10, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(minutes * 60 * fs)) / fs
+    cardiac = np.sin(2 * np.pi * 1.2 * t)
+    # Slow, large motion seen by both the pleth lead and the accelerometer
+    motion = 40 * sosfiltfilt(butter(4, 0.3, fs=fs, output="sos"), rng.standard_normal(len(t)))
+    accelerometer = motion + 0.05 * rng.standard_normal(len(t))
+    return np.column_stack([cardiac + motion, accelerometer]), cardiac
+
+
+def test_motion_artifact_removal_windows():
+    signal, cardiac = _motion_recording()
+    assert np.corrcoef(signal[:, 0], cardiac)[0, 1] < 0.5
+
+    whole = motion_artifact_removal(signal, 125)
+    assert np.corrcoef(whole, cardiac)[0, 1] > 0.95
+
+    windowed = motion_artifact_removal(signal, 125, window_duration=60)
+    assert windowed.shape == cardiac.shape
+    assert np.corrcoef(windowed, cardiac)[0, 1] > 0.8
+    np.testing.assert_array_equal(motion_artifact_removal(signal.T, 125, window_duration=60, axis=-1), windowed)
+
+
+def test_motion_artifact_removal_parallel_groups():
+    signal, cardiac = _motion_recording(minutes=6)
+    cleaned = motion_artifact_removal(signal, 125, window_duration=60, max_workers=2)
+    assert np.all(np.isfinite(cleaned))
+    assert np.corrcoef(cleaned, cardiac)[0, 1] > 0.8
+    np.testing.assert_allclose(motion_artifact_removal(signal.T, 125, window_duration=60, max_workers=2, axis=-1),
+                               cleaned)
+
+
+def test_motion_artifact_removal_serial_by_default(monkeypatch):
+    signal, _ = _motion_recording(minutes=3)
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError("a process pool was started")
+
+    monkeypatch.setattr(artifact_removal, "ProcessPoolExecutor", no_pool)
+    assert len(motion_artifact_removal(signal, 125, window_duration=30)) == len(signal)
+
+    # A single channel cannot be unmixed and comes back unchanged
+    np.testing.assert_allclose(motion_artifact_removal(signal[:, 0], 125), signal[:, 0], atol=1e-8)
+    with pytest.raises(ValueError):
+        motion_artifact_removal(np.zeros((2, 2, 1000)), 125)
+
+
+def test_artifact_detection_intervals():
+    signal = np.zeros(1000)
+    signal[100] = 1.0           # spike: jumps at diffs 99 and 100
+    signal[105:110] = 0.5       # step up and down, 3 samples after the spike
+    signal[600] = 2.0           # isolated larger spike
+
+    indices = artifact_detection(signal, 100, threshold=0.1)
+    np.testing.assert_array_equal(indices, [99, 100, 104, 109, 599, 600])
+
+    intervals, severity = artifact_detection(signal, 100, threshold=0.1, return_intervals=True)
+    np.testing.assert_array_equal(intervals, [[99, 102], [104, 106], [109, 111], [599, 602]])
+    np.testing.assert_allclose(severity, [10, 5, 5, 20])
+
+    # A 0.05 s merge gap joins the first three, a 0.04 s minimum duration drops the last spike
+    intervals, severity = artifact_detection(signal, 100, threshold=0.1, return_intervals=True,
+                                             merge_gap=0.05, min_duration=0.04)
+    np.testing.assert_array_equal(intervals, [[99, 111]])
+    np.testing.assert_allclose(severity, [10])
+
+
+def test_artifact_detection_intervals_multichannel():
+    signal = np.zeros((2, 500))
+    signal[0, 50] = 1.0
+    signal[1, 300] = -1.0
+    intervals, _ = artifact_detection(signal, 100, return_intervals=True)
+    np.testing.assert_array_equal(intervals, [[49, 52], [299, 302]])
+
+
+def test_artifact_interval_masks():
+    signal = np.arange(20.0).reshape(2, 10)
+    intervals = np.array([[2, 4], [7, 8]])
+
+    masked = mask_artifact_intervals(signal, intervals)
+    assert np.all(np.isnan(masked[:, [2, 3, 7]]))
+    assert np.isfinite(masked).sum() == 14
+    assert np.isfinite(signal).all()
+
+    segments, clean = artifact_free_segments(signal, intervals, min_length=2)
+    np.testing.assert_array_equal(clean, [[0, 2], [4, 7], [8, 10]])
+    np.testing.assert_array_equal(segments[1], signal[:, 4:7])
+    assert np.shares_memory(segments[1], signal)
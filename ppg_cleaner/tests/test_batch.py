@@ -0,0 +1,47 @@
+import numpy as np
+from ppg_cleaner import batch_pipeline
+from ppg_cleaner.combined_pipeline import combined_pipeline, combined_pipeline_windows
+
+
+def _load_record(path):
+    with np.load(path) as data:
+        return data["ppg"], data["abp"], 125
+
+
+def test_batch_matches_serial_pipeline(make_ppg_abp):
+    records = [make_ppg_abp(3 * 60, seed=seed) for seed in range(5)]
+    results = sorted(batch_pipeline(records, fs=125, max_workers=2, chunk_size=2), key=lambda r: r.index)
+
+    assert [r.index for r in results] == list(range(5))
+    for (ppg, abp), result in zip(records, results):
+        expected_ppg, expected_abp = combined_pipeline(ppg, abp, 125)
+        assert result.error is None
+        np.testing.assert_array_equal(result.cleaned_ppg, expected_ppg)
+        np.testing.assert_array_equal(result.cleaned_abp, expected_abp)
+
+
+def test_failed_record_is_reported(tmp_path, make_ppg_abp):
+    paths = [tmp_path / f"record{i}.npz" for i in range(3)]
+    for seed, path in enumerate(paths):
+        ppg, abp = make_ppg_abp(3 * 60, seed=seed)
+        np.savez(path, ppg=ppg, abp=abp)
+    paths[1].unlink()
+    results = {r.index: r for r in batch_pipeline(paths, loader=_load_record, max_workers=2)}
+
+    assert len(results) == 3
+    assert "FileNotFoundError" in results[1].error
+    assert results[1].cleaned_ppg is None
+    assert results[0].error is None and results[2].error is None
+
+
+def test_batch_extracts_windows(make_ppg_abp):
+    records = [make_ppg_abp(5 * 60, seed=seed) for seed in range(3)]
+    results = sorted(batch_pipeline(records, fs=125, max_workers=2, windows=True, top_k=2), key=lambda r: r.index)
+
+    for (ppg, abp), result in zip(records, results):
+        ppg_windows, abp_windows, starts, correlations = combined_pipeline_windows(ppg, abp, 125, top_k=2)
+        assert result.error is None and len(result.cleaned_ppg) == 2
+        np.testing.assert_array_equal(result.window_starts, starts)
+        np.testing.assert_array_equal(result.correlations, correlations)
+        for got, expected in zip(result.cleaned_ppg + result.cleaned_abp, ppg_windows + abp_windows):
+            np.testing.assert_array_equal(got, expected)
@@ -0,0 +1,51 @@
+import numpy as np
+from scipy.stats import skew
+from ppg_cleaner import segment_beats, beat_quality
+
+
+def _pulses(fs=125, seconds=60, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * fs)) / fs
+    phase = (1.2 * t) % 1.0
+    # Fast systolic upstroke followed by an exponential decay down to the next foot
+    pulse = np.where(phase < 0.15, phase / 0.15, np.exp(-3 * (phase - 0.15)))
+    return pulse + 0.01 * rng.standard_normal(len(t))
+
+
+def test_segment_beats_padded_and_ragged():
+    signal = _pulses()
+    beats, lengths, starts = segment_beats(signal, 125, peak_distance=80)
+
+    assert len(beats) >= 65
+    # The last beat may end on a partial pulse at the edge of the record
+    assert np.all(np.abs(lengths[:-1] - 125 / 1.2) <= 3)
+    for beat, length, start in zip(beats, lengths, starts):
+        np.testing.assert_array_equal(beat[:length], signal[start:start + length])
+        assert np.all(np.isnan(beat[length:]))
+
+    values, offsets, ragged_starts = segment_beats(signal, 125, peak_distance=80, ragged=True)
+    np.testing.assert_array_equal(ragged_starts, starts)
+    np.testing.assert_array_equal(np.diff(offsets), lengths)
+    np.testing.assert_array_equal(values[offsets[3]:offsets[4]], signal[starts[3]:starts[3] + lengths[3]])
+
+
+def test_beat_quality_flags_bad_beat():
+    signal = _pulses()
+    beats, lengths, starts = segment_beats(signal, 125, peak_distance=80)
+    # Replace one beat with noise
+    bad = 10
+    beats[bad, :lengths[bad]] = np.random.default_rng(1).standard_normal(lengths[bad])
+
+    quality = beat_quality(beats, lengths)
+    correlation = quality["template_correlation"]
+    assert np.all(np.delete(correlation, bad) > 0.95)
+    assert correlation[bad] < 0.5
+    assert quality["amplitude_ratio"][bad] > 2
+    assert quality["skewness"].shape == (len(lengths),)
+
+
+def test_beat_quality_matches_scipy_skewness():
+    beats, lengths, _ = segment_beats(_pulses(seconds=10), 125, peak_distance=80)
+    quality = beat_quality(beats, lengths)
+    expected = [skew(beat[:length]) for beat, length in zip(beats, lengths)]
+    np.testing.assert_allclose(quality["skewness"], expected)
@@ -0,0 +1,66 @@
+import os
+import numpy as np
+from ppg_cleaner import ResultCache, Pipeline
+from ppg_cleaner.combined_pipeline import combined_pipeline
+
+
+def test_combined_pipeline_cache_hit(tmp_path, make_ppg_abp):
+    cache = ResultCache(tmp_path)
+    ppg, abp = make_ppg_abp(3 * 60)
+
+    first = combined_pipeline(ppg, abp, 125, cache=cache)
+    second = combined_pipeline(ppg, abp, 125, cache=cache)
+    assert (cache.hits, cache.misses) == (1, 1)
+    np.testing.assert_array_equal(first[0], second[0])
+    np.testing.assert_array_equal(first[1], second[1])
+
+    # Any parameter or input change is a different entry
+    combined_pipeline(ppg, abp, 125, hampel_threshold=4, cache=cache)
+    ppg[0] += 1e-9
+    combined_pipeline(ppg, abp, 125, cache=cache)
+    assert cache.misses == 3
+
+    Pipeline.default().run(ppg, abp, 125, cache=cache)
+    Pipeline.default().run(ppg, abp, 125, cache=cache)
+    assert cache.hits == 2
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(tmp_path, max_bytes=10_000)
+    values = np.zeros(500)  # about 4 kB per entry
+
+    cache.put("a", cleaned_ppg=values)
+    cache.put("b", cleaned_ppg=values)
+    assert cache.get("a") is not None  # "a" becomes the most recently used entry
+    cache.put("c", cleaned_ppg=values)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.size_bytes() <= 10_000
+
+
+def test_cache_tolerates_concurrently_removed_entries(tmp_path, monkeypatch):
+    cache = ResultCache(tmp_path)
+    values = np.arange(10.0)
+    cache.put("a", cleaned_ppg=values)
+
+    # Another process clears the entry between reading it and marking it as used
+    utime = os.utime
+
+    def remove_then_utime(path, *args, **kwargs):
+        if os.path.exists(path):
+            os.unlink(path)
+        return utime(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, "utime", remove_then_utime)
+    np.testing.assert_array_equal(cache.get("a")["cleaned_ppg"], values)
+    assert cache.get("a") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Storing still works, and so do eviction and clearing
+    cache.put("b", cleaned_ppg=values)
+    monkeypatch.undo()
+    assert cache.size_bytes() == 0
+    cache.put("c", cleaned_ppg=values)
+    cache.clear()
+    assert cache.get("c") is None
@@ -8,7 +8,8 @@ from ppg_cleaner.preprocessing import remove_invalid_values, baseline_wander_rem
 from ppg_cleaner.filtering import bandpass_filter
 from ppg_cleaner.artifact_removal import hampel_filter
 from ppg_cleaner.alignment import find_peaks_and_max_correlation
-from ppg_cleaner.combined_pipeline import combined_pipeline
+from ppg_cleaner.combined_pipeline import combined_pipeline, combined_pipeline_windows
+from ppg_cleaner.cache import ResultCache
 import matplotlib.pyplot as plt
 
 def test_combined_pipeline():
@@ -95,6 +96,56 @@ def test_combined_pipeline():
     except Exception as e:
         print(f"Error in pipeline execution: {e}")
 
+
+def test_combined_pipeline_interpolate_mode(make_ppg_abp):
+    fs = 125
+    ppg, abp = make_ppg_abp(8 * 60, fs)
+    ppg[1000:1050] = np.nan
+    abp[int(3.5 * 60 * fs):int(4 * 60 * fs)] = 0.0
+
+    cleaned_ppg, cleaned_abp = combined_pipeline(ppg, abp, fs, invalid_handling="interpolate")
+
+    assert len(cleaned_ppg) == 2 * 60 * fs
+    assert np.all(np.isfinite(cleaned_ppg)) and np.all(np.isfinite(cleaned_abp))
+
+
+def test_combined_pipeline_float32(make_ppg_abp):
+    # 200 and 215 Hz are just above FLOAT32_MIN_POLE_MARGIN for the 0.5-8 Hz bandpass, 240 Hz is below it
+    for fs in (125, 200, 215, 240):
+        ppg, abp = make_ppg_abp(6 * 60, fs, seed=1)
+        ppg[500:520] = np.nan
+
+        expected_ppg, expected_abp = combined_pipeline(ppg, abp, fs)
+        cleaned_ppg, cleaned_abp = combined_pipeline(ppg, abp, fs, dtype=np.float32)
+
+        assert cleaned_ppg.dtype == cleaned_abp.dtype == np.float32
+        np.testing.assert_allclose(cleaned_ppg, expected_ppg, atol=3e-4 * np.std(expected_ppg))
+        np.testing.assert_allclose(cleaned_abp, expected_abp, atol=3e-4 * np.std(expected_abp))
+
+
+def test_combined_pipeline_windows_from_clean_runs(tmp_path, make_ppg_abp):
+    fs = 125
+    ppg, abp = make_ppg_abp(8 * 60, fs, seed=2)
+    ppg[int(2.5 * 60 * fs):int(5.5 * 60 * fs)] = 0.0
+
+    ppg_windows, abp_windows, starts, correlations = combined_pipeline_windows(ppg, abp, fs, prescreen=True)
+    # Each clean run, [0, 2.5) and [5.5, 8) minutes, holds one two-minute window
+    np.testing.assert_array_equal(starts, [0, 5.5 * 60 * fs])
+    assert len(correlations) == len(ppg_windows) == len(abp_windows) == 2
+    assert ppg_windows[0].base is ppg_windows[1].base
+
+    best_ppg, _ = combined_pipeline(ppg, abp, fs, prescreen=True)
+    top_ppg, _, _, _ = combined_pipeline_windows(ppg, abp, fs, top_k=1, prescreen=True)
+    assert len(top_ppg) == 1 and len(top_ppg[0]) == len(best_ppg)
+
+    cache = ResultCache(tmp_path)
+    first = combined_pipeline_windows(ppg, abp, fs, top_k=2, prescreen=True, cache=cache)
+    second = combined_pipeline_windows(ppg, abp, fs, top_k=2, prescreen=True, cache=cache)
+    assert cache.hits == 1
+    for a, b in zip(first, second):
+        np.testing.assert_array_equal(np.asarray(a), np.asarray(b))
+
+
 # Run the test
 if __name__ == "__main__":
-    test_combined_pipeline()
\ No newline at end of file
+    test_combined_pipeline()
@@ -0,0 +1,72 @@
+import numpy as np
+from scipy.signal import butter, filtfilt
+from ppg_cleaner import bandpass_filter, notch_filter, highpass_filter
+from ppg_cleaner.filtering import (design_filter, filter_design_cache_info, clear_filter_design_cache,
+                                   FLOAT32_MIN_POLE_MARGIN, _pole_margin)
+
+
+def test_design_cache_hits():
+    clear_filter_design_cache()
+    signal = np.random.default_rng(0).standard_normal(2000)
+
+    bandpass_filter(signal, 125, 0.5, 8.0)
+    bandpass_filter(signal, 125, 0.5, 8.0)
+    notch_filter(signal, 125, 50)
+
+    info = filter_design_cache_info()
+    assert info.misses == 2
+    assert info.hits == 1
+
+
+def test_design_filter_returns_independent_copies():
+    sos = design_filter('band', 125, [0.5, 8.0])
+    sos[:] = 0
+    assert np.any(design_filter('band', 125, (0.5, 8.0)) != 0)
+
+
+def test_bandpass_matches_transfer_function_design():
+    fs = 125
+    signal = np.random.default_rng(1).standard_normal(5000)
+    b, a = butter(4, [0.5 / (0.5 * fs), 8.0 / (0.5 * fs)], btype='band')
+    np.testing.assert_allclose(bandpass_filter(signal, fs), filtfilt(b, a, signal), atol=1e-5)
+
+
+def test_filters_process_channels_together():
+    signals = np.random.default_rng(2).standard_normal((3, 3000))
+    filtered = bandpass_filter(signals, 125, 0.5, 8.0, axis=-1)
+    for channel, signal in zip(filtered, signals):
+        np.testing.assert_allclose(channel, bandpass_filter(signal, 125, 0.5, 8.0), atol=1e-12)
+
+
+def test_float32_signals_stay_float32():
+    rng = np.random.default_rng(0)
+    t = np.arange(60 * 125) / 125
+    signal = np.sin(2 * np.pi * 1.2 * t) + 0.3 * np.sin(2 * np.pi * 0.1 * t) + 0.1 * rng.standard_normal(len(t))
+
+    expected = bandpass_filter(signal, 125)
+    filtered = bandpass_filter(signal.astype(np.float32), 125)
+    assert filtered.dtype == np.float32
+    np.testing.assert_allclose(filtered, expected, atol=3e-4 * np.std(expected))
+
+    # A very low cutoff is filtered in float64 internally and still returned as float32
+    expected = highpass_filter(signal, 125, 0.05)
+    filtered = highpass_filter(signal.astype(np.float32), 125, 0.05)
+    assert filtered.dtype == np.float32
+    np.testing.assert_allclose(filtered, expected, atol=1e-6 * np.max(np.abs(expected)))
+
+    assert bandpass_filter(signal.tolist(), 125).dtype == np.float64
+
+
+def test_float32_error_bound_near_pole_margin():
+    # 205 and 215 Hz are just above the margin and filtered in float32, 220 and 240 Hz fall back to float64
+    for fs, single_precision in ((205, True), (215, True), (220, False), (240, False)):
+        assert (_pole_margin(design_filter('band', fs, (0.5, 8.0))) >= FLOAT32_MIN_POLE_MARGIN) == single_precision
+        for seed in range(3):
+            rng = np.random.default_rng(seed)
+            t = np.arange(10 * 60 * fs) / fs
+            signal = np.sin(2 * np.pi * 1.2 * t) + 0.3 * np.sin(2 * np.pi * 0.1 * t) + 0.1 * rng.standard_normal(len(t))
+            # Drift and a large offset, as in raw ABP, grow the error with the input's magnitude
+            for signal in (signal, signal + np.cumsum(0.01 * rng.standard_normal(len(t))), signal + 90):
+                expected = bandpass_filter(signal, fs)
+                filtered = bandpass_filter(signal.astype(np.float32), fs)
+                np.testing.assert_allclose(filtered, expected, atol=2e-4 * np.max(np.abs(signal)))
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+import wfdb
+from ppg_cleaner import load_record, load_ppg_abp
+
+
+@pytest.fixture
+def write_record(make_ppg_abp):
+    def write(directory, name, n_samples=5000, fmt="16", seed=0):
+        ppg, abp = make_ppg_abp(n_samples / 125, seed=seed, ppg_noise=0.1)
+        ecg = np.random.default_rng(seed).standard_normal(n_samples)
+        signals = np.column_stack([ppg, abp, ecg])
+        signals[100, 1] = np.nan
+        wfdb.wrsamp(name, fs=125, units=["NU", "mmHg", "mV"], sig_name=["PLETH", "ABP", "II"], p_signal=signals,
+                    fmt=[fmt] * 3, write_dir=str(directory))
+    return write
+
+
+@pytest.mark.parametrize("fmt", ["16", "80", "212"])
+def test_load_record_matches_rdsamp(tmp_path, fmt, write_record):
+    write_record(tmp_path, "rec", fmt=fmt)
+    expected, fields = wfdb.rdsamp(str(tmp_path / "rec"), channel_names=["ABP", "PLETH"])
+
+    signals, loaded = load_record("rec", ["ABP", "PLETH"], mirror_dir=str(tmp_path))
+    np.testing.assert_allclose(signals, expected, equal_nan=True)
+    assert np.isnan(signals[100, 0])
+    assert loaded["sig_name"] == ["ABP", "PLETH"]
+    assert loaded["fs"] == 125
+
+    # Sample ranges and channel indices, including odd offsets into packed formats
+    expected, _ = wfdb.rdsamp(str(tmp_path / "rec"), sampfrom=1001, sampto=2002, channels=[2, 0])
+    signals, _ = load_record(str(tmp_path / "rec"), [2, 0], sampfrom=1001, sampto=2002)
+    np.testing.assert_allclose(signals, expected)
+
+
+def test_load_ppg_abp_float32(tmp_path, write_record):
+    write_record(tmp_path, "rec")
+    ppg, abp, fs = load_ppg_abp("rec", mirror_dir=str(tmp_path), sampto=3000)
+    expected, _ = wfdb.rdsamp(str(tmp_path / "rec"), sampto=3000, channel_names=["PLETH", "ABP"])
+
+    assert ppg.dtype == abp.dtype == np.float32
+    assert fs == 125
+    np.testing.assert_allclose(ppg, expected[:, 0], rtol=1e-5, atol=1e-5)
+
+    with pytest.raises(ValueError):
+        load_ppg_abp("rec", mirror_dir=str(tmp_path), abp_name="ART")
+
+
+def test_load_multi_segment_record(tmp_path, write_record):
+    write_record(tmp_path, "rec_0001", n_samples=1000, seed=1)
+    write_record(tmp_path, "rec_0002", n_samples=1500, seed=2)
+    (tmp_path / "rec_layout.hea").write_text(
+        "rec_layout 3 125 0\n"
+        "~ 0 1/NU 16 0 0 0 0 PLETH\n"
+        "~ 0 1/mmHg 16 0 0 0 0 ABP\n"
+        "~ 0 1/mV 16 0 0 0 0 II\n"
+    )
+    (tmp_path / "rec.hea").write_text("rec/4 3 125 3000\nrec_layout 0\nrec_0001 1000\n~ 500\nrec_0002 1500\n")
+
+    signals, fields = load_record("rec", ["ABP", "PLETH"], sampfrom=800, sampto=2000, mirror_dir=str(tmp_path))
+    first, _ = wfdb.rdsamp(str(tmp_path / "rec_0001"), sampfrom=800, channel_names=["ABP", "PLETH"])
+    second, _ = wfdb.rdsamp(str(tmp_path / "rec_0002"), sampto=500, channel_names=["ABP", "PLETH"])
+
+    assert signals.shape == (1200, 2)
+    assert fields["sig_name"] == ["ABP", "PLETH"]
+    np.testing.assert_allclose(signals[:200], first)
+    assert np.all(np.isnan(signals[200:700]))
+    np.testing.assert_allclose(signals[700:], second)
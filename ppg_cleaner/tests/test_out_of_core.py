@@ -0,0 +1,37 @@
+import numpy as np
+from ppg_cleaner import combined_pipeline_out_of_core
+from ppg_cleaner.preprocessing import remove_invalid_values, remove_out_of_range_bp, baseline_wander_removal
+from ppg_cleaner.filtering import bandpass_filter
+from ppg_cleaner.artifact_removal import hampel_filter
+
+
+def test_out_of_core_matches_in_memory(tmp_path, make_ppg_abp):
+    fs = 125
+    ppg, abp = make_ppg_abp(20000 / fs, fs)
+    # Drift and spikes for the baseline and Hampel stages
+    ppg += 0.001 * np.arange(len(ppg)) / fs
+    ppg[np.random.default_rng(1).integers(0, len(ppg), 40)] += 5
+    ppg[500:520] = np.nan
+    abp[9000:9100] = 250
+
+    ppg_map = np.lib.format.open_memmap(tmp_path / "ppg.npy", mode="w+", dtype=np.float32, shape=ppg.shape)
+    abp_map = np.lib.format.open_memmap(tmp_path / "abp.npy", mode="w+", dtype=np.float32, shape=abp.shape)
+    ppg_map[:] = ppg
+    abp_map[:] = abp
+
+    cleaned = combined_pipeline_out_of_core(
+        np.load(tmp_path / "ppg.npy", mmap_mode="r"), np.load(tmp_path / "abp.npy", mmap_mode="r"),
+        fs, tmp_path / "cleaned.npy", block_size=1500
+    )
+
+    ppg_ref, abp_ref = remove_invalid_values(np.asarray(ppg_map, dtype=float), np.asarray(abp_map, dtype=float))
+    ppg_ref, abp_ref = remove_out_of_range_bp(ppg_ref, abp_ref)
+    expected = np.vstack([ppg_ref, abp_ref])
+    expected = baseline_wander_removal(expected, fs)
+    expected = bandpass_filter(expected, fs)
+    expected = hampel_filter(expected, 10, 3)
+
+    assert isinstance(cleaned, np.memmap)
+    assert cleaned.shape == expected.shape
+    np.testing.assert_allclose(cleaned, expected, atol=1e-8)
+    np.testing.assert_allclose(np.load(tmp_path / "cleaned.npy"), expected, atol=1e-8)
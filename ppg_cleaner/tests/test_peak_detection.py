@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from scipy.signal import find_peaks
+from ppg_cleaner import (estimate_heart_rate, adaptive_peak_distance, detect_peaks, detect_feet,
+                         StreamingPeakDetector)
+
+
+def _pulses(fs=125, seconds=120, heart_rate=1.2, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * fs)) / fs
+    phase = 2 * np.pi * heart_rate * t
+    # Systolic peak plus a smaller dicrotic wave
+    signal = np.sin(phase) + 0.3 * np.sin(2 * phase + 1.0)
+    return signal + 0.02 * rng.standard_normal(len(t))
+
+
+def test_estimate_heart_rate_and_distance():
+    signal = _pulses(heart_rate=1.5)
+    assert abs(estimate_heart_rate(signal, 125) - 90) < 4
+    assert adaptive_peak_distance(signal, 125, fraction=0.5) == pytest.approx(125 / 1.5 * 0.5, abs=3)
+
+
+def test_detect_peaks_matches_find_peaks():
+    signal = _pulses()
+    expected, _ = find_peaks(signal, distance=60)
+    np.testing.assert_array_equal(detect_peaks(signal, distance=60), expected)
+    np.testing.assert_array_equal(detect_peaks(signal.astype(np.float32), distance=60), expected)
+
+    # Adaptive distance finds one peak per beat (find_peaks also keeps the maximum of a partial
+    # beat at the end of the record)
+    peaks = detect_peaks(signal, 125)
+    assert len(peaks) == pytest.approx(120 * 1.2, abs=1)
+    assert np.all(np.diff(peaks[:-1]) > 80)
+
+
+def test_detect_peaks_requires_fs_for_adaptive_distance():
+    with pytest.raises(ValueError):
+        detect_peaks(_pulses(), distance=None)
+
+
+def test_detect_feet_are_minima_between_peaks():
+    signal = _pulses()
+    peaks = detect_peaks(signal, 125)
+    feet = detect_feet(signal, peaks)
+
+    assert len(feet) == len(peaks) - 1
+    for left, right, foot in zip(peaks[:-1], peaks[1:], feet):
+        assert foot == left + np.argmin(signal[left:right])
+
+
+def test_streaming_peak_detector_matches_batch():
+    signal = _pulses()
+    chunks = np.array_split(signal, 97)
+    for distance in (60, 100):
+        expected = detect_peaks(signal, distance=distance)
+        detector = StreamingPeakDetector(125, distance=distance)
+        peaks = np.concatenate([detector.push(chunk) for chunk in chunks] + [detector.flush()])
+        np.testing.assert_array_equal(peaks, expected)
+
+    # Noise with many nearby local maxima and a NaN gap, pushed one sample at a time and in uneven chunks
+    noise = np.random.default_rng(1).standard_normal(3000)
+    noise[1200:1300] = np.nan
+    expected = detect_peaks(noise, distance=20)
+    detector = StreamingPeakDetector(125, distance=20)
+    peaks = np.concatenate([detector.push(sample) for sample in noise[:500, None]] +
+                           [detector.push(chunk) for chunk in np.array_split(noise[500:], 7)] + [detector.flush()])
+    np.testing.assert_array_equal(peaks, expected)
+
+    # Adaptive distance is estimated from the warm-up buffer
+    detector = StreamingPeakDetector(125, warmup=20)
+    peaks = np.concatenate([detector.push(chunk) for chunk in chunks] + [detector.flush()])
+    assert len(peaks) == pytest.approx(120 * 1.2, abs=1)
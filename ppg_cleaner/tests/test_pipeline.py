@@ -0,0 +1,71 @@
+import json
+
+import numpy as np
+import pytest
+from ppg_cleaner import Pipeline, Stage, PipelineProfiler
+from ppg_cleaner.combined_pipeline import combined_pipeline
+
+
+@pytest.fixture
+def record(make_ppg_abp):
+    ppg, abp = make_ppg_abp(4 * 60)
+    # Mains interference and invalid stretches for the filter and cleaning stages
+    ppg += 0.2 * np.sin(2 * np.pi * 50 * np.arange(len(ppg)) / 125)
+    ppg[300:320] = np.nan
+    abp[5000:5100] = 250
+    return ppg, abp
+
+
+def test_default_pipeline_matches_combined_pipeline(record):
+    ppg, abp = record
+    expected_ppg, expected_abp = combined_pipeline(ppg, abp, 125)
+    cleaned_ppg, cleaned_abp = Pipeline.default().run(ppg, abp, 125)
+
+    np.testing.assert_array_equal(cleaned_ppg, expected_ppg)
+    np.testing.assert_array_equal(cleaned_abp, expected_abp)
+
+
+def test_config_round_trip():
+    pipeline = Pipeline([
+        Stage("remove_invalid_values"),
+        Stage("highpass_filter", cutoff=0.5),
+        Stage("notch_filter", notch_freq=50),
+        Stage("resample_signal", target_fs=100),
+    ], fuse=False)
+
+    config = json.loads(json.dumps(pipeline.to_config()))
+    restored = Pipeline.from_config(config)
+    assert restored.stages == pipeline.stages and restored.fuse is False
+
+
+def test_filter_stages_are_fused(record):
+    fs = 125
+    ppg, abp = record
+    stages = [
+        Stage("remove_invalid_values"),
+        Stage("remove_out_of_range_bp"),
+        Stage("highpass_filter", cutoff=0.5),
+        Stage("lowpass_filter", cutoff=8.0),
+        Stage("notch_filter", notch_freq=50),
+        Stage("hampel_filter"),
+    ]
+    pipeline = Pipeline(stages)
+    assert [len(step) for step in pipeline.plan()] == [1, 1, 3, 1]
+
+    profiler = PipelineProfiler()
+    fused_ppg, _ = pipeline.run(ppg, abp, fs, profiler=profiler)
+    records = {r.stage: r for r in profiler.records}
+    assert "highpass_filter+lowpass_filter+notch_filter" in records
+    # The fused filters keep the length, so they see the same number of samples as the Hampel filter
+    assert records["highpass_filter+lowpass_filter+notch_filter"].input_length == records["hampel_filter"].input_length
+    assert records["hampel_filter"].input_length == len(fused_ppg)
+
+    sequential_ppg, _ = Pipeline(stages, fuse=False).run(ppg, abp, fs)
+    # The cascades only differ in the edge padding
+    edge = 20 * fs
+    np.testing.assert_allclose(fused_ppg[edge:-edge], sequential_ppg[edge:-edge], atol=1e-6)
+
+
+def test_alignment_must_be_last():
+    with pytest.raises(ValueError):
+        Pipeline([Stage("find_peaks_and_max_correlation"), Stage("hampel_filter")])
@@ -1,5 +1,10 @@
+import numpy as np
+from scipy.signal import resample_poly
+
 # Import specific functions from preprocessing.py via the __init__.py setup
-from ppg_cleaner import zscore_normalization, min_max_normalization, rescale_signal, clip_signal
+from ppg_cleaner import (zscore_normalization, min_max_normalization, rescale_signal, clip_signal,
+                         remove_invalid_values, remove_out_of_range_bp, interpolate_invalid_values,
+                         resample_signal, downsample_signal, baseline_wander_removal)
 
 # Test cases for the functions
 def test_zscore_normalization():
@@ -18,8 +23,123 @@ def test_rescale_signal():
     rescaled_signal = rescale_signal(signal)
     print("Rescaled Signal:", rescaled_signal)
 
+
+def test_multichannel_preprocessing():
+    ppg = np.array([[1.0, 2.0, np.nan, 4.0, 5.0],
+                    [1.0, np.inf, 3.0, 4.0, 5.0]])
+    abp = np.array([80.0, 90.0, 100.0, 300.0, 110.0])
+    cleaned_ppg, cleaned_abp = remove_invalid_values(ppg, abp)
+    np.testing.assert_array_equal(cleaned_ppg, [[1.0, 4.0, 5.0], [1.0, 4.0, 5.0]])
+    np.testing.assert_array_equal(cleaned_abp, [80.0, 300.0, 110.0])
+
+    cleaned_ppg, cleaned_abp = remove_out_of_range_bp(cleaned_ppg, cleaned_abp)
+    np.testing.assert_array_equal(cleaned_ppg, [[1.0, 5.0], [1.0, 5.0]])
+
+    signals = np.array([[1.0, 2.0, 3.0], [10.0, 20.0, 30.0]])
+    normalized = zscore_normalization(signals, axis=-1)
+    np.testing.assert_allclose(normalized[0], normalized[1])
+    np.testing.assert_allclose(min_max_normalization(signals, 0, 1, axis=-1), [[0, 0.5, 1], [0, 0.5, 1]])
+
+
+def test_out_buffers_are_reused():
+    signal = np.array([1.0, 2.0, 3.0, 4.0, 5.0])
+    expected = zscore_normalization(signal)
+    buffer = signal.copy()
+    result = zscore_normalization(buffer, out=buffer)
+    assert result is buffer
+    np.testing.assert_allclose(buffer, expected)
+
+    buffer = signal.copy()
+    assert min_max_normalization(buffer, -1, 1, out=buffer) is buffer
+    np.testing.assert_allclose(buffer, [-1, -0.5, 0, 0.5, 1])
+
+    out = np.empty_like(signal)
+    assert rescale_signal(-signal, out=out) is out
+    np.testing.assert_allclose(out, -signal / 5)
+
+    assert clip_signal(signal, 2, 4, out=out) is out
+    np.testing.assert_array_equal(out, [2, 2, 3, 4, 4])
+
+
+def test_interpolate_invalid_values_keeps_timestamps():
+    fs = 10
+    ppg = np.arange(100, dtype=float)
+    abp = np.full(100, 90.0)
+    ppg[20:25] = np.nan          # short gap, interpolated
+    abp[50:70] = 250.0           # long gap, splits the record
+    ppg[0:3] = np.nan            # gap at the edge cannot be interpolated
+
+    filled_ppg, filled_abp, segments = interpolate_invalid_values(ppg, abp, fs, max_gap=1.0, max_bp=200)
+
+    assert len(filled_ppg) == 100
+    np.testing.assert_allclose(filled_ppg[20:25], np.arange(20, 25))
+    assert np.all(np.isnan(filled_abp[50:70])) and np.all(np.isnan(filled_ppg[:3]))
+    np.testing.assert_array_equal(segments, [[3, 50], [70, 100]])
+
+
+def test_interpolate_invalid_values_multi_channel():
+    fs = 10
+    ppg = np.vstack([np.arange(100, dtype=float), -np.arange(100, dtype=float)])
+    abp = np.full(100, 90.0)
+    ppg[1, 20:25] = np.nan       # a gap in one channel is filled in every channel
+    abp[50:70] = 250.0
+
+    filled_ppg, filled_abp, segments = interpolate_invalid_values(ppg, abp, fs, max_gap=1.0, max_bp=200)
+    assert filled_ppg.shape == (2, 100)
+    np.testing.assert_allclose(filled_ppg[:, 20:25], [np.arange(20, 25), -np.arange(20, 25)])
+    assert np.all(np.isnan(filled_ppg[:, 50:70])) and np.all(np.isnan(filled_abp[50:70]))
+    np.testing.assert_array_equal(segments, [[0, 50], [70, 100]])
+
+    # The same record with time on the first axis
+    filled_ppg_t, _, segments_t = interpolate_invalid_values(ppg.T, abp, fs, max_gap=1.0, max_bp=200, axis=0)
+    np.testing.assert_array_equal(filled_ppg_t, filled_ppg.T)
+    np.testing.assert_array_equal(segments_t, segments)
+
+
+def test_resample_signal_rational_rates():
+    signal = np.random.default_rng(0).standard_normal(1250)
+    np.testing.assert_allclose(resample_signal(signal, 125, 100), resample_poly(signal, 4, 5))
+    np.testing.assert_allclose(resample_signal(signal, 500, 125), resample_poly(signal, 1, 4))
+    assert len(resample_signal(signal, 125, 250)) == 2500
+    assert len(downsample_signal(signal, 125, 100, method="poly")) == 1000
+
+
+def test_local_baseline_removal_methods():
+    fs = 125
+    t = np.arange(10 * 60 * fs) / fs
+    pulse = np.sin(2 * np.pi * 1.2 * t) ** 3
+    wander = 2 * np.sin(2 * np.pi * 0.05 * t) + 0.5 * np.sin(2 * np.pi * 0.01 * t)
+    signal = pulse + wander
+
+    def residual(cleaned):
+        return np.std(cleaned - cleaned.mean() - (pulse - pulse.mean()))
+
+    assert residual(baseline_wander_removal(signal, fs, 'linear')) > 1
+    assert residual(baseline_wander_removal(signal, fs, 'piecewise', segment_duration=3)) < 0.1
+    assert residual(baseline_wander_removal(signal, fs, 'median')) < 0.1
+    assert residual(baseline_wander_removal(signal, fs, 'morphological')) < 0.1
+    assert residual(baseline_wander_removal(signal, fs, 'spline')) < 0.02
+
+    # Channels along any axis are processed independently
+    stacked = np.stack([signal, -signal], axis=1)
+    cleaned = baseline_wander_removal(stacked, fs, 'piecewise', axis=0)
+    np.testing.assert_allclose(cleaned[:, 1], -baseline_wander_removal(signal, fs, 'piecewise'), atol=1e-9)
+
+
+def test_piecewise_baseline_is_least_squares_fit():
+    rng = np.random.default_rng(0)
+    signal = rng.standard_normal(1037).cumsum()
+    cleaned = baseline_wander_removal(signal, 10, 'piecewise', segment_duration=10)
+
+    # Dense hat-function basis with knots every 100 samples and at the last sample
+    knots = np.append(np.arange(0, 1037, 100), 1036)
+    basis = np.stack([np.interp(np.arange(1037), knots, unit) for unit in np.eye(len(knots))], axis=1)
+    coefficients = np.linalg.lstsq(basis, signal, rcond=None)[0]
+    np.testing.assert_allclose(cleaned, signal - basis @ coefficients, atol=1e-9)
+
+
 # Run the test cases
 if __name__ == "__main__":
     test_zscore_normalization()
     test_min_max_normalization()
-    test_rescale_signal()
\ No newline at end of file
+    test_rescale_signal()
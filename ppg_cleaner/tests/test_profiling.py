@@ -0,0 +1,39 @@
+import numpy as np
+from ppg_cleaner import PipelineProfiler, summarize_stage_records, batch_pipeline
+from ppg_cleaner.combined_pipeline import combined_pipeline
+
+
+def test_profiler_records_every_stage(make_ppg_abp):
+    ppg, abp = make_ppg_abp(3 * 60)
+    ppg[:100] = np.nan
+    seen = []
+    profiler = PipelineProfiler(callback=seen.append, trace_memory=True, record="r1")
+
+    expected = combined_pipeline(ppg, abp, 125)
+    result = combined_pipeline(ppg, abp, 125, profiler=profiler)
+
+    np.testing.assert_array_equal(result[0], expected[0])
+    assert [r.stage for r in profiler.records] == [
+        "remove_invalid_values", "remove_out_of_range_bp", "baseline_wander_removal",
+        "bandpass_filter", "hampel_filter", "find_peaks_and_max_correlation",
+    ]
+    assert seen == profiler.records
+    first = profiler.records[0]
+    assert first.input_length == len(ppg) and first.output_length == len(ppg) - 100
+    assert all(r.bytes_allocated is not None and r.wall_time >= 0 for r in profiler.records)
+
+    exported = profiler.to_records()
+    assert exported[0]["record"] == "r1" and exported[0]["stage"] == "remove_invalid_values"
+    assert summarize_stage_records(exported)["hampel_filter"]["calls"] == 1
+
+
+def test_batch_profiles(make_ppg_abp):
+    records = [make_ppg_abp(3 * 60), make_ppg_abp(3 * 60)]
+    for ppg, _ in records:
+        ppg[:100] = np.nan
+    results = list(batch_pipeline(records, fs=125, max_workers=2, profile=True))
+
+    all_records = [r for result in results for r in result.profile]
+    summary = summarize_stage_records(all_records)
+    assert summary["bandpass_filter"]["calls"] == 2
+    assert {r["record"] for r in all_records} == {0, 1}
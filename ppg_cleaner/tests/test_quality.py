@@ -0,0 +1,68 @@
+import numpy as np
+from ppg_cleaner import window_quality, quality_mask, prescreen_intervals
+from ppg_cleaner.combined_pipeline import combined_pipeline
+
+
+def test_window_quality_flags_each_defect(make_ppg_abp):
+    fs = 125
+    ppg, _ = make_ppg_abp(60, fs)
+    ppg[10 * fs:20 * fs] = 0.3                                                   # flatline
+    ppg[20 * fs:30 * fs] = np.clip(3 * ppg[20 * fs:30 * fs], -1.5, 1.5)           # clipping
+    ppg[30 * fs:40 * fs] = np.random.default_rng(1).standard_normal(10 * fs)      # broadband noise
+    ppg[40 * fs + 7] = 40.0                                                      # spike
+
+    starts, features = window_quality(ppg, fs, window_duration=10)
+
+    np.testing.assert_array_equal(starts, np.arange(6) * 10 * fs)
+    assert features["flatline_ratio"][1] == 1.0 and features["flatline_ratio"][0] < 0.01
+    assert features["clipping_ratio"][2] > 0.3 and features["clipping_ratio"][0] < 0.01
+    assert features["cardiac_power_ratio"][3] < 0.3 and features["cardiac_power_ratio"][0] > 0.9
+    assert features["kurtosis"][4] > 100 and abs(features["kurtosis"][0]) < 2
+    np.testing.assert_array_equal(quality_mask(features), [True, False, False, False, False, True])
+
+
+def test_window_quality_multichannel_and_nan(make_ppg_abp):
+    fs = 125
+    ppg, abp = make_ppg_abp(30, fs)
+    abp[12 * fs] = np.nan
+    _, features = window_quality(np.vstack([ppg, abp]), fs, window_duration=10)
+
+    assert features["kurtosis"].shape == (2, 3)
+    np.testing.assert_array_equal(quality_mask(features), [[True, True, True], [True, False, True]])
+
+
+def test_prescreen_intervals_cover_trailing_samples(make_ppg_abp):
+    fs = 125
+    ppg, abp = make_ppg_abp(35, fs)
+    abp[10 * fs:20 * fs] = 0.0
+
+    np.testing.assert_array_equal(prescreen_intervals(ppg, abp, fs, 10), [[0, 10 * fs], [20 * fs, 35 * fs]])
+    np.testing.assert_array_equal(prescreen_intervals(ppg[:fs], abp[:fs], fs, 10), [[0, fs]])
+
+
+def test_combined_pipeline_prescreen_skips_bad_windows(make_ppg_abp):
+    fs = 125
+    ppg, abp = make_ppg_abp(8 * 60, fs)
+    ppg[int(2.5 * 60 * fs):int(5.5 * 60 * fs)] = 0.0
+
+    cleaned_ppg, cleaned_abp = combined_pipeline(ppg, abp, fs, prescreen=True)
+    assert len(cleaned_ppg) == len(cleaned_abp) == 2 * 60 * fs
+    # The selected window lies entirely outside the flatline
+    assert np.mean(np.diff(cleaned_ppg) == 0) < 0.01
+
+    cleaned_ppg, _ = combined_pipeline(ppg, abp, fs, prescreen=True, invalid_handling="interpolate")
+    assert len(cleaned_ppg) == 2 * 60 * fs and np.mean(np.diff(cleaned_ppg) == 0) < 0.01
+
+
+def test_prescreen_options_reach_quality_mask(make_ppg_abp):
+    fs = 125
+    ppg, abp = make_ppg_abp(5 * 60, fs, abp_noise=0.5)
+    # ABP stored in steps of 1 mmHg repeats values on the flat parts of each beat
+    abp = np.round(abp)
+
+    assert len(prescreen_intervals(ppg, abp, fs)) == 0
+    np.testing.assert_array_equal(prescreen_intervals(ppg, abp, fs, max_flatline_ratio=0.4), [[0, len(abp)]])
+
+    assert combined_pipeline(ppg, abp, fs, prescreen=True) == (None, None)
+    cleaned_ppg, _ = combined_pipeline(ppg, abp, fs, prescreen=True, prescreen_options={"max_flatline_ratio": 0.4})
+    assert len(cleaned_ppg) == 2 * 60 * fs
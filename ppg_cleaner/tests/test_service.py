@@ -0,0 +1,89 @@
+import asyncio
+
+import numpy as np
+from ppg_cleaner import MonitoringService, StreamingCleaner
+
+
+async def _source(ppg, abp, chunk_size=250):
+    for start in range(0, len(ppg), chunk_size):
+        await asyncio.sleep(0)
+        yield ppg[start:start + chunk_size], abp[start:start + chunk_size]
+
+
+async def _collect(queue, delay=0.0):
+    chunks = []
+    while True:
+        item = await queue.get()
+        if item is None:
+            return chunks
+        chunks.append(item)
+        await asyncio.sleep(delay)
+
+
+def _reference(ppg, abp):
+    cleaner = StreamingCleaner(125)
+    outputs = [cleaner.push(ppg, abp), cleaner.flush()]
+    return np.concatenate([o[0] for o in outputs]), np.concatenate([o[1] for o in outputs])
+
+
+def test_service_cleans_many_beds(make_ppg_abp):
+    beds = {f"bed{i}": make_ppg_abp(16, seed=i) for i in range(5)}
+
+    async def main():
+        service = MonitoringService(125, max_batch_delay=0.01, max_queue_chunks=2)
+        outputs = {bed: service.add_bed(bed) for bed in beds}
+        runner = asyncio.create_task(service.run())
+        # One slow consumer must not hold back the other beds
+        collectors = {bed: asyncio.create_task(_collect(queue, 0.01 if bed == "bed0" else 0.0))
+                      for bed, queue in outputs.items()}
+        await asyncio.gather(*(service.ingest(bed, _source(*signals)) for bed, signals in beds.items()))
+        results = {bed: await task for bed, task in collectors.items()}
+        service.stop()
+        await runner
+        return results
+
+    results = asyncio.run(main())
+    for bed, (ppg, abp) in beds.items():
+        expected_ppg, expected_abp = _reference(ppg, abp)
+        np.testing.assert_allclose(np.concatenate([c[0] for c in results[bed]]), expected_ppg, atol=1e-12)
+        np.testing.assert_allclose(np.concatenate([c[1] for c in results[bed]]), expected_abp, atol=1e-12)
+
+
+def test_service_backpressure_blocks_producer(make_ppg_abp):
+    async def main():
+        service = MonitoringService(125, max_batch_delay=0.001, max_queue_chunks=2)
+        service.add_bed("bed")
+        runner = asyncio.create_task(service.run())
+        ppg, abp = make_ppg_abp(16)
+
+        # Nobody reads the output: the output queue and then the input queue fill up
+        producer = asyncio.create_task(service.ingest("bed", _source(ppg, abp, 100)))
+        await asyncio.sleep(0.1)
+        assert not producer.done()
+        assert service.output("bed").qsize() <= 1
+
+        drained = await _collect(service.output("bed"))
+        await producer
+        service.stop()
+        await runner
+        return drained
+
+    drained = asyncio.run(main())
+    assert sum(len(c[0]) for c in drained) == 2000
+
+
+def test_service_created_outside_event_loop(make_ppg_abp):
+    service = MonitoringService(125, max_batch_delay=0.001)
+    ppg, abp = make_ppg_abp(4)
+
+    async def main():
+        output = service.add_bed("bed")
+        runner = asyncio.create_task(service.run())
+        await service.ingest("bed", _source(ppg, abp, 100))
+        chunks = await _collect(output)
+        service.stop()
+        await runner
+        return chunks
+
+    chunks = asyncio.run(main())
+    assert sum(len(c[0]) for c in chunks) == len(ppg)
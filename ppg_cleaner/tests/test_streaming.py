@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+from scipy.signal import sosfilt, sosfilt_zi
+from ppg_cleaner import StreamingCleaner, StreamingResampler, hampel_filter, push_many, resample_signal
+from ppg_cleaner.filtering import design_filter
+
+
+@pytest.fixture
+def signals(make_ppg_abp):
+    def make(n=4000, seed=0):
+        ppg, abp = make_ppg_abp(n / 125, seed=seed)
+        ppg[np.random.default_rng(seed).integers(0, n, 20)] += 4
+        return ppg, abp
+    return make
+
+
+def _stream(cleaner, ppg, abp, chunk_sizes):
+    outputs = []
+    start = 0
+    for size in chunk_sizes:
+        outputs.append(cleaner.push(ppg[start:start + size], abp[start:start + size]))
+        start += size
+    outputs.append(cleaner.flush())
+    return np.concatenate([o[0] for o in outputs]), np.concatenate([o[1] for o in outputs])
+
+
+def test_chunking_does_not_change_output(signals):
+    ppg, abp = signals()
+    whole_ppg, whole_abp = _stream(StreamingCleaner(125), ppg, abp, [len(ppg)])
+    chunked_ppg, chunked_abp = _stream(StreamingCleaner(125), ppg, abp, [1, 7, 250, 3, 1000, 2739])
+
+    np.testing.assert_allclose(chunked_ppg, whole_ppg)
+    np.testing.assert_allclose(chunked_abp, whole_abp)
+    assert len(whole_ppg) == len(ppg)
+
+
+def test_matches_causal_offline_stages(signals):
+    fs = 125
+    ppg, abp = signals()
+    cleaned_ppg, _ = _stream(StreamingCleaner(fs), ppg, abp, [128] * 31 + [32])
+
+    expected = ppg
+    for sos in (design_filter('high', fs, 0.05, order=1), design_filter('band', fs, (0.5, 8.0))):
+        expected, _ = sosfilt(sos, expected, zi=sosfilt_zi(sos) * expected[0])
+    expected = hampel_filter(expected, 10, 3)
+    np.testing.assert_allclose(cleaned_ppg, expected)
+
+
+def test_fixed_latency_and_invalid_samples(signals):
+    ppg, abp = signals(n=1000)
+    ppg[100:110] = np.nan
+    abp[500] = 300
+    cleaner = StreamingCleaner(125)
+
+    out_ppg, out_abp = cleaner.push(ppg[:200], abp[:200])
+    assert len(out_ppg) == 200 - cleaner.latency
+    assert np.all(np.isfinite(out_ppg))
+
+    out_ppg, out_abp = cleaner.push(ppg[200:], abp[200:])
+    assert len(out_ppg) == 800
+    assert np.all(np.isfinite(out_abp))
+
+
+def test_leading_invalid_samples_dropped(signals):
+    ppg, abp = signals(n=500)
+    abp[:30] = np.nan
+    out_ppg, _ = _stream(StreamingCleaner(125), ppg, abp, [20, 480])
+    assert len(out_ppg) == 470
+
+
+def test_streaming_resampler_matches_offline():
+    signal = np.random.default_rng(3).standard_normal(4001)
+    for original_fs, target_fs in [(125, 100), (500, 125), (125, 250)]:
+        resampler = StreamingResampler(original_fs, target_fs)
+        pieces = [resampler.push(signal[i:i + 333]) for i in range(0, len(signal), 333)]
+        pieces.append(resampler.flush())
+        np.testing.assert_allclose(np.concatenate(pieces), resample_signal(signal, original_fs, target_fs),
+                                   atol=1e-12)
+
+
+def test_push_many_matches_individual_push(signals):
+    beds = [signals(seed=seed) for seed in range(4)]
+    # Leading invalid samples make one bed's buffers shorter, so it cannot share a batch
+    beds[2][1][:5] = np.nan
+
+    individual = [StreamingCleaner(125) for _ in beds]
+    batched = [StreamingCleaner(125) for _ in beds]
+    for start in range(0, 4000, 500):
+        expected = [cleaner.push(ppg[start:start + 500], abp[start:start + 500])
+                    for cleaner, (ppg, abp) in zip(individual, beds)]
+        results = push_many(batched, [ppg[start:start + 500] for ppg, _ in beds],
+                            [abp[start:start + 500] for _, abp in beds])
+        for (expected_ppg, expected_abp), (ppg, abp) in zip(expected, results):
+            np.testing.assert_allclose(ppg, expected_ppg, rtol=1e-12, atol=1e-12)
+            np.testing.assert_allclose(abp, expected_abp, rtol=1e-12, atol=1e-12)
@@ -0,0 +1,17 @@
+import numpy as np
+from ppg_cleaner.utils import mask_to_intervals, intervals_to_mask, complement_intervals
+
+
+def test_intervals_round_trip():
+    mask = np.array([1, 1, 0, 0, 1, 0, 1, 1, 1], dtype=bool)
+    intervals = mask_to_intervals(mask)
+
+    np.testing.assert_array_equal(intervals, [[0, 2], [4, 5], [6, 9]])
+    np.testing.assert_array_equal(intervals_to_mask(intervals, len(mask)), mask)
+    np.testing.assert_array_equal(complement_intervals(intervals, len(mask)), [[2, 4], [5, 6]])
+
+
+def test_empty_mask():
+    intervals = mask_to_intervals(np.zeros(5, dtype=bool))
+    assert intervals.shape == (0, 2)
+    np.testing.assert_array_equal(complement_intervals(intervals, 5), [[0, 5]])
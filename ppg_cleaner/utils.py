@@ -0,0 +1,55 @@
+import numpy as np
+
+
+def mask_to_intervals(mask):
+    """
+    Run-length encode the True runs of a boolean mask.
+
+    Parameters:
+    - mask: 1-D boolean mask (NumPy array).
+
+    Returns:
+    - intervals: Integer array of shape (n_runs, 2) holding the [start, stop) of each run.
+    """
+    mask = np.asarray(mask, dtype=bool)
+    edges = np.diff(mask.astype(np.int8), prepend=0, append=0)
+    starts = np.flatnonzero(edges == 1)
+    stops = np.flatnonzero(edges == -1)
+    return np.column_stack([starts, stops])
+
+
+def intervals_to_mask(intervals, length):
+    """
+    Expand [start, stop) intervals into a boolean mask.
+
+    Parameters:
+    - intervals: Integer array of shape (n_intervals, 2), possibly overlapping.
+    - length: Length of the mask.
+
+    Returns:
+    - mask: Boolean mask that is True inside any interval.
+    """
+    intervals = np.asarray(intervals, dtype=np.int64).reshape(-1, 2)
+    intervals = np.clip(intervals, 0, length)
+    delta = np.zeros(length + 1, dtype=np.int64)
+    np.add.at(delta, intervals[:, 0], 1)
+    np.add.at(delta, intervals[:, 1], -1)
+    return np.cumsum(delta[:-1]) > 0
+
+
+def complement_intervals(intervals, length):
+    """
+    Intervals of [0, length) not covered by the given sorted, non-overlapping intervals.
+
+    Parameters:
+    - intervals: Integer array of shape (n_intervals, 2).
+    - length: Length of the covered range.
+
+    Returns:
+    - intervals: Integer array of shape (n_gaps, 2) with the uncovered [start, stop) runs.
+    """
+    intervals = np.asarray(intervals, dtype=np.int64).reshape(-1, 2)
+    starts = np.concatenate([[0], intervals[:, 1]])
+    stops = np.concatenate([intervals[:, 0], [length]])
+    keep = stops > starts
+    return np.column_stack([starts[keep], stops[keep]])
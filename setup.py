@@ -14,5 +14,5 @@ setup(
         "matplotlib",
         "sklearn"
     ],
-    python_requires=">=3.7",
+    python_requires=">=3.9",
 )
\ No newline at end of file